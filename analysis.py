@@ -2,10 +2,10 @@ import numpy as np
 import pandas as pd
 import networkx as nx
 import os
+from concurrent.futures import ProcessPoolExecutor
 import matplotlib.pyplot as plt
 from datetime import datetime
 from networkx.algorithms import community
-from networkx.algorithms import centrality
 from networkx.algorithms import components
 
 
@@ -15,12 +15,26 @@ import lib.metrics as metrics
 import lib.textminer as textminer
 import lib.textminer_nlp as textminer_nlp
 import lib.topic_model as topic_model
+import lib.betweenness as betweenness
+import lib.dendrogram as dendrogram
+import lib.citation_network as citation_network
+import lib.csr_graph as csr_graph
+import lib.graph_store as graph_store
+import lib.centrality as centrality
+import lib.temporal as temporal
+import lib.author_network as author_network
+import lib.out_of_core as out_of_core
 
 ALLDATA_FILE = "./data/16-06-2021_1444_Natural Language Processing/alldata.xlsx"
 MAINPUBS_FILE = "./data/16-06-2021_1444_Natural Language Processing/main_pubs.xlsx"
 SAVEPATH = "./data/16-06-2021_1444_Natural Language Processing"
 MIN_YEAR = 2010
 MAX_YEAR = 2020
+NETWORK_COLUMNS = ['Pub_1', 'Pub_2', 'Weight', "Interaction",
+                   'Pub_1_title', 'Pub_1_abstract', 'Pub_1_year', 'Pub_1_authors', 'Pub_1_link', "Pub_1_type",
+                   'Pub_2_title', 'Pub_2_abstract', 'Pub_2_year', 'Pub_2_authors', 'Pub_2_link', "Pub_2_type"]
+CENTRALITY_SUMMARY_COLUMNS = ['Total PageRank', 'Mean Weighted Degree', 'Mean Eigenvector Centrality',
+                              'Max K-Core', 'Most Central Publication']
 
 
 def create_nodes(alldata_df):
@@ -85,7 +99,7 @@ def create_nodes(alldata_df):
     return full_node_dict
 
 
-def create_network_file(node_dict, alldata_df, min_strength, cluster_algo, savepath):
+def create_network_file(node_dict, alldata_df, min_strength, cluster_algo, savepath, processes=None, cluster_level=None):
     ''' Creates a network .xlsx file to be used for visualisation on Cytoscape
         columns: ['Publication_1', 'Publication_2',
             'Weight', 'Topic Number', 'Topic']
@@ -107,6 +121,13 @@ def create_network_file(node_dict, alldata_df, min_strength, cluster_algo, savep
         savepath: str
                 the path to the folder to save this cluster
 
+        processes : int, optional
+                number of processes used to cluster the connected components, defaults to os.cpu_count()
+
+        cluster_level : int, optional
+                Girvan Newman only, the level of the saved hierarchy to cut at (see
+                dendrogram_levels.xlsx), defaults to the level with the highest modularity
+
         Returns :
         clusters : list
                 List of the clusters in the analysis
@@ -133,23 +154,404 @@ def create_network_file(node_dict, alldata_df, min_strength, cluster_algo, savep
         if not added_to_graph:
             network_graph.add_node(pub_id)  # add orphan node
 
-    components = []
-    if cluster_algo == 1:
-        components=_create_clusters_girvannewman(network_graph)
+    network_df = pd.DataFrame(data=final_interaction_list, columns=NETWORK_COLUMNS)
+    return _cluster_and_save_network(network_graph, network_df, alldata_df, cluster_algo, savepath,
+                                     processes, cluster_level)
+
+def create_citation_network_file(network, network_mode, alldata_df, min_strength, cluster_algo, savepath,
+                                 processes=None, cluster_level=None, normalization=0, top_k=None, backbone_alpha=None):
+    ''' Creates the network .xlsx file of a network built by lib.citation_network, like
+        create_network_file(...) does for the bibliographic couples of the nodes
+
+        Parameters
+        ------------
+        network : tuple
+                (list of Result_id, scipy sparse matrix of weights, numpy array of occurrences),
+                see citation_network.create_networks(...)
+
+        network_mode : int
+                0 - Bibliographic coupling, 1 - Co-citation, 2 - Direct citation
+
+        alldata_df : pandas DataFrame
+                a DataFrame containing all publications extracted
+
+        min_strength: int
+                the minimum edge weight to add this edge into the graph
+
+        cluster_algo : int
+                0 - Clauset Newman Moore, 1 - Girvan Newman, 2 - Louvain
+
+        savepath: str
+                the path to the folder to save this network
+
+        processes : int, optional
+                number of processes used to cluster the connected components, defaults to os.cpu_count()
+
+        cluster_level : int, optional
+                Girvan Newman only, the level of the saved hierarchy to cut at
+
+        normalization : int
+                0 - Raw counts, 1 - Salton cosine, 2 - Jaccard, 3 - Association strength
+
+        top_k : int, optional
+                keep only the top_k strongest edges of every publication
+
+        backbone_alpha : float, optional
+                keep only the disparity filter backbone at this significance level
+
+        Returns :
+        clusters : list
+                List of the clusters in the analysis
+    '''
+
+    result_ids, weights, occurrences = citation_network.prune_network(network, min_strength, normalization,
+                                                                      top_k, backbone_alpha)
+    network_graph = csr_graph.CSRGraph.from_matrix(result_ids, weights)
+    return create_graph_network_file(network_graph, network_mode, alldata_df, cluster_algo, savepath,
+                                     processes, cluster_level)
+
+def create_out_of_core_network_file(alldata_file, min_strength, savepath, chunk_size=out_of_core.CHUNK_SIZE):
+    ''' Bibliographic coupling network and louvain clusters of a publication table too large
+        for memory. The table is streamed in chunks, the coupling is computed blockwise, the
+        edges are spilled to savepath/out_of_core and the graph is memory-mapped from there,
+        see out_of_core.build_coupling_graph(...). Louvain reads the memory-mapped edges a
+        block at a time, only the collapsed graph of its first level is held in memory, see
+        csr_graph.louvain(...). The results are written in chunks to network.csv and
+        clusters.csv, since they can exceed the row limit of a workbook.
+
+        Parameters
+        ------------
+        alldata_file : str
+                path to alldata.xlsx or alldata.csv
+
+        min_strength : int
+                the minimum coupling strength to keep an edge
+
+        savepath: str
+                the path to the folder to save the files
+
+        chunk_size : int
+                number of rows read at a time
+
+        Returns
+        ------------
+        network_graph : CSRGraph
+                the coupling network, memory-mapped
+
+        labels : numpy array
+                the cluster of every node of network_graph, numbered from 1 by decreasing size.
+                Edges between two clusters have Cluster 0 in network.csv
+    '''
+
+    folder = savepath + "/out_of_core"
+    network_graph, years = out_of_core.build_coupling_graph(alldata_file, folder, min_strength, chunk_size)
+    labels = csr_graph.louvain(network_graph)
+    sizes = np.bincount(labels)
+    ranking = np.empty(len(sizes), dtype=np.int64)
+    ranking[np.argsort(-sizes, kind="stable")] = np.arange(1, len(sizes) + 1)
+    labels = ranking[labels]
+
+    result_ids = np.array(network_graph.result_ids, dtype=object)
+    pd.DataFrame({'Result_id': result_ids, 'Year': years, 'Cluster': labels}).to_csv(savepath + "/clusters.csv",
+                                                                                      index=False)
+    network_path = savepath + "/network.csv"
+    pd.DataFrame(columns=['Pub_1', 'Pub_2', 'Weight', 'Cluster']).to_csv(network_path, index=False)
+    for rows, cols, weights in out_of_core.iter_spilled_edges(folder):
+        same = labels[rows] == labels[cols]
+        pd.DataFrame({'Pub_1': result_ids[rows], 'Pub_2': result_ids[cols], 'Weight': weights,
+                      'Cluster': np.where(same, labels[rows], 0)}).to_csv(network_path, mode="a", header=False,
+                                                                          index=False)
+    return network_graph, labels
+
+def create_streaming_topic_file(alldata_file, savepath, max_topics=topic_model.MAX_TOPICS,
+                                chunk_size=topic_model.STREAM_CHUNK_SIZE):
+    ''' Groups the publications of a table too large for memory by their Title and Abstract,
+        streaming the file in chunks, see topic_model.find_optimal_clusters_streaming(...) and
+        topic_model.streaming_clusters(...). The topic of every row is written in chunks to
+        topics.csv and the elbow of the number of topics to elbow_method.png.
+
+        Parameters
+        ------------
+        alldata_file : str
+                path to alldata.xlsx or alldata.csv
+
+        savepath: str
+                the path to the folder to save the files
+
+        max_topics : int
+                the largest number of topics
+
+        chunk_size : int
+                number of rows read at a time
+
+        Returns
+        ------------
+        no_of_topics : int
+                the number of topics at the elbow, 1 if there is no elbow
+
+        topics : numpy array
+                the topic of every row of alldata_file
+    '''
+
+    chunks = lambda: topic_model.file_chunks(alldata_file, chunk_size)
+    reducer = topic_model.fit_stream_reducer(chunks)
+    no_of_topics = topic_model.find_optimal_clusters_streaming(chunks, max_topics, reducer) or 1
+    plt.savefig(savepath + "/elbow_method.png")
+    plt.close()
+    topics = topic_model.streaming_clusters(chunks, no_of_topics, reducer)
+
+    topics_path = savepath + "/topics.csv"
+    pd.DataFrame(columns=['Result_id', 'Topic']).to_csv(topics_path, index=False)
+    start = 0
+    for chunk_df in out_of_core.iter_alldata_chunks(alldata_file, chunk_size, ["Result_id"]):
+        end = start + len(chunk_df.index)
+        pd.DataFrame({'Result_id': chunk_df["Result_id"], 'Topic': topics[start:end]}).to_csv(
+            topics_path, mode="a", header=False, index=False)
+        start = end
+    return no_of_topics, topics
+
+def create_graph_network_file(network_graph, network_mode, alldata_df, cluster_algo, savepath,
+                              processes=None, cluster_level=None):
+    ''' Creates the network .xlsx file of an already pruned CSRGraph, for example one loaded
+        from the graph store (see lib.graph_store)
+
+        Parameters
+        ------------
+        network_graph : CSRGraph
+                the pruned network
+
+        network_mode : int
+                0 - Bibliographic coupling, 1 - Co-citation, 2 - Direct citation
+
+        alldata_df : pandas DataFrame
+                a DataFrame containing all publications extracted
+
+        cluster_algo : int
+                0 - Clauset Newman Moore, 1 - Girvan Newman, 2 - Louvain
+
+        savepath: str
+                the path to the folder to save this network
+
+        processes : int, optional
+                number of processes used to cluster the connected components, defaults to os.cpu_count()
+
+        cluster_level : int, optional
+                Girvan Newman only, the level of the saved hierarchy to cut at
+
+        Returns :
+        clusters : list
+                List of the clusters in the analysis
+    '''
+
+    edges = network_graph.edge_list()
+    network_df = _create_interaction_df(edges, alldata_df, citation_network.NETWORK_MODES[network_mode])
+    return _cluster_and_save_network(network_graph, network_df, alldata_df, cluster_algo, savepath,
+                                     processes, cluster_level)
+
+def create_author_network_file(alldata_df, author_network_type, min_strength, cluster_algo, savepath, processes=None):
+    ''' Creates an author network from the Authors_id of the publications, clusters it with
+        the same algorithms as the publication networks and saves author_network.xlsx with the
+        edges and authors.xlsx with the productivity, impact and cluster of every author
+
+        Parameters
+        ------------
+        alldata_df : pandas DataFrame
+                a DataFrame containing all publications extracted
+
+        author_network_type : int
+                0 - Co-authorship, 1 - Author bibliographic coupling
+
+        min_strength: int
+                the minimum edge weight to add this edge into the graph
+
+        cluster_algo : int
+                0 - Clauset Newman Moore, 1 - Girvan Newman, 2 - Louvain
+
+        savepath: str
+                the path to the folder to save the files
+
+        processes : int, optional
+                number of processes used to cluster the connected components, defaults to os.cpu_count()
+
+        Returns
+        ------------
+        clusters : list of tuples
+                the Authors_id of every cluster of more than one author
+
+        authors_df : pandas DataFrame
+                columns : author_network.METRIC_COLUMNS + ['Weighted Degree', 'Cluster']
+    '''
+
+    result_ids, citation_matrix = citation_network.create_citation_matrix(alldata_df)
+    author_ids, author_names, incidence = author_network.create_incidence_matrix(alldata_df, result_ids)
+    if author_network_type == author_network.CO_AUTHORSHIP:
+        weights = author_network.co_authorship(incidence)
+    else:
+        weights = author_network.author_coupling(incidence, citation_matrix)
+    author_ids, weights, occurrences = citation_network.prune_network((author_ids, weights, None), min_strength)
+    network_graph = csr_graph.CSRGraph.from_matrix(author_ids, weights)
+
+    if cluster_algo == 2:
+        components = _create_clusters_louvain(network_graph)
+    else:
+        components = _create_clusters_by_component(network_graph.to_networkx(), cluster_algo, processes)
+    clusters = [cluster for cluster in components if len(cluster) > 1]
+
+    author_index = {author_id: x for x, author_id in enumerate(author_ids)}
+    edges = network_graph.edge_list()
+    network_df = pd.DataFrame({"Author_1": [edge[0] for edge in edges], "Author_2": [edge[1] for edge in edges],
+                               "Name_1": [author_names[author_index[edge[0]]] for edge in edges],
+                               "Name_2": [author_names[author_index[edge[1]]] for edge in edges],
+                               "Weight": [edge[2] for edge in edges],
+                               "Interaction": author_network.AUTHOR_NETWORKS[author_network_type]})
+    network_df.to_excel(savepath + "/author_network.xlsx", index=False)
+
+    authors_df = author_network.author_metrics(alldata_df, result_ids, author_ids, author_names, incidence)
+    authors_df["Weighted Degree"] = network_graph.degree()
+    cluster_of = {author_id: cluster_no + 1 for cluster_no, cluster in enumerate(clusters) for author_id in cluster}
+    authors_df["Cluster"] = [cluster_of.get(author_id) for author_id in author_ids]
+    authors_df = authors_df.sort_values(["Cluster", "Total Citations"], ascending=[True, False])
+    authors_df.to_excel(savepath + "/authors.xlsx", index=False)
+    return clusters, authors_df
+
+def update_coupling_network_file(state_path, delta_df, min_strength, savepath, processes=None, normalization=0,
+                                 top_k=None, cluster_algo=2, cluster_level=None):
+    ''' Applies a delta of new or updated publications to the bibliographic coupling network
+        saved in state_path and recreates the network file. Only the coupling pairs citing a
+        changed root publication are recomputed (see citation_network.update_bibliographic_coupling(...))
+        and louvain starts from the previous clusters. Without a saved state the network is
+        built from delta_df alone, so the first call sets up the state for the next deltas.
+        Only available from the API, the GUI always analyses a whole alldata.xlsx.
+
+        Parameters
+        ------------
+        state_path : str
+                the folder holding the state, see graph_store.save_coupling_state(...)
+
+        delta_df : pandas DataFrame
+                the new or updated publications, same columns as alldata.xlsx
+
+        min_strength: int
+                the minimum coupling strength to add this edge into the graph
+
+        savepath: str
+                the path to the folder to save this network
+
+        processes : int, optional
+                number of processes used to cluster the connected components, defaults to os.cpu_count()
+
+        normalization : int
+                0 - Raw counts, 1 - Salton cosine, 2 - Jaccard, 3 - Association strength
+
+        top_k : int, optional
+                keep only the top_k strongest edges of every publication
+
+        cluster_algo : int
+                0 - Clauset Newman Moore, 1 - Girvan Newman, 2 - Louvain. Only louvain starts from
+                the previous clusters, the others cluster the updated network from scratch
+
+        cluster_level : int, optional
+                Girvan Newman only, the level of the saved hierarchy to cut at
+
+        Returns
+        ------------
+        alldata_df : pandas DataFrame
+                every publication after the delta
+
+        clusters : list
+                List of the clusters in the analysis
+    '''
+
+    state = graph_store.load_coupling_state(state_path)
+    if state is None:
+        alldata_df = delta_df.reset_index(drop=True)
+        result_ids, citation_matrix = citation_network.create_citation_matrix(alldata_df)
+        weights = citation_network.bibliographic_coupling(citation_matrix)
+        labels = np.full(len(result_ids), -1, dtype=np.int64)
+    else:
+        alldata_df, old_result_ids, old_citation_matrix, weights, labels = state
+        alldata_df, result_ids, citation_matrix, changed_roots = citation_network.update_citation_matrix(
+            old_result_ids, old_citation_matrix, alldata_df, delta_df)
+        weights = citation_network.update_bibliographic_coupling(weights, old_citation_matrix, citation_matrix,
+                                                                 changed_roots)
+        labels = np.concatenate([labels, np.full(len(result_ids) - len(old_result_ids), -1, dtype=np.int64)])
+
+    occurrences = np.asarray(citation_matrix.sum(axis=1)).ravel() + np.asarray(citation_matrix.sum(axis=0)).ravel()
+    result_ids, pruned_weights, occurrences = citation_network.prune_network((result_ids, weights, occurrences),
+                                                                             min_strength, normalization, top_k)
+    network_graph = csr_graph.CSRGraph.from_matrix(result_ids, pruned_weights)
+    network_df = _create_interaction_df(network_graph.edge_list(), alldata_df,
+                                        citation_network.NETWORK_MODES[citation_network.BIBLIOGRAPHIC_COUPLING])
+    clusters = _cluster_and_save_network(network_graph, network_df, alldata_df, cluster_algo, savepath, processes,
+                                         cluster_level, initial_labels=labels if cluster_algo == 2 else None)
+
+    pub_index = {result_id: x for x, result_id in enumerate(result_ids)}
+    labels = np.full(len(result_ids), -1, dtype=np.int64)
+    for cluster_no, cluster in enumerate(clusters):
+        labels[[pub_index[result_id] for result_id in cluster]] = cluster_no
+    graph_store.save_coupling_state(state_path, alldata_df, result_ids, citation_matrix, weights, labels)
+    return alldata_df, clusters
+
+def _create_interaction_df(edges, alldata_df, interaction):
+    ''' Creates the rows of the network file for a list of edges, looking up the publication
+        attributes of all edges at once
+
+        Parameters
+        ------------
+        edges : list of tuples
+                (Result_id, Result_id, weight)
+
+        alldata_df : pandas DataFrame
+                a DataFrame containing all publications extracted
+
+        interaction : str
+                the Interaction column of the rows
+
+        Returns
+        ------------
+        network_df : pandas DataFrame
+                columns : NETWORK_COLUMNS
+    '''
+
+    pubs = alldata_df.drop_duplicates("Result_id").set_index("Result_id")
+    attributes = ["Title", "Abstract", "Year", "Authors", "Hyperlink", "Type of Pub"]
+    pub_1_ids = [edge[0] for edge in edges]
+    pub_2_ids = [edge[1] for edge in edges]
+    pub_1 = pubs.loc[pub_1_ids, attributes].to_numpy()
+    pub_2 = pubs.loc[pub_2_ids, attributes].to_numpy()
+    data = {"Pub_1": pub_1_ids, "Pub_2": pub_2_ids, "Weight": [edge[2] for edge in edges], "Interaction": interaction}
+    for x, name in enumerate(["title", "abstract", "year", "authors", "link", "type"]):
+        data["Pub_1_" + name] = pub_1[:, x]
+        data["Pub_2_" + name] = pub_2[:, x]
+    return pd.DataFrame(data, columns=NETWORK_COLUMNS)
+
+def _cluster_and_save_network(network_graph, network_df, alldata_df, cluster_algo, savepath, processes, cluster_level,
+                              initial_labels=None):
+    ''' Clusters the network graph, tags the network rows with their cluster and saves the
+        network and outlier files, shared by every network mode. Louvain runs on the CSRGraph
+        directly, starting from initial_labels if given, the other algorithms convert it to a
+        networkx graph first.
+    '''
+
+    if cluster_algo == 2:
+        components=_create_clusters_louvain(network_graph, initial_labels)
+    elif isinstance(network_graph, csr_graph.CSRGraph):
+        return _cluster_and_save_network(network_graph.to_networkx(), network_df, alldata_df, cluster_algo,
+                                         savepath, processes, cluster_level)
+    elif cluster_algo == 1:
+        clustering_dendrogram = _load_or_create_dendrogram(network_graph, savepath, processes)
+        _check_level(clustering_dendrogram, cluster_level)
+        components=_order_clusters(clustering_dendrogram.clusters(cluster_level))
     else:
-        components=_create_clusters_greedynewman(network_graph)
+        components=_create_clusters_by_component(network_graph, cluster_algo, processes)
 
-    col=['Pub_1', 'Pub_2', 'Weight', "Interaction", 
-          'Pub_1_title', 'Pub_1_abstract', 'Pub_1_year', 'Pub_1_authors', 'Pub_1_link', "Pub_1_type",
-          'Pub_2_title', 'Pub_2_abstract', 'Pub_2_year', 'Pub_2_authors', 'Pub_2_link', "Pub_2_type" ]
-    network_df = pd.DataFrame(data=final_interaction_list, columns=col)
     create_outlier_files(components, alldata_df, savepath)
     network_df, clusters = tag_publication_to_clusters(network_df, components)
     
-    root_and_citing_pubs = link_root_and_cite_pubs(alldata_df)
+    root_cite_df = link_root_and_cite_pubs(alldata_df)
 
-    for interaction in root_and_citing_pubs:
-        network_df.loc[len(network_df.index)] = interaction
+    if len(root_cite_df.index) > 0:      # appended at once, row by row appends copy the frame every time
+        network_df = pd.concat([network_df, root_cite_df.set_axis(network_df.columns, axis=1)], ignore_index=True)
 
     network_path=savepath + "/network.xlsx"
     network_df.to_excel(network_path, index=False)
@@ -157,35 +559,30 @@ def create_network_file(node_dict, alldata_df, min_strength, cluster_algo, savep
     return clusters
 
 def link_root_and_cite_pubs(alldata_df):
+    ''' The "Cited By" rows of the network file, one per root publication and each of its citing
+        publications in the data. The attributes of every row are looked up at once, see
+        _create_interaction_df(...), instead of scanning the publications once per citation.
+
+        Parameters
+        ------------
+        alldata_df : pandas DataFrame
+                a DataFrame containing all publications extracted
+
+        Returns
+        ------------
+        root_cite_df : pandas DataFrame
+                columns : NETWORK_COLUMNS and an empty 'Cluster'
+    '''
+
     root_pub_df = alldata_df[alldata_df["Type of Pub"] == "Root Publication"]
-    root_cite_interaction = []
-    for index, row in root_pub_df.iterrows():
-        root_pub = row                                             #Attributes of root publication
-        root_pub_id = row["Result_id"]
-        root_pub_title = root_pub["Title"]
-        root_pub_abstract = root_pub["Abstract"]
-        root_pub_year = root_pub["Year"]
-        root_pub_authors = root_pub["Authors"]
-        root_pub_hyperlink = root_pub["Hyperlink"]
-        root_pub_type = root_pub["Type of Pub"]
-        root_pub_citing_pubs = root_pub["Citing_pubs_id"]
-        list_of_citing_pubs = root_pub_citing_pubs.split(";")      # End of Attributes of root publication
-        for citing_pub_id in list_of_citing_pubs:
-            citing_pub = alldata_df.loc[alldata_df["Result_id"] == citing_pub_id]         #Attributes of citing publication
-            citing_pub = citing_pub.iloc[0]
-            citing_pub_title = citing_pub["Title"]
-            citing_pub_abstract = citing_pub["Abstract"]
-            citing_pub_year = citing_pub["Year"]
-            citing_pub_authors = citing_pub["Authors"]
-            citing_pub_hyperlink = citing_pub["Hyperlink"]
-            citing_pub_type = citing_pub["Type of Pub"]
-            citing_pub_cites = citing_pub["Cites"]                                        # End of #Attributes of citing publication
-            interaction = [root_pub_id, citing_pub_id, 1, "Cited By",                     # Creating the Excel File entry
-                                root_pub_title, root_pub_abstract, root_pub_year, root_pub_authors, root_pub_hyperlink, root_pub_type, 
-                                citing_pub_title, citing_pub_abstract, citing_pub_year, citing_pub_authors, citing_pub_hyperlink, citing_pub_type, ""]
-            root_cite_interaction.append(interaction)
-
-    return root_cite_interaction
+    known = set(alldata_df["Result_id"])
+    edges = [(root_pub_id, citing_pub_id, 1)
+             for root_pub_id, citing_pubs_id in zip(root_pub_df["Result_id"], root_pub_df["Citing_pubs_id"])
+             for citing_pub_id in citation_network._split_ids(citing_pubs_id)
+             if citing_pub_id in known]          # not in the dataset (yet), for example a partial delta
+    root_cite_df = _create_interaction_df(edges, alldata_df, "Cited By")
+    root_cite_df.insert(len(root_cite_df.columns), "Cluster", "")
+    return root_cite_df
 
 def create_bib_couple_edges(node, alldata_df, min_strength):
     interaction_list = []
@@ -232,7 +629,7 @@ def tag_publication_to_clusters(network_df, components):
         clusters.append(cluster)
         cluster_counter += 1
     
-    new_df = pd.concat(temp_df_list)
+    new_df = pd.concat(temp_df_list) if (len(temp_df_list) > 0) else network_df.assign(Cluster=None).iloc[0:0]
     
     return new_df, clusters
 
@@ -242,7 +639,7 @@ def create_outlier_files(components, alldata_df, savepath):
     for x in range(0, len(components)):
         cluster=components[x]
         if (len(cluster) <= 1):
-            temp_df = alldata_df[alldata_df["Title"].isin(cluster)]         # getting entries of outlier
+            temp_df = alldata_df[alldata_df["Result_id"].isin(cluster)]     # getting entries of outlier
             if is_recent_outlier(temp_df.iloc[0]["Year"], alldata_df["Year"].max()):
                 recent_outlier.append(temp_df)
             else:
@@ -252,7 +649,7 @@ def create_outlier_files(components, alldata_df, savepath):
     outlier_path = savepath + "/outliers.xlsx"
     recent_outlier_df = pd.concat(recent_outlier) if (len(recent_outlier) > 0) else pd.DataFrame()
     recent_outlier_df.to_excel(recent_outlier_path, index=False)
-    outlier_df = pd.concat(outlier) if (len(recent_outlier) > 0) else pd.DataFrame()
+    outlier_df = pd.concat(outlier) if (len(outlier) > 0) else pd.DataFrame()
     outlier_df.to_excel(outlier_path, index=False)
 
     return alldata_df
@@ -264,7 +661,8 @@ def is_recent_outlier(year, max_year):
     else:
         return False
 
-def create_cluster_indi(cluster, cluster_no, cluster_name, alldata_df, min_year, max_year, savepath):
+def create_cluster_indi(cluster, cluster_no, cluster_name, alldata_df, min_year, max_year, savepath, corpus_model=None,
+                        corpus_tfidf=None, topic_assignments=None, k_selection=topic_model.FULL_SWEEP):
     ''' Analyses entries of one cluster in the publications DataFrame and groups the entries into
         a dataframe. Creates wordcloud and linegraph for this cluster.
         To be used together with GUI for GUI to track each cluster iteration for UX feature
@@ -302,6 +700,20 @@ def create_cluster_indi(cluster, cluster_no, cluster_name, alldata_df, min_year,
         savepath: str
                 the path to the folder to save this cluster
 
+        corpus_model : tuple, optional
+                (ldamodel, dictionary) trained on every publication, see topic_model.corpus_topic_model(...),
+                by default a topic model is trained on the cluster
+
+        corpus_tfidf : tuple, optional
+                the TF-IDF of every publication, see topic_model.fit_corpus_tfidf(...)
+
+        topic_assignments : pandas DataFrame, optional
+                the topics of every publication under corpus_model, see topic_model.update_online_model(...)
+
+        k_selection : int
+                how the number of topics of the cluster is chosen, topic_model.FULL_SWEEP, FAST_SWEEP,
+                COHERENCE_SELECTION or STREAMING_SELECTION
+
         Returns
         ----------
         cluster_name : str
@@ -318,7 +730,8 @@ def create_cluster_indi(cluster, cluster_no, cluster_name, alldata_df, min_year,
     cluster_df=alldata_df[alldata_df["Result_id"].isin(cluster)]
     cluster_df.insert(len(cluster_df.columns), "Cluster", cluster_no)
     cluster_name = "cluster " + str(cluster_no)
-    cluster_df= topic_model.apply_topic_modelling(cluster_df)
+    cluster_df= topic_model.apply_topic_modelling(cluster_df, k_selection, corpus_model=corpus_model,
+                                                  corpus_tfidf=corpus_tfidf, topic_assignments=topic_assignments)
     word_list=textminer_nlp.get_word_list(cluster_df, "Title", "Abstract")
     if not os.path.exists(savepath + "/{}".format(cluster_name)):
         os.makedirs(savepath + "/{}".format(cluster_name))
@@ -326,8 +739,9 @@ def create_cluster_indi(cluster, cluster_no, cluster_name, alldata_df, min_year,
     linegraph_path=savepath + "/{}/linegraph.png".format(cluster_name)
     elbowmethod_path=savepath + "/{}/elbow_method.png".format(cluster_name)
     wordcloud_path=savepath + "/{}/wordcloud.png".format(cluster_name)
-    plt.savefig(elbowmethod_path)
-    plt.close()
+    if corpus_model is None:        # the elbow of the cluster's topic count
+        plt.savefig(elbowmethod_path)
+        plt.close()
     cluster_df.to_excel(data_path, index=False)
     graphcreator.generate_word_cloud(word_list, wordcloud_path)
     linegraph_data=graphcreator.generate_year_linegraph(
@@ -335,9 +749,33 @@ def create_cluster_indi(cluster, cluster_no, cluster_name, alldata_df, min_year,
 
     return cluster_df, linegraph_data
 
+def add_centrality(alldata_df, network_graph):
+    ''' Adds the PageRank, weighted degree, eigenvector centrality and k-core number of every
+        publication in the network as columns, see lib.centrality. Publications outside the
+        network are left empty.
+
+        Parameters
+        ------------
+        alldata_df : pandas DataFrame
+                a DataFrame containing all publications extracted
+
+        network_graph : CSRGraph
+                the network of publications
+
+        Returns
+        ------------
+        alldata_df : pandas DataFrame
+                a copy of alldata_df with the centrality columns
+    '''
+
+    centrality_df = centrality.publication_centrality(network_graph)
+    alldata_df = alldata_df.drop(columns=[column for column in centrality.CENTRALITY_COLUMNS if column in alldata_df.columns])
+    return alldata_df.join(centrality_df, on="Result_id")
+
 def create_cluster_sum(clusters_dict, linegraph_data, min_year, max_year, savepath):
     ''' Creates a summary of each cluster that includes cluster metrics
-        and saves an .xlsx file of this summary
+        and saves an .xlsx file of this summary. The centrality aggregates are added
+        when the clusters have the columns of add_centrality(...)
 
         Parameters
         ------------
@@ -365,6 +803,7 @@ def create_cluster_sum(clusters_dict, linegraph_data, min_year, max_year, savepa
     '''
     cluster_summary=[]
     total_doc=sum([len(cluster.index) for cluster in clusters_dict.values()])
+    with_centrality=all(set(centrality.CENTRALITY_COLUMNS).issubset(cluster.columns) for cluster in clusters_dict.values())
     for cluster in clusters_dict:
         cluster_name=cluster
         cluster_df=clusters_dict[cluster]
@@ -373,9 +812,13 @@ def create_cluster_sum(clusters_dict, linegraph_data, min_year, max_year, savepa
         impact=metrics.impact_index(cluster_df)
         cluster_type=metrics.get_cluster_type(cluster_df, min_year, max_year)
         current_cluster=[cluster_name, cluster_type, size, growth, impact]
+        if with_centrality:
+            current_cluster.extend(metrics.centrality_aggregates(cluster_df))
         cluster_summary.append(current_cluster)
 
     col=['Name', 'Type', 'Size', 'Growth Index', 'Impact Index']
+    if with_centrality:
+        col.extend(CENTRALITY_SUMMARY_COLUMNS)
     cluster_sum_df=pd.DataFrame(cluster_summary, columns=col)
     data_path=savepath + "/summary.xlsx"
     linegraph_path=savepath + "/combined_linegraph.png"
@@ -383,6 +826,216 @@ def create_cluster_sum(clusters_dict, linegraph_data, min_year, max_year, savepa
     graphcreator.generate_summary_linegraph(linegraph_data, linegraph_path)
     return cluster_sum_df
 
+def sweep_min_strength(result_ids, edges, min_strengths, cluster_algo, savepath, processes=None):
+    ''' Compares the networks and clusters produced by several minimum coupling strengths
+        in one pass. The coupling edges are collected once and added to one graph in
+        decreasing order of strength, so every threshold extends the graph of the previous
+        one. Connected components are tracked with a union-find structure and a component
+        is only clustered again when it gained publications or edges since the previous
+        threshold. Every changed component is clustered on its own, so its clusters do not
+        depend on the other components that changed at the same threshold. Top k
+        sparsification is not applied, as it would remove edges between thresholds.
+        Saves the comparison table as min_strength_sweep.xlsx
+
+        Parameters
+        ------------
+        result_ids : list
+                every publication in the network
+
+        edges : list of tuples
+                (Result_id, Result_id, weight) of every edge, from _coupling_edges(node_dict)
+                or citation_network.to_edge_list(...), or (Result_id, Result_id, weight, strength)
+                from citation_network.to_sweep_edges(...) when the weights are normalised. The
+                last value is compared with the minimum strengths
+
+        min_strengths : list of int
+                the minimum coupling strengths to compare
+
+        cluster_algo : int
+                0 - Clauset Newman Moore, 1 - Girvan Newman, 2 - Louvain
+
+        savepath: str
+                the path to the folder to save the table
+
+        processes : int, optional
+                number of processes used to cluster the connected components, defaults to os.cpu_count()
+
+        Returns
+        ------------
+        sweep_df : pandas DataFrame
+                one row per minimum strength
+                columns : ['Min Strength', 'Edges', 'Components', 'Largest Component', 'Orphans',
+                    'Clusters', 'Largest Cluster', 'Median Cluster Size', 'Modularity']
+    '''
+
+    nodes = list(result_ids)
+    node_index = {node: x for x, node in enumerate(nodes)}
+    edges = sorted(edges, key=lambda edge: edge[-1], reverse=True)
+
+    parent = list(range(len(nodes)))        # union-find over the growing graph
+    component_edges = [0] * len(nodes)
+    degree = [0] * len(nodes)
+    orphans = len(nodes)
+    graph = nx.Graph()
+    graph.add_nodes_from(nodes)
+    known_clusters = {}                     # (publications, edge count) of a component -> its clusters
+    edge_counter = 0
+    sweep = []
+    for min_strength in sorted(set(min_strengths), reverse=True):
+        while edge_counter < len(edges) and edges[edge_counter][-1] >= min_strength:
+            pub_1_id, pub_2_id, weight = edges[edge_counter][:3]
+            edge_counter += 1
+            graph.add_edge(pub_1_id, pub_2_id, weight=weight)
+            x = node_index[pub_1_id]
+            y = node_index[pub_2_id]
+            for z in (x, y):
+                if degree[z] == 0:
+                    orphans -= 1
+                degree[z] += 1
+            root_x = _find_root(parent, x)
+            root_y = _find_root(parent, y)
+            if root_x != root_y:
+                parent[root_y] = root_x
+                component_edges[root_x] += component_edges[root_y]
+            component_edges[root_x] += 1
+
+        components = {}
+        for x in range(0, len(nodes)):
+            components.setdefault(_find_root(parent, x), []).append(nodes[x])
+        keys = {root: (frozenset(members), component_edges[root]) for root, members in components.items()}
+        changed = [members for root, members in components.items() if keys[root] not in known_clusters]
+        if changed:
+            changed_graph = graph.subgraph([node for members in changed for node in members])
+            trivial_components, results = _map_components(changed_graph, _component_function(cluster_algo),
+                                                          processes)
+            new_clusters = {}
+            for cluster in [tuple(component.nodes()) for component in trivial_components] + \
+                    [tuple(cluster) for component_clusters in results for cluster in component_clusters]:
+                new_clusters.setdefault(_find_root(parent, node_index[cluster[0]]), []).append(cluster)
+            for root, clusters in new_clusters.items():
+                known_clusters[keys[root]] = clusters
+
+        clusters = [cluster for root in components for cluster in known_clusters[keys[root]]]
+        cluster_sizes = [len(cluster) for cluster in clusters if len(cluster) > 1]
+        component_sizes = [len(members) for members in components.values()]
+        modularity = community.modularity(graph, clusters) if edge_counter > 0 else 0.0
+        sweep.append([min_strength, edge_counter, len(components), max(component_sizes, default=0), orphans,
+                      len(cluster_sizes), max(cluster_sizes, default=0),
+                      float(np.median(cluster_sizes)) if cluster_sizes else 0.0, modularity])
+
+    col = ['Min Strength', 'Edges', 'Components', 'Largest Component', 'Orphans',
+           'Clusters', 'Largest Cluster', 'Median Cluster Size', 'Modularity']
+    sweep_df = pd.DataFrame(sweep, columns=col).sort_values("Min Strength").reset_index(drop=True)
+    sweep_df.to_excel(savepath + "/min_strength_sweep.xlsx", index=False)
+    return sweep_df
+
+def create_temporal_clusters(network_graph, alldata_df, min_year, max_year, window_size, savepath, step=1,
+                             processes=None):
+    ''' Clusters the network in rolling time windows and tracks the clusters from one window
+        to the next. Every window graph is sliced from network_graph and the windows are
+        clustered in parallel with louvain. Saves temporal_clusters.xlsx with the publications
+        of every window cluster and temporal_events.xlsx with the births, deaths, merges and
+        splits between consecutive windows.
+
+        Parameters
+        ------------
+        network_graph : CSRGraph
+                the network of every publication
+
+        alldata_df : pandas DataFrame
+                a DataFrame containing all publications extracted
+
+        min_year : int
+                the first year of the first window
+
+        max_year : int
+                the last year of the last window
+
+        window_size : int
+                number of years in a window
+
+        savepath: str
+                the path to the folder to save the files
+
+        step : int
+                number of years between the starts of two windows
+
+        processes : int, optional
+                number of worker processes, defaults to os.cpu_count()
+
+        Returns
+        ------------
+        temporal_df : pandas DataFrame
+                columns : ['Window', 'Cluster', 'Size', 'Result_id', 'Title', 'Year']
+
+        events_df : pandas DataFrame
+                columns : ['From Window', 'From Cluster', 'To Window', 'To Cluster', 'Overlap', 'Event']
+    '''
+
+    pubs = alldata_df.drop_duplicates("Result_id").set_index("Result_id")
+    years = pd.to_numeric(pubs["Year"], errors="coerce").reindex(network_graph.result_ids).fillna(0).to_numpy()
+    windows = temporal.window_ranges(min_year, max_year, window_size, step)
+    names = ["{}-{}".format(start, end) for start, end in windows]
+    clusters = temporal.cluster_windows(network_graph, years, windows, processes)
+
+    temporal_rows = []
+    for name, window_clusters in zip(names, clusters):
+        for cluster_no, cluster in enumerate(window_clusters):
+            for result_id in cluster:
+                temporal_rows.append([name, cluster_no + 1, len(cluster), result_id, pubs.at[result_id, "Title"],
+                                      pubs.at[result_id, "Year"]])
+
+    event_rows = [["", None, names[0], cluster_no + 1, 0.0, "Birth"] for cluster_no in range(0, len(clusters[0]))] \
+        if len(windows) > 0 else []
+    for x in range(1, len(windows)):
+        overlap_years = (max(windows[x - 1][0], windows[x][0]), min(windows[x - 1][1], windows[x][1]))
+        common = {result_id for result_id, year in zip(network_graph.result_ids, years)
+                  if overlap_years[0] <= year <= overlap_years[1]}
+        links = temporal.match_clusters(clusters[x - 1], clusters[x], common)
+        for previous, current, overlap, event in temporal.cluster_events(len(clusters[x - 1]), len(clusters[x]), links):
+            event_rows.append([names[x - 1] if previous is not None else "",
+                               previous + 1 if previous is not None else None,
+                               names[x] if current is not None else "",
+                               current + 1 if current is not None else None, overlap, event])
+
+    temporal_df = pd.DataFrame(temporal_rows, columns=['Window', 'Cluster', 'Size', 'Result_id', 'Title', 'Year'])
+    events_df = pd.DataFrame(event_rows, columns=['From Window', 'From Cluster', 'To Window', 'To Cluster',
+                                                  'Overlap', 'Event'])
+    temporal_df.to_excel(savepath + "/temporal_clusters.xlsx", index=False)
+    events_df.to_excel(savepath + "/temporal_events.xlsx", index=False)
+    return temporal_df, events_df
+
+def _coupling_edges(node_dict):
+    ''' Collects every coupling edge once, taking its weight from the first node in
+        node_dict that records it, like create_network_file(...)
+
+        Parameters
+        ------------
+        node_dict : dict
+                dictionary of nodes
+                key, value: Result_id, Node object
+
+        Returns
+        ------------
+        edges : list of tuples
+                (Result_id, Result_id, weight)
+    '''
+
+    edges = []
+    node_in_network = set()
+    for node_id, node in node_dict.items():
+        node_in_network.add(node_id)
+        for couple_id, couple_edge_weight in node.edge_dict.items():
+            if couple_id not in node_in_network:
+                edges.append((node_id, couple_id, couple_edge_weight))
+    return edges
+
+def _find_root(parent, x):
+    while parent[x] != x:
+        parent[x] = parent[parent[x]]       # path halving
+        x = parent[x]
+    return x
+
 def _create_graph(node_list):
     ''' Creates a graph of Publications and Publication Bibliographic Coupling
         as nodes and edges respectively using networkX graph constructor
@@ -405,36 +1058,287 @@ def _create_graph(node_list):
         graph.add_edge(node[0], node[1], weight=node[2])
     return graph
 
-def _create_clusters_girvannewman(graph):
-    ''' Creates clusters based on the girvan newman clustering algorthim with modularity
+def _create_dendrogram_girvannewman(graph, processes=None, full=False):
+    ''' Runs the girvan newman algorithm and keeps every level visited with its modularity,
+        see lib.dendrogram. The exact edge betweenness recomputed after every edge removal
+        is spread over a process pool, see lib.betweenness
 
         Parameters
         -----------
         graph : networkx graph
                 a graph of nodes and edges created using the networkx graph constructor
 
+        processes : int, optional
+                number of processes for the edge betweenness, defaults to os.cpu_count()
+
+        full : bool
+                True splits until no edges are left instead of stopping after the first drop
+                in modularity, see dendrogram.girvan_newman_dendrogram(...)
+
+        Returns
+        -----------
+        clustering_dendrogram : Dendrogram
+                the girvan newman hierarchy
+    '''
+
+    with betweenness.ParallelEdgeBetweenness(processes) as edge_betweenness:
+        clustering_dendrogram = dendrogram.girvan_newman_dendrogram(
+            graph, lambda subgraph: edge_betweenness.edge_betweenness(subgraph, normalized=False), full=full)
+    return clustering_dendrogram
+
+def _create_full_dendrogram_girvannewman(graph, processes=None):
+    return _create_dendrogram_girvannewman(graph, processes, full=True)
+
+def _create_clusters_girvannewman(graph, processes=None):
+    ''' Creates clusters based on the girvan newman clustering algorthim with modularity.
+        The level of the hierarchy with the highest modularity is returned
+
+        Parameters
+        -----------
+        graph : networkx graph
+                a graph of nodes and edges created using the networkx graph constructor
+
+        processes : int, optional
+                number of processes for the edge betweenness, defaults to os.cpu_count()
+
         Returns
         -----------
         clusters: list of tuples
                 the clusters derived from girvan_newman algorithm
     '''
 
-    # components = girvan_with_modularity(graph)
-    latest_mod=float(0)
-    highest_mod=float(0)
-    components=community.girvan_newman(graph)
-    clusters=None
-    while round(latest_mod, 2) >= round(highest_mod, 2):
-        print(highest_mod)
-        print(latest_mod)
-        highest_mod=latest_mod
-        clusters=next(components)
-        latest_mod=community.modularity(graph, clusters)
-
-    print(highest_mod)
+    clustering_dendrogram = _create_dendrogram_girvannewman(graph, processes)
+    best_level = clustering_dendrogram.best_level()
+    clusters = clustering_dendrogram.clusters(best_level)
+    print(clustering_dendrogram.modularity[best_level])
     print(len(clusters))
     return clusters
 
-def _create_clusters_greedynewman(graph):
+def _create_clusters_greedynewman(graph, processes=None):
     components=community.greedy_modularity_communities(graph)
-    return components
\ No newline at end of file
+    return list(components)
+
+def _create_clusters_louvain(graph, initial_labels=None):
+    ''' Clusters the graph with louvain on its CSR adjacency, see csr_graph.louvain(...).
+        Publications without edges end up in clusters of their own.
+
+        Parameters
+        -----------
+        graph : networkx graph or CSRGraph
+                the graph of publications
+
+        initial_labels : numpy array, optional
+                cluster label of every node to start from, -1 for none
+
+        Returns
+        -----------
+        clusters : list of tuples
+                the clusters of the whole graph
+    '''
+
+    if not isinstance(graph, csr_graph.CSRGraph):
+        graph = csr_graph.CSRGraph.from_networkx(graph)
+    labels = csr_graph.louvain(graph, initial_labels=initial_labels)
+    return _order_clusters(csr_graph.clusters_from_labels(graph.result_ids, labels))
+
+def _create_clusters_louvain_component(graph, processes=None):
+    ''' _create_clusters_louvain(...) with the signature of the other component functions
+    '''
+
+    return _create_clusters_louvain(graph)
+
+def _component_function(cluster_algo):
+    ''' The function clustering one connected component with the chosen clustering algorithm,
+        called as component_function(subgraph, processes), see _map_components(...)
+    '''
+
+    if cluster_algo == 1:
+        return _create_clusters_girvannewman
+    if cluster_algo == 2:
+        return _create_clusters_louvain_component
+    return _create_clusters_greedynewman
+
+def _map_components(graph, component_function, processes=None):
+    ''' Splits the graph into its connected components and applies component_function to
+        every component in parallel, largest first. Components of one or two publications
+        cannot be split to raise the modularity and are returned as they are.
+
+        Parameters
+        -----------
+        graph : networkx graph
+                a graph of nodes and edges created using the networkx graph constructor
+
+        component_function : function
+                module level function called as component_function(subgraph, processes)
+
+        processes : int, optional
+                number of worker processes, defaults to os.cpu_count()
+
+        Returns
+        -----------
+        trivial_components : list of networkx graphs
+                the components with one or two publications
+
+        results : list
+                the result of component_function for every other component
+    '''
+
+    processes = processes if processes is not None else (os.cpu_count() or 1)
+    trivial_components = []
+    subgraphs = []
+    for nodes in nx.connected_components(graph):
+        if len(nodes) <= 2:
+            trivial_components.append(graph.subgraph(nodes).copy())
+        else:
+            subgraphs.append(graph.subgraph(nodes).copy())
+    subgraphs.sort(key=lambda subgraph: subgraph.number_of_edges(), reverse=True)   # largest first for load balancing
+
+    results = []
+    if len(subgraphs) == 1 or processes <= 1:
+        for subgraph in subgraphs:        # a single component can use the processes for its edge betweenness
+            results.append(component_function(subgraph, processes))
+    elif len(subgraphs) > 1:
+        with ProcessPoolExecutor(min(processes, len(subgraphs))) as pool:
+            results.extend(pool.map(component_function, subgraphs, [1] * len(subgraphs)))
+    return trivial_components, results
+
+def _order_clusters(clusters):
+    ''' Orders clusters by decreasing size, ties broken by their smallest Result_id, so the
+        cluster numbering does not depend on the order the components finish in
+    '''
+
+    clusters = [tuple(sorted(cluster)) for cluster in clusters]
+    clusters.sort(key=lambda cluster: (-len(cluster), cluster[0]))
+    return clusters
+
+def _create_clusters_by_component(graph, cluster_algo, processes=None):
+    ''' Clusters every connected component of the graph in parallel with the chosen
+        clustering algorithm and stitches the results back together
+
+        Parameters
+        -----------
+        graph : networkx graph
+                a graph of nodes and edges created using the networkx graph constructor
+
+        cluster_algo : int
+                0 - Clauset Newman Moore, 1 - Girvan Newman, 2 - Louvain
+
+        processes : int, optional
+                number of worker processes, defaults to os.cpu_count()
+
+        Returns
+        -----------
+        clusters : list of tuples
+                the clusters of the whole graph
+    '''
+
+    if cluster_algo == 1:
+        return _order_clusters(_create_dendrogram_by_component(graph, processes).clusters())
+    if cluster_algo == 2:
+        return _create_clusters_louvain(graph)
+
+    trivial_components, results = _map_components(graph, _create_clusters_greedynewman, processes)
+    clusters = [tuple(component.nodes()) for component in trivial_components]
+    for component_clusters in results:
+        clusters.extend(component_clusters)
+    return _order_clusters(clusters)
+
+def _create_dendrogram_by_component(graph, processes=None, full=False):
+    ''' Builds the girvan newman hierarchy of every connected component in parallel and
+        merges them into the hierarchy of the whole graph, see dendrogram.merge_dendrograms(...)
+
+        Parameters
+        -----------
+        graph : networkx graph
+                a graph of nodes and edges created using the networkx graph constructor
+
+        processes : int, optional
+                number of worker processes, defaults to os.cpu_count()
+
+        full : bool
+                True keeps every level down to single publications, False stops every
+                component after its first drop in modularity
+
+        Returns
+        -----------
+        clustering_dendrogram : Dendrogram
+                the girvan newman hierarchy of the whole graph
+    '''
+
+    component_function = _create_full_dendrogram_girvannewman if full else _create_dendrogram_girvannewman
+    trivial_components, results = _map_components(graph, component_function, processes)
+    results.extend(dendrogram.single_community(component) for component in trivial_components)
+    return dendrogram.merge_dendrograms(results)
+
+def _load_or_create_dendrogram(graph, savepath, processes=None):
+    ''' Loads the girvan newman hierarchy saved in savepath if it was built from the same
+        graph, otherwise builds it and saves it together with a table of the modularity
+        of every level so a different level can be picked without clustering again. Every
+        level down to single publications is kept, the first drop in modularity only
+        bounds the default level, see Dendrogram.best_level()
+
+        Parameters
+        -----------
+        graph : networkx graph
+                a graph of nodes and edges created using the networkx graph constructor
+
+        savepath : str
+                the path to the folder of the analysis
+
+        processes : int, optional
+                number of worker processes, defaults to os.cpu_count()
+
+        Returns
+        -----------
+        clustering_dendrogram : Dendrogram
+                the girvan newman hierarchy of the whole graph
+    '''
+
+    dendrogram_path = savepath + "/dendrogram.npz"
+    key = dendrogram.graph_key(graph)
+    clustering_dendrogram = dendrogram.load_dendrogram(dendrogram_path, key)
+    if clustering_dendrogram is None:
+        clustering_dendrogram = _create_dendrogram_by_component(graph, processes, full=True)
+        clustering_dendrogram.save(dendrogram_path, key)
+        no_of_initial = len(clustering_dendrogram.initial_degree)
+        levels_df = pd.DataFrame({"Level": range(clustering_dendrogram.number_of_levels()),
+                                  "Clusters": [no_of_initial + x for x in range(clustering_dendrogram.number_of_levels())],
+                                  "Modularity": clustering_dendrogram.modularity})
+        levels_df.to_excel(savepath + "/dendrogram_levels.xlsx", index=False)
+    return clustering_dendrogram
+
+def _check_level(clustering_dendrogram, level):
+    ''' Raises a ValueError naming the valid levels when level is not in the hierarchy. The
+        hierarchy and dendrogram_levels.xlsx are saved by then, so another level can be
+        picked without clustering again.
+    '''
+
+    if level is not None and not 0 <= level < clustering_dendrogram.number_of_levels():
+        raise ValueError("Girvan Newman level {} does not exist, pick a level from 0 to {} in dendrogram_levels.xlsx"
+                         .format(level, clustering_dendrogram.number_of_levels() - 1))
+    return None
+
+def load_clusters(savepath, level=None):
+    ''' Rebuilds the clusters of a saved girvan newman hierarchy at any level, without
+        building the network or clustering again
+
+        Parameters
+        -----------
+        savepath : str
+                the path to the folder of an analysis run with the girvan newman algorithm
+
+        level : int, optional
+                the level of the hierarchy, see dendrogram_levels.xlsx. Defaults to the level
+                with the highest modularity
+
+        Returns
+        -----------
+        clusters : list of tuples
+                the clusters at that level, numbered like create_network_file(...)
+    '''
+
+    clustering_dendrogram = dendrogram.load_dendrogram(savepath + "/dendrogram.npz")
+    if clustering_dendrogram is None:
+        raise FileNotFoundError("No dendrogram.npz in " + savepath)
+    _check_level(clustering_dendrogram, level)
+    return _order_clusters(clustering_dendrogram.clusters(level))
@@ -0,0 +1,162 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+CO_AUTHORSHIP = 0
+AUTHOR_COUPLING = 1
+AUTHOR_NETWORKS = {CO_AUTHORSHIP: "Co-authorship",
+                   AUTHOR_COUPLING: "Author Bibliographic Couple"}
+UNAVAILABLE = "Unavaliable"
+METRIC_COLUMNS = ['Author_id', 'Name', 'Publications', 'Total Citations', 'Mean Citations', 'H-Index',
+                  'First Year', 'Last Year', 'Co-authors']
+
+
+def _split_authors(value):
+    if not isinstance(value, str) or value == UNAVAILABLE:
+        return []
+    return value.split(";")
+
+
+def create_incidence_matrix(alldata_df, result_ids):
+    ''' Creates a sparse matrix of which author wrote which publication from the Authors_id
+        column. Only authors with a Google Scholar profile have an id.
+
+        Parameters
+        ------------
+        alldata_df : pandas DataFrame
+                a DataFrame containing all publications extracted
+                columns : ['Title', 'Year', 'Authors', 'Authors_id', 'No_of_citations', 'Result_id', ...]
+
+        result_ids : list
+                the Result_id of every row, see citation_network.create_citation_matrix(...)
+
+        Returns
+        -----------
+        author_ids : list
+                the Authors_id of every column
+
+        author_names : list
+                the name of every column
+
+        incidence : scipy csr matrix
+                incidence[publication, author] = 1 if the author wrote the publication
+    '''
+
+    pub_index = {result_id: x for x, result_id in enumerate(result_ids)}
+    author_index = {}
+    author_names = []
+    rows = []
+    cols = []
+    pubs_df = alldata_df.drop_duplicates("Result_id")
+    for result_id, names, ids in zip(pubs_df["Result_id"], pubs_df["Authors"], pubs_df["Authors_id"]):
+        if result_id not in pub_index:
+            continue
+        names = _split_authors(names)
+        for x, author_id in enumerate(_split_authors(ids)):
+            if len(author_id) == 0:
+                continue
+            if author_id not in author_index:
+                author_index[author_id] = len(author_index)
+                author_names.append(names[x] if x < len(names) else "")
+            rows.append(pub_index[result_id])
+            cols.append(author_index[author_id])
+
+    incidence = sparse.csr_matrix((np.ones(len(rows), dtype=np.int64), (rows, cols)),
+                                  shape=(len(result_ids), len(author_index)))
+    incidence.sum_duplicates()
+    incidence.data[:] = 1           # an author listed twice on a publication counts once
+    return list(author_index), author_names, incidence
+
+
+def _without_diagonal(matrix):
+    matrix = matrix.tocsr()
+    matrix.setdiag(0)
+    matrix.eliminate_zeros()
+    return matrix
+
+
+def co_authorship(incidence):
+    ''' Number of publications every pair of authors wrote together
+
+        Returns
+        -----------
+        weights : scipy csr matrix
+                symmetric author by author matrix
+    '''
+
+    incidence = incidence.tocsc()
+    return _without_diagonal(incidence.T @ incidence)
+
+
+def author_coupling(incidence, citation_matrix):
+    ''' Bibliographic coupling of authors, the number of times the publications of two
+        authors cite the same root publication
+
+        Parameters
+        ------------
+        incidence : scipy sparse matrix
+                see create_incidence_matrix(...)
+
+        citation_matrix : scipy sparse matrix
+                see citation_network.create_citation_matrix(...), on the same Result_id
+
+        Returns
+        -----------
+        weights : scipy csr matrix
+                symmetric author by author matrix
+    '''
+
+    references = (incidence.T.tocsr() @ citation_matrix.tocsr()).tocsr()     # author by root publication
+    return _without_diagonal(references @ references.T)
+
+
+def author_metrics(alldata_df, result_ids, author_ids, author_names, incidence):
+    ''' Productivity and impact of every author: the number of publications, citations,
+        h-index, active years and number of co-authors
+
+        Parameters
+        ------------
+        alldata_df : pandas DataFrame
+                a DataFrame containing all publications extracted
+
+        result_ids : list
+                the Result_id of every row of incidence
+
+        author_ids, author_names, incidence :
+                see create_incidence_matrix(...)
+
+        Returns
+        -----------
+        metrics_df : pandas DataFrame
+                columns : METRIC_COLUMNS
+    '''
+
+    pubs = alldata_df.drop_duplicates("Result_id").set_index("Result_id")
+    citations = pd.to_numeric(pubs["No_of_citations"], errors="coerce").reindex(result_ids).fillna(0).to_numpy()
+    years = pd.to_numeric(pubs["Year"], errors="coerce").reindex(result_ids).fillna(0).to_numpy()
+
+    incidence = incidence.tocsc()
+    publications = np.diff(incidence.indptr)
+    pub_rows = incidence.indices
+    author_cols = np.repeat(np.arange(len(author_ids)), publications)
+    total_citations = np.bincount(author_cols, weights=citations[pub_rows], minlength=len(author_ids))
+
+    order = np.lexsort((-citations[pub_rows], author_cols))           # each author's publications, most cited first
+    rank = np.arange(len(order)) - np.repeat(incidence.indptr[:-1], publications) + 1
+    cited_enough = citations[pub_rows][order] >= rank
+    h_index = np.bincount(author_cols[order], weights=cited_enough, minlength=len(author_ids)).astype(np.int64)
+
+    dated = years[pub_rows] > 0
+    first_year = np.full(len(author_ids), np.inf)
+    last_year = np.zeros(len(author_ids))
+    np.minimum.at(first_year, author_cols[dated], years[pub_rows][dated])
+    np.maximum.at(last_year, author_cols[dated], years[pub_rows][dated])
+    first_year[np.isinf(first_year)] = 0
+
+    co_authors = np.diff(co_authorship(incidence).indptr)
+    return pd.DataFrame({'Author_id': author_ids, 'Name': author_names, 'Publications': publications,
+                         'Total Citations': total_citations,
+                         'Mean Citations': np.divide(total_citations, publications, out=np.zeros(len(author_ids)),
+                                                     where=publications > 0),
+                         'H-Index': h_index, 'First Year': first_year.astype(np.int64),
+                         'Last Year': last_year.astype(np.int64), 'Co-authors': co_authors}, columns=METRIC_COLUMNS)
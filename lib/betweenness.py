@@ -0,0 +1,310 @@
+import os
+import numpy as np
+from scipy import sparse
+from multiprocessing import Pool, shared_memory, resource_tracker
+import lib.csr_graph as csr_graph
+
+MIN_PARALLEL_NODES = 200      # below this the pool start-up costs more than the computation
+CHUNKS_PER_PROCESS = 4
+
+_worker_graph = {}            # per worker process cache of the attached CSR arrays
+
+
+def graph_to_csr(graph):
+    ''' Converts a networkx graph into a CSR (compressed sparse row) adjacency with
+        integer node ids. Every undirected edge appears twice in the adjacency and
+        edge_ids maps each adjacency entry back to the index of the undirected edge.
+        Self loops are dropped as they never lie on a shortest path.
+
+        Parameters
+        ------------
+        graph : networkx graph or CSRGraph
+                an undirected graph of publications
+
+        Returns
+        -----------
+        nodes : list
+                the node labels, position in the list is the integer node id
+
+        edges : list of tuples
+                the undirected edges in graph.edges() order, position in the list is the edge id
+
+        indptr : numpy array
+                CSR row offsets of length len(nodes) + 1
+
+        indices : numpy array
+                CSR neighbour ids
+
+        edge_ids : numpy array
+                the undirected edge id of each entry in indices
+    '''
+
+    if isinstance(graph, csr_graph.CSRGraph):
+        return _csr_graph_to_csr(graph)
+
+    nodes = list(graph.nodes())
+    node_index = {node: x for x, node in enumerate(nodes)}
+    edges = list(graph.edges())
+    src = np.fromiter((node_index[u] for u, v in edges), dtype=np.int64, count=len(edges))
+    dst = np.fromiter((node_index[v] for u, v in edges), dtype=np.int64, count=len(edges))
+    ids = np.arange(len(edges), dtype=np.int64)
+    keep = src != dst
+    src, dst, ids = src[keep], dst[keep], ids[keep]
+
+    rows = np.concatenate([src, dst])
+    cols = np.concatenate([dst, src])
+    edge_ids = np.concatenate([ids, ids])
+    order = np.argsort(rows, kind="stable")
+    indices = cols[order]
+    edge_ids = edge_ids[order]
+    indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=len(nodes)), out=indptr[1:])
+    return nodes, edges, indptr, indices, edge_ids
+
+
+def _csr_graph_to_csr(graph):
+    ''' graph_to_csr(...) for a CSRGraph, reusing its adjacency. The edge ids number the
+        upper triangle entries in row order.
+    '''
+
+    n = graph.number_of_nodes()
+    rows = graph._entry_rows()
+    cols = np.asarray(graph.indices)
+    upper = rows < cols
+    ids = np.arange(1, np.count_nonzero(upper) + 1, dtype=np.float64)
+    upper_ids = sparse.csr_matrix((ids, (rows[upper], cols[upper])), shape=(n, n))
+    both = (upper_ids + upper_ids.T).tocsr()
+    both.sort_indices()
+    edges = [(graph.result_ids[u], graph.result_ids[v]) for u, v in zip(rows[upper].tolist(), cols[upper].tolist())]
+    return (graph.result_ids, edges, both.indptr.astype(np.int64), both.indices.astype(np.int64),
+            both.data.astype(np.int64) - 1)
+
+
+def _accumulate_edge_betweenness(indptr, indices, edge_ids, n_edges, sources):
+    ''' Brandes' algorithm for unweighted edge betweenness restricted to a subset of
+        source nodes. Summing the results over a partition of all nodes gives the
+        exact (unnormalised, directed count) edge betweenness.
+
+        Parameters
+        ------------
+        indptr, indices, edge_ids : list
+                the CSR adjacency produced by graph_to_csr(...), as python lists
+
+        n_edges : int
+                number of undirected edges
+
+        sources : iterable of int
+                the source node ids processed by this call
+
+        Returns
+        -----------
+        betweenness : numpy array
+                partial edge betweenness indexed by edge id
+    '''
+
+    n = len(indptr) - 1
+    betweenness = [0.0] * n_edges
+    for s in sources:
+        sigma = [0] * n
+        dist = [-1] * n
+        delta = [0.0] * n
+        sigma[s] = 1
+        dist[s] = 0
+        order = [s]
+        head = 0
+        while head < len(order):          # breadth first search counting shortest paths
+            v = order[head]
+            head += 1
+            dist_w = dist[v] + 1
+            sigma_v = sigma[v]
+            for k in range(indptr[v], indptr[v + 1]):
+                w = indices[k]
+                if dist[w] < 0:
+                    dist[w] = dist_w
+                    order.append(w)
+                if dist[w] == dist_w:
+                    sigma[w] += sigma_v
+
+        for w in reversed(order):         # back propagation of dependencies onto the edges
+            coeff = (1.0 + delta[w]) / sigma[w]
+            dist_v = dist[w] - 1
+            for k in range(indptr[w], indptr[w + 1]):
+                v = indices[k]
+                if dist[v] == dist_v:
+                    c = sigma[v] * coeff
+                    betweenness[edge_ids[k]] += c
+                    delta[v] += c
+
+    return np.array(betweenness, dtype=np.float64)
+
+
+def _attach_shared_array(name, shape, dtype):
+    block = shared_memory.SharedMemory(name=name)
+    resource_tracker.unregister(block._name, "shared_memory")   # the parent owns and unlinks the block
+    array = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    return block, array
+
+
+def _betweenness_task(task):
+    ''' Worker entry point. Attaches to the shared CSR arrays (once per graph) and
+        runs Brandes' algorithm for one chunk of sources.
+    '''
+
+    key, specs, n_edges, sources = task
+    if _worker_graph.get("key") != key:
+        for block in _worker_graph.get("blocks", []):
+            block.close()
+        blocks = []
+        arrays = []
+        for name, shape, dtype in specs:
+            block, array = _attach_shared_array(name, shape, dtype)
+            blocks.append(block)
+            arrays.append(array.tolist())
+        _worker_graph.clear()
+        _worker_graph.update({"key": key, "blocks": blocks, "arrays": arrays})
+
+    indptr, indices, edge_ids = _worker_graph["arrays"]
+    return _accumulate_edge_betweenness(indptr, indices, edge_ids, n_edges, sources)
+
+
+def _to_shared(array):
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    shared = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+    shared[:] = array
+    return block, (block.name, array.shape, array.dtype.str)
+
+
+class ParallelEdgeBetweenness:
+    ''' Computes exact edge betweenness centrality by splitting the source nodes into
+        chunks over a process pool and summing the partial results. The graph is placed
+        once in shared memory as a CSR adjacency so it is not pickled for every task.
+        The pool is kept alive between calls so it can be handed to girvan_newman(...)
+        which recomputes the betweenness after every edge removal.
+
+        Attributes
+        ------------
+        processes : int
+                number of worker processes, defaults to os.cpu_count()
+
+        min_parallel_nodes : int
+                graphs smaller than this are computed in the calling process
+
+        Methods
+        ----------
+        edge_betweenness(graph, normalized=True)
+
+        most_valuable_edge(graph)
+
+        close()
+    '''
+
+    def __init__(self, processes=None, min_parallel_nodes=MIN_PARALLEL_NODES):
+        self.processes = processes if processes is not None else (os.cpu_count() or 1)
+        self.min_parallel_nodes = min_parallel_nodes
+        self._pool = None
+        self._calls = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        ''' Shuts down the worker processes, if they were started
+        '''
+
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+        return None
+
+    def edge_betweenness(self, graph, normalized=True):
+        ''' Computes the edge betweenness centrality of every edge in the graph.
+            Matches networkx.edge_betweenness_centrality(graph) for unweighted graphs.
+
+            Parameters
+            ------------
+            graph : networkx graph
+                    an undirected graph of publications
+
+            normalized : bool
+                    scale by 1/(n(n-1)) like networkx, otherwise halve the directed counts
+
+            Returns
+            -----------
+            betweenness : dict
+                    key, value: edge tuple, edge betweenness centrality
+        '''
+
+        nodes, edges, indptr, indices, edge_ids = graph_to_csr(graph)
+        n = len(nodes)
+        n_edges = len(edges)
+        if n_edges == 0:
+            return {}
+
+        if self.processes <= 1 or n < self.min_parallel_nodes:
+            totals = _accumulate_edge_betweenness(indptr.tolist(), indices.tolist(), edge_ids.tolist(),
+                                                  n_edges, range(n))
+        else:
+            totals = self._parallel_totals(indptr, indices, edge_ids, n_edges, n)
+
+        if normalized:
+            scale = 1 / (n * (n - 1)) if n > 1 else None
+        else:
+            scale = 0.5
+        if scale is not None:
+            totals *= scale
+        return dict(zip(edges, totals.tolist()))
+
+    def most_valuable_edge(self, graph):
+        ''' The edge with the highest betweenness, to be passed as the most_valuable_edge
+            argument of networkx.algorithms.community.girvan_newman(...)
+        '''
+
+        betweenness = self.edge_betweenness(graph)
+        return max(betweenness, key=betweenness.get)
+
+    def _parallel_totals(self, indptr, indices, edge_ids, n_edges, n):
+        if self._pool is None:
+            self._pool = Pool(self.processes)
+        self._calls += 1
+
+        shared = [_to_shared(array) for array in (indptr, indices, edge_ids)]
+        try:
+            key = (os.getpid(), self._calls)
+            specs = [spec for block, spec in shared]
+            no_of_chunks = min(n, self.processes * CHUNKS_PER_PROCESS)
+            sources = np.arange(n)
+            tasks = [(key, specs, n_edges, sources[x::no_of_chunks].tolist())   # interleaved for load balancing
+                     for x in range(no_of_chunks)]
+            totals = np.zeros(n_edges, dtype=np.float64)
+            for partial in self._pool.imap(_betweenness_task, tasks):
+                totals += partial
+        finally:
+            for block, spec in shared:
+                block.close()
+                block.unlink()
+        return totals
+
+
+def edge_betweenness_centrality(graph, processes=None, normalized=True):
+    ''' One-shot parallel exact edge betweenness, see ParallelEdgeBetweenness
+
+        Parameters
+        ------------
+        graph : networkx graph
+                an undirected graph of publications
+
+        processes : int, optional
+                number of worker processes, defaults to os.cpu_count()
+
+        Returns
+        -----------
+        betweenness : dict
+                key, value: edge tuple, edge betweenness centrality
+    '''
+
+    with ParallelEdgeBetweenness(processes) as pool:
+        return pool.edge_betweenness(graph, normalized)
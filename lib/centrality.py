@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+PAGERANK_DAMPING = 0.85
+MAX_ITERATIONS = 1000
+TOLERANCE = 1e-6
+CENTRALITY_COLUMNS = ["PageRank", "Weighted Degree", "Eigenvector Centrality", "K-Core"]
+
+
+def pagerank(graph, damping=PAGERANK_DAMPING, max_iter=MAX_ITERATIONS, tol=TOLERANCE):
+    ''' Weighted PageRank by sparse power iteration. Publications without edges spread their
+        rank evenly over every publication, like networkx.pagerank(...)
+
+        Parameters
+        ------------
+        graph : CSRGraph
+                the network of publications
+
+        damping : float
+                probability of following an edge instead of jumping to a random publication
+
+        max_iter : int
+                maximum number of iterations
+
+        tol : float
+                iterations stop when the L1 change is below number of nodes * tol
+
+        Returns
+        -----------
+        rank : numpy array
+                PageRank of every node, sums to 1
+    '''
+
+    n = graph.number_of_nodes()
+    if n == 0:
+        return np.zeros(0)
+    matrix = graph.to_scipy()
+    strength = np.asarray(matrix.sum(axis=1)).ravel()
+    dangling = strength == 0
+    inverse_strength = np.divide(1.0, strength, out=np.zeros(n), where=~dangling)
+    transition = (sparse.diags(inverse_strength) @ matrix).T.tocsr()
+    rank = np.full(n, 1.0 / n)
+    for iteration in range(0, max_iter):
+        previous = rank
+        rank = damping * (transition @ previous + previous[dangling].sum() / n) + (1 - damping) / n
+        if np.abs(rank - previous).sum() < n * tol:
+            break
+    return rank
+
+
+def eigenvector_centrality(graph, max_iter=MAX_ITERATIONS, tol=TOLERANCE):
+    ''' Weighted eigenvector centrality by sparse power iteration on A + I, like
+        networkx.eigenvector_centrality(...)
+
+        Parameters
+        ------------
+        graph : CSRGraph
+                the network of publications
+
+        max_iter : int
+                maximum number of iterations
+
+        tol : float
+                iterations stop when the L1 change is below number of nodes * tol
+
+        Returns
+        -----------
+        centrality : numpy array
+                eigenvector centrality of every node, with unit euclidean norm
+    '''
+
+    n = graph.number_of_nodes()
+    if n == 0:
+        return np.zeros(0)
+    matrix = graph.to_scipy()
+    centrality = np.full(n, 1.0 / n)
+    for iteration in range(0, max_iter):
+        previous = centrality
+        centrality = previous + matrix @ previous
+        norm = np.linalg.norm(centrality)
+        if norm == 0:
+            return np.zeros(n)
+        centrality = centrality / norm
+        if np.abs(centrality - previous).sum() < n * tol:
+            break
+    return centrality
+
+
+def core_number(graph):
+    ''' The k-core number of every node, ignoring the weights, by the bucket based peeling of
+        Batagelj and Zaversnik: nodes are kept sorted by their remaining degree in buckets and
+        always the node of smallest degree is removed, moving each of its neighbours one
+        bucket down in constant time, so every edge is visited once.
+
+        Parameters
+        ------------
+        graph : CSRGraph
+                the network of publications, without self loops
+
+        Returns
+        -----------
+        core : numpy array
+                the largest k such that the node is in the k-core
+    '''
+
+    n = graph.number_of_nodes()
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    indptr = np.asarray(graph.indptr, dtype=np.int64)
+    degree = np.diff(indptr)
+    order = np.argsort(degree, kind="stable")       # nodes by degree, the buckets one after another
+    position = np.empty(n, dtype=np.int64)
+    position[order] = np.arange(n)
+    bucket_start = np.concatenate([[0], np.cumsum(np.bincount(degree))[:-1]])
+
+    indptr = indptr.tolist()
+    indices = np.asarray(graph.indices).tolist()
+    degree = degree.tolist()
+    order = order.tolist()
+    position = position.tolist()
+    bucket_start = bucket_start.tolist()
+    for x in range(0, n):
+        v = order[x]
+        v_degree = degree[v]
+        for u in indices[indptr[v]:indptr[v + 1]]:
+            u_degree = degree[u]
+            if u_degree > v_degree:          # move u to the front of its bucket, then into the bucket below
+                u_position = position[u]
+                front = bucket_start[u_degree]
+                w = order[front]
+                if u != w:
+                    position[u] = front
+                    order[u_position] = w
+                    position[w] = u_position
+                    order[front] = u
+                bucket_start[u_degree] += 1
+                degree[u] = u_degree - 1
+    return np.array(degree, dtype=np.int64)
+
+
+def publication_centrality(graph):
+    ''' PageRank, weighted degree, eigenvector centrality and k-core number of every publication
+
+        Parameters
+        ------------
+        graph : CSRGraph
+                the network of publications
+
+        Returns
+        -----------
+        centrality_df : pandas DataFrame
+                indexed by Result_id
+                columns : CENTRALITY_COLUMNS
+    '''
+
+    data = {"PageRank": pagerank(graph),
+            "Weighted Degree": graph.degree(),
+            "Eigenvector Centrality": eigenvector_centrality(graph),
+            "K-Core": core_number(graph)}
+    return pd.DataFrame(data, index=pd.Index(graph.result_ids, name="Result_id"), columns=CENTRALITY_COLUMNS)
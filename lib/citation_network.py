@@ -0,0 +1,533 @@
+import numpy as np
+import pandas as pd
+import networkx as nx
+from scipy import sparse
+
+BIBLIOGRAPHIC_COUPLING = 0
+CO_CITATION = 1
+DIRECT_CITATION = 2
+NETWORK_MODES = {BIBLIOGRAPHIC_COUPLING: "Bibliographic Couple",
+                 CO_CITATION: "Co-citation",
+                 DIRECT_CITATION: "Direct Citation"}
+
+RAW_COUNTS = 0
+SALTON_COSINE = 1
+JACCARD = 2
+ASSOCIATION_STRENGTH = 3
+NORMALIZATIONS = {RAW_COUNTS: "Raw counts",
+                  SALTON_COSINE: "Salton cosine",
+                  JACCARD: "Jaccard",
+                  ASSOCIATION_STRENGTH: "Association strength"}
+
+
+def _split_ids(value):
+    ''' Splits a ; separated string of Result_id, empty cells give an empty list
+    '''
+
+    if not isinstance(value, str):
+        return []
+    return [result_id for result_id in value.split(";") if len(result_id) > 0]
+
+
+def create_citation_matrix(alldata_df):
+    ''' Creates a sparse matrix of which publication cites which root publication from the
+        Citing_pubs_id of the root publications
+
+        Parameters
+        ------------
+        alldata_df : pandas DataFrame
+                a DataFrame containing all publications extracted
+                columns : ['Title', 'Year', 'Abstract', 'Citedby_id', 'No_of_citations',
+                    'Result_id', 'Type of Pub', 'Citing_pubs_id', 'Cites']
+
+        Returns
+        -----------
+        result_ids : list
+                the Result_id of every publication, position in the list is the row and column index
+
+        citation_matrix : scipy csr matrix
+                citation_matrix[citing, root] = number of times the root lists the citing publication
+    '''
+
+    result_ids = list(dict.fromkeys(alldata_df["Result_id"]))
+    pub_index = {result_id: x for x, result_id in enumerate(result_ids)}
+    rootpub_df = alldata_df[alldata_df["Type of Pub"] == "Root Publication"]
+    rows = []
+    cols = []
+    for root_id, citing_pubs_id in zip(rootpub_df["Result_id"], rootpub_df["Citing_pubs_id"]):
+        for citing_id in _split_ids(citing_pubs_id):
+            if citing_id in pub_index:
+                rows.append(pub_index[citing_id])
+                cols.append(pub_index[root_id])
+
+    citation_matrix = sparse.csr_matrix((np.ones(len(rows), dtype=np.int64), (rows, cols)), shape=(len(result_ids), len(result_ids)))
+    citation_matrix.sum_duplicates()
+    return result_ids, citation_matrix
+
+
+def _without_diagonal(matrix):
+    matrix = matrix.tocsr()
+    matrix.setdiag(0)
+    matrix.eliminate_zeros()
+    return matrix
+
+
+def bibliographic_coupling(citation_matrix):
+    ''' Coupling strength of every pair of publications, the number of root publications
+        they both cite. Like create_nodes(...) a root publication is also linked to every
+        publication citing it with a strength of one.
+
+        Parameters
+        ------------
+        citation_matrix : scipy sparse matrix
+                see create_citation_matrix(...)
+
+        Returns
+        -----------
+        weights : scipy csr matrix
+                symmetric matrix of coupling strengths
+    '''
+
+    citation_matrix = citation_matrix.tocsr()
+    coupling = citation_matrix @ citation_matrix.T
+    return _without_diagonal(coupling + citation_matrix + citation_matrix.T)
+
+
+def co_citation(citation_matrix):
+    ''' Co-citation strength of every pair of root publications, the number of publications
+        citing both
+
+        Parameters
+        ------------
+        citation_matrix : scipy sparse matrix
+                see create_citation_matrix(...)
+
+        Returns
+        -----------
+        weights : scipy csr matrix
+                symmetric matrix of co-citation strengths
+    '''
+
+    citation_matrix = citation_matrix.tocsc()
+    return _without_diagonal(citation_matrix.T @ citation_matrix)
+
+
+def direct_citation(alldata_df, result_ids):
+    ''' Direct citation links between publications from the Cites column, as an undirected
+        matrix of the number of times either publication cites the other
+
+        Parameters
+        ------------
+        alldata_df : pandas DataFrame
+                a DataFrame containing all publications extracted
+
+        result_ids : list
+                the Result_id of every publication, see create_citation_matrix(...)
+
+        Returns
+        -----------
+        weights : scipy csr matrix
+                symmetric matrix of direct citation counts
+    '''
+
+    pub_index = {result_id: x for x, result_id in enumerate(result_ids)}
+    rows = []
+    cols = []
+    for citing_id, cites in zip(alldata_df["Result_id"], alldata_df["Cites"]):
+        for cited_id in _split_ids(cites):
+            if cited_id in pub_index:
+                rows.append(pub_index[citing_id])
+                cols.append(pub_index[cited_id])
+
+    citations = sparse.csr_matrix((np.ones(len(rows), dtype=np.int64), (rows, cols)), shape=(len(result_ids), len(result_ids)))
+    return _without_diagonal(citations + citations.T)
+
+
+def create_networks(alldata_df, network_modes):
+    ''' Creates the weight matrices of several network modes from one pass over the dataset
+
+        Parameters
+        ------------
+        alldata_df : pandas DataFrame
+                a DataFrame containing all publications extracted
+
+        network_modes : list of int
+                any of BIBLIOGRAPHIC_COUPLING, CO_CITATION, DIRECT_CITATION
+
+        Returns
+        -----------
+        networks : dict
+                key, value: network mode, (list of Result_id in the network, scipy csr matrix of weights,
+                numpy array of occurrences). The occurrences of a publication are the number of
+                citation links it takes part in (references plus citations for coupling, citations
+                for co-citation), used by normalize_weights(...)
+    '''
+
+    result_ids, citation_matrix = create_citation_matrix(alldata_df)
+    references = np.asarray(citation_matrix.sum(axis=1)).ravel()
+    citations = np.asarray(citation_matrix.sum(axis=0)).ravel()
+    networks = {}
+    for network_mode in network_modes:
+        if network_mode == BIBLIOGRAPHIC_COUPLING:
+            networks[network_mode] = (result_ids, bibliographic_coupling(citation_matrix), references + citations)
+        elif network_mode == CO_CITATION:
+            root_ids = set(alldata_df.loc[alldata_df["Type of Pub"] == "Root Publication", "Result_id"])
+            roots = [x for x, result_id in enumerate(result_ids) if result_id in root_ids]
+            weights = co_citation(citation_matrix)[roots][:, roots]
+            networks[network_mode] = ([result_ids[x] for x in roots], weights.tocsr(), citations[roots])
+        elif network_mode == DIRECT_CITATION:
+            weights = direct_citation(alldata_df, result_ids)
+            networks[network_mode] = (result_ids, weights, np.asarray(weights.sum(axis=1)).ravel())
+        else:
+            raise ValueError("Unknown network mode {}".format(network_mode))
+    return networks
+
+
+def _resize(matrix, size):
+    matrix = sparse.csr_matrix(matrix, copy=True)
+    matrix.resize((size, size))
+    return matrix
+
+
+def update_citation_matrix(result_ids, citation_matrix, alldata_df, delta_df):
+    ''' Applies a delta of new or updated publications to a citation matrix. Rows of delta_df
+        replace the rows of alldata_df with the same Result_id and new publications are
+        appended, so existing publications keep their index. Only the columns of the changed
+        root publications are rebuilt: the roots in the delta and the roots listing a new
+        publication in their Citing_pubs_id.
+
+        Parameters
+        ------------
+        result_ids : list
+                the Result_id of every row and column of citation_matrix
+
+        citation_matrix : scipy sparse matrix
+                see create_citation_matrix(...)
+
+        alldata_df : pandas DataFrame
+                the publications citation_matrix was built from
+
+        delta_df : pandas DataFrame
+                the new or updated publications, same columns as alldata_df
+
+        Returns
+        -----------
+        alldata_df : pandas DataFrame
+                the updated publications
+
+        result_ids : list
+                the old Result_id followed by the new ones
+
+        citation_matrix : scipy csr matrix
+                the updated citation matrix
+
+        changed_roots : numpy array
+                index of every rebuilt column
+    '''
+
+    delta_ids = list(dict.fromkeys(delta_df["Result_id"]))
+    pub_index = {result_id: x for x, result_id in enumerate(result_ids)}
+    new_ids = [result_id for result_id in delta_ids if result_id not in pub_index]
+    result_ids = list(result_ids) + new_ids
+    for result_id in new_ids:
+        pub_index[result_id] = len(pub_index)
+    alldata_df = pd.concat([alldata_df[~alldata_df["Result_id"].isin(delta_ids)], delta_df], ignore_index=True)
+
+    rootpub_df = alldata_df[alldata_df["Type of Pub"] == "Root Publication"]
+    changed = set(delta_ids)
+    if new_ids:
+        new_set = set(new_ids)
+        for root_id, citing_pubs_id in zip(rootpub_df["Result_id"], rootpub_df["Citing_pubs_id"]):
+            if root_id not in changed and any(citing_id in new_set for citing_id in _split_ids(citing_pubs_id)):
+                changed.add(root_id)
+
+    rows = []
+    cols = []
+    for root_id, citing_pubs_id in zip(rootpub_df["Result_id"], rootpub_df["Citing_pubs_id"]):
+        if root_id in changed:
+            for citing_id in _split_ids(citing_pubs_id):
+                if citing_id in pub_index:
+                    rows.append(pub_index[citing_id])
+                    cols.append(pub_index[root_id])
+
+    size = len(result_ids)
+    changed_roots = np.array(sorted(pub_index[result_id] for result_id in changed), dtype=np.int64)
+    unchanged = np.ones(size, dtype=np.int64)
+    unchanged[changed_roots] = 0
+    rebuilt = sparse.csr_matrix((np.ones(len(rows), dtype=np.int64), (rows, cols)), shape=(size, size))
+    citation_matrix = _resize(citation_matrix, size) @ sparse.diags(unchanged, dtype=np.int64) + rebuilt
+    citation_matrix = citation_matrix.tocsr()
+    citation_matrix.sum_duplicates()
+    citation_matrix.eliminate_zeros()
+    return alldata_df, result_ids, citation_matrix, changed_roots
+
+
+def update_bibliographic_coupling(weights, old_citation_matrix, citation_matrix, changed_roots):
+    ''' Updates the coupling strengths after update_citation_matrix(...). The coupling matrix
+        is a sum over the root publications, so only the pairs citing a changed root are
+        touched: the old contribution of the changed columns is taken away and the new one
+        added.
+
+        Parameters
+        ------------
+        weights : scipy sparse matrix
+                bibliographic_coupling(old_citation_matrix)
+
+        old_citation_matrix : scipy sparse matrix
+                the citation matrix before the update
+
+        citation_matrix : scipy sparse matrix
+                the citation matrix after the update
+
+        changed_roots : numpy array
+                index of every rebuilt column
+
+        Returns
+        -----------
+        weights : scipy csr matrix
+                equal to bibliographic_coupling(citation_matrix)
+    '''
+
+    size = citation_matrix.shape[0]
+    selected = np.zeros(size, dtype=np.int64)
+    selected[changed_roots] = 1
+    select = sparse.diags(selected, dtype=np.int64)
+    old_part = _resize(old_citation_matrix, size) @ select
+    new_part = sparse.csr_matrix(citation_matrix) @ select
+    change = new_part @ new_part.T - old_part @ old_part.T + (new_part - old_part) + (new_part - old_part).T
+    weights = _without_diagonal(_resize(weights, size) + change)
+    weights.eliminate_zeros()
+    return weights
+
+
+def _entry_rows(weights):
+    return np.repeat(np.arange(weights.shape[0]), np.diff(weights.indptr))
+
+
+def _symmetric_mask(weights, keep):
+    ''' Keeps the entries of a symmetric csr matrix where keep is True for either direction
+    '''
+
+    mask = sparse.csr_matrix((keep.astype(np.int8), weights.indices, weights.indptr), shape=weights.shape)
+    mask = mask.maximum(mask.T)
+    pruned = weights.multiply(mask).tocsr()
+    pruned.eliminate_zeros()
+    return pruned
+
+
+def normalize_weights(weights, occurrences, normalization):
+    ''' Normalises raw co-occurrence counts so heavily cited publications do not dominate
+
+        Parameters
+        ------------
+        weights : scipy sparse matrix
+                symmetric matrix of raw counts
+
+        occurrences : numpy array
+                occurrences of every publication, see create_networks(...)
+
+        normalization : int
+                RAW_COUNTS, SALTON_COSINE (w / sqrt(s_i s_j)), JACCARD (w / (s_i + s_j - w))
+                or ASSOCIATION_STRENGTH (w / (s_i s_j))
+
+        Returns
+        -----------
+        weights : scipy csr matrix
+                symmetric matrix of normalised weights
+    '''
+
+    weights = sparse.csr_matrix(weights, dtype=np.float64)
+    if normalization == RAW_COUNTS:
+        return weights
+    occurrences = np.asarray(occurrences, dtype=np.float64)
+    s_i = occurrences[_entry_rows(weights)]
+    s_j = occurrences[weights.indices]
+    if normalization == SALTON_COSINE:
+        denominator = np.sqrt(s_i * s_j)
+    elif normalization == JACCARD:
+        denominator = s_i + s_j - weights.data
+    elif normalization == ASSOCIATION_STRENGTH:
+        denominator = s_i * s_j
+    else:
+        raise ValueError("Unknown normalization {}".format(normalization))
+    weights.data = np.divide(weights.data, denominator, out=np.zeros_like(weights.data), where=denominator > 0)
+    weights.eliminate_zeros()
+    return weights
+
+
+def top_k_edges(weights, k):
+    ''' Keeps, for every publication, its k strongest edges. An edge stays when it is among
+        the k strongest of either of its publications, so the result stays symmetric
+
+        Parameters
+        ------------
+        weights : scipy sparse matrix
+                symmetric matrix of edge weights
+
+        k : int
+                number of edges kept per publication
+
+        Returns
+        -----------
+        weights : scipy csr matrix
+                the pruned matrix
+    '''
+
+    weights = sparse.csr_matrix(weights)
+    weights.sort_indices()
+    rows = _entry_rows(weights)
+    order = np.lexsort((-weights.data, rows))          # by row, strongest first
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = np.arange(len(order)) - weights.indptr[rows[order]]
+    return _symmetric_mask(weights, rank < k)
+
+
+def disparity_backbone(weights, alpha):
+    ''' Extracts the backbone of the network with the disparity filter of Serrano et al. (2009).
+        An edge is kept when its share of the strength of either publication is significant at
+        level alpha against a uniform split over that publication's edges. The only edge of a
+        publication is always kept so no publication becomes an orphan through the filter
+
+        Parameters
+        ------------
+        weights : scipy sparse matrix
+                symmetric matrix of edge weights
+
+        alpha : float
+                significance level, eg. 0.05; smaller keeps fewer edges
+
+        Returns
+        -----------
+        weights : scipy csr matrix
+                the pruned matrix
+    '''
+
+    weights = sparse.csr_matrix(weights, dtype=np.float64)
+    rows = _entry_rows(weights)
+    strength = np.asarray(weights.sum(axis=1)).ravel()
+    degree = np.diff(weights.indptr)
+    share = np.divide(weights.data, strength[rows], out=np.zeros_like(weights.data), where=strength[rows] > 0)
+    p_value = np.power(1 - share, degree[rows] - 1)
+    return _symmetric_mask(weights, (p_value < alpha) | (degree[rows] == 1))
+
+
+def prune_network(network, min_strength=0, normalization=RAW_COUNTS, top_k=None, backbone_alpha=None):
+    ''' Sparsifies a network before its graph is built. Raw counts below min_strength are
+        dropped first, the rest are normalised, then the top k edges per publication and the
+        disparity backbone are kept
+
+        Parameters
+        ------------
+        network : tuple
+                (list of Result_id, scipy sparse matrix of weights, numpy array of occurrences)
+
+        min_strength : int
+                the minimum raw count to keep an edge
+
+        normalization : int
+                see normalize_weights(...)
+
+        top_k : int, optional
+                number of strongest edges kept per publication, at least 1, None keeps all
+
+        backbone_alpha : float, optional
+                significance level of the disparity filter, None skips it
+
+        Returns
+        -----------
+        network : tuple
+                (list of Result_id, scipy csr matrix of pruned weights, numpy array of occurrences)
+    '''
+
+    if top_k is not None and top_k < 1:
+        raise ValueError("top_k must be at least 1, not {}".format(top_k))
+    result_ids, weights, occurrences = network
+    weights = sparse.csr_matrix(weights)
+    weights = weights.multiply(weights >= min_strength).tocsr() if min_strength > 0 else weights
+    weights.eliminate_zeros()
+    weights = normalize_weights(weights, occurrences, normalization)
+    if top_k is not None:
+        weights = top_k_edges(weights, top_k)
+    if backbone_alpha is not None:
+        weights = disparity_backbone(weights, backbone_alpha)
+    return result_ids, weights, occurrences
+
+
+def to_edge_list(result_ids, weights, min_strength=0):
+    ''' Lists every undirected edge of a weight matrix once
+
+        Parameters
+        ------------
+        result_ids : list
+                the Result_id of every row of the matrix
+
+        weights : scipy sparse matrix
+                symmetric matrix of edge weights
+
+        min_strength : int
+                the minimum weight to keep an edge
+
+        Returns
+        -----------
+        edges : list of tuples
+                (Result_id, Result_id, weight)
+    '''
+
+    upper = sparse.triu(weights, k=1).tocoo()
+    keep = upper.data >= min_strength
+    return [(result_ids[x], result_ids[y], weight)
+            for x, y, weight in zip(upper.row[keep].tolist(), upper.col[keep].tolist(), upper.data[keep].tolist())]
+
+
+def to_sweep_edges(network, normalization=RAW_COUNTS):
+    ''' Lists every undirected edge once with its normalised weight and its raw count, for
+        analysis.sweep_min_strength(...) which compares the raw count with every minimum
+        strength like prune_network(...) does
+
+        Parameters
+        ------------
+        network : tuple
+                (list of Result_id, scipy sparse matrix of raw counts, numpy array of occurrences)
+
+        normalization : int
+                see normalize_weights(...)
+
+        Returns
+        -----------
+        edges : list of tuples
+                (Result_id, Result_id, weight, raw count)
+    '''
+
+    result_ids, weights, occurrences = network
+    weights = sparse.csr_matrix(weights)
+    upper = sparse.triu(normalize_weights(weights, occurrences, normalization), k=1).tocoo()
+    counts = np.asarray(weights[upper.row, upper.col]).ravel()
+    return [(result_ids[x], result_ids[y], weight, count)
+            for x, y, weight, count in zip(upper.row.tolist(), upper.col.tolist(), upper.data.tolist(), counts.tolist())]
+
+
+def to_graph(result_ids, weights, min_strength=0):
+    ''' Creates a networkx graph of the edges of at least min_strength, keeping publications
+        without any edge as orphan nodes
+
+        Parameters
+        ------------
+        result_ids : list
+                the Result_id of every row of the matrix
+
+        weights : scipy sparse matrix
+                symmetric matrix of edge weights
+
+        min_strength : int
+                the minimum weight to add an edge to the graph
+
+        Returns
+        -----------
+        graph : networkx graph
+                a graph of publications
+    '''
+
+    graph = nx.Graph()
+    graph.add_nodes_from(result_ids)
+    graph.add_weighted_edges_from(to_edge_list(result_ids, weights, min_strength))
+    return graph
@@ -0,0 +1,389 @@
+import os
+import numpy as np
+import networkx as nx
+from scipy import sparse
+from scipy.sparse import csgraph
+
+MOVE_CHUNK_SIZE = 4096      # nodes whose louvain moves are found at once
+MIN_MOVE_CHUNKS = 64        # a pass over a small graph still takes this many chunks
+MAX_PASSES = 100            # bound on the passes of the louvain moving phase
+BLOCK_ENTRIES = 10000000    # adjacency entries read at a time from the possibly memory-mapped arrays
+
+
+class CSRGraph:
+    ''' A compact undirected weighted graph of publications. Nodes are integer ids into
+        result_ids and the adjacency is kept in CSR (compressed sparse row) form: the
+        neighbours of node x are indices[indptr[x]:indptr[x + 1]] with the matching
+        weights. Every undirected edge is stored in both directions. The arrays can be
+        saved to a folder and memory-mapped back.
+
+        Attributes
+        ------------
+        result_ids : list
+                the Result_id of every node
+
+        indptr : numpy array
+                row offsets of length number_of_nodes() + 1
+
+        indices : numpy array
+                neighbour ids
+
+        weights : numpy array
+                edge weights aligned with indices
+
+        Methods
+        ----------
+        from_matrix(result_ids, matrix)
+
+        from_networkx(graph, weight="weight")
+
+        number_of_nodes()
+
+        number_of_edges()
+
+        degree(weighted=True)
+
+        neighbors(x)
+
+        edge_list(min_strength=0)
+
+        to_scipy()
+
+        to_networkx()
+
+        connected_components()
+
+        subgraph(node_ids)
+
+        save(path)
+
+        load(path, mmap=True)
+    '''
+
+    def __init__(self, result_ids, indptr, indices, weights):
+        self.result_ids = list(result_ids)
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+
+    @classmethod
+    def from_matrix(cls, result_ids, matrix):
+        ''' Creates the graph from a symmetric scipy sparse matrix of edge weights
+        '''
+
+        matrix = sparse.csr_matrix(matrix, dtype=np.float64)
+        matrix.eliminate_zeros()
+        matrix.sort_indices()
+        return cls(result_ids, matrix.indptr.astype(np.int64), matrix.indices.astype(np.int64), matrix.data)
+
+    @classmethod
+    def from_networkx(cls, graph, weight="weight"):
+        ''' Creates the graph from a networkx graph, edges without weight count as 1
+        '''
+
+        result_ids = list(graph.nodes())
+        matrix = nx.to_scipy_sparse_array(graph, nodelist=result_ids, weight=weight, format="csr")
+        return cls.from_matrix(result_ids, matrix)
+
+    def number_of_nodes(self):
+        return len(self.result_ids)
+
+    def number_of_edges(self):
+        self_loops = sum(int(np.count_nonzero(rows == cols))
+                         for rows, cols, weights in _entry_blocks(self.indptr, self.indices, self.weights))
+        return (len(self.indices) - self_loops) // 2 + self_loops
+
+    def _entry_rows(self):
+        return np.repeat(np.arange(self.number_of_nodes()), np.diff(self.indptr))
+
+    def degree(self, weighted=True):
+        ''' The weighted degree (strength) or the number of neighbours of every node
+        '''
+
+        if not weighted:
+            return np.diff(self.indptr)
+        degree = np.zeros(self.number_of_nodes())
+        for rows, cols, weights in _entry_blocks(self.indptr, self.indices, self.weights):
+            degree += np.bincount(rows, weights=weights, minlength=len(degree))
+        return degree
+
+    def neighbors(self, x):
+        ''' The neighbour ids and edge weights of node x
+        '''
+
+        return self.indices[self.indptr[x]:self.indptr[x + 1]], self.weights[self.indptr[x]:self.indptr[x + 1]]
+
+    def edge_list(self, min_strength=0):
+        ''' Every undirected edge once as (Result_id, Result_id, weight)
+        '''
+
+        rows = self._entry_rows()
+        keep = (rows <= self.indices) & (self.weights >= min_strength)
+        return [(self.result_ids[x], self.result_ids[y], weight)
+                for x, y, weight in zip(rows[keep].tolist(), self.indices[keep].tolist(), self.weights[keep].tolist())]
+
+    def to_scipy(self):
+        return sparse.csr_matrix((self.weights, self.indices, self.indptr),
+                                 shape=(self.number_of_nodes(), self.number_of_nodes()))
+
+    def to_networkx(self):
+        ''' Converts to a networkx graph with a weight attribute, keeping nodes without edges
+        '''
+
+        graph = nx.Graph()
+        graph.add_nodes_from(self.result_ids)
+        graph.add_weighted_edges_from(self.edge_list())
+        return graph
+
+    def connected_components(self):
+        ''' The connected component label of every node
+        '''
+
+        no_of_components, labels = csgraph.connected_components(self.to_scipy(), directed=False)
+        return labels
+
+    def subgraph(self, node_ids):
+        ''' The graph induced by a list of node ids
+        '''
+
+        node_ids = np.asarray(node_ids, dtype=np.int64)
+        matrix = self.to_scipy()[node_ids][:, node_ids]
+        return CSRGraph.from_matrix([self.result_ids[x] for x in node_ids], matrix)
+
+    def save(self, path):
+        ''' Saves the arrays as .npy files in the folder path, so they can be memory-mapped
+        '''
+
+        if not os.path.exists(path):
+            os.makedirs(path)
+        np.save(path + "/indptr.npy", np.asarray(self.indptr))
+        np.save(path + "/indices.npy", np.asarray(self.indices))
+        np.save(path + "/weights.npy", np.asarray(self.weights))
+        np.save(path + "/result_ids.npy", np.array(self.result_ids, dtype=str))
+        return None
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        ''' Loads a graph saved with save(...), memory-mapping the adjacency arrays by default
+        '''
+
+        mmap_mode = "r" if mmap else None
+        return cls(np.load(path + "/result_ids.npy").tolist(),
+                   np.load(path + "/indptr.npy", mmap_mode=mmap_mode),
+                   np.load(path + "/indices.npy", mmap_mode=mmap_mode),
+                   np.load(path + "/weights.npy", mmap_mode=mmap_mode))
+
+
+def modularity(graph, labels, resolution=1.0):
+    ''' Modularity of a partition of a CSRGraph, computed over the arrays
+
+        Parameters
+        ------------
+        graph : CSRGraph
+                the graph
+
+        labels : numpy array
+                community label of every node
+
+        resolution : float
+                values above 1 favour smaller communities
+
+        Returns
+        -----------
+        modularity : float
+    '''
+
+    labels = np.asarray(labels)
+    total = float(np.sum(graph.weights))
+    if total == 0:
+        return 0.0
+    rows = graph._entry_rows()
+    same = labels[rows] == labels[graph.indices]
+    internal = np.bincount(labels[rows][same], weights=graph.weights[same], minlength=labels.max() + 1)
+    degree_sum = np.bincount(labels, weights=graph.degree(), minlength=labels.max() + 1)
+    return float(np.sum(internal / total - resolution * (degree_sum / total) ** 2))
+
+
+def _entry_blocks(indptr, indices, weights):
+    ''' The entries of the adjacency as (rows, cols, weights) arrays, consecutive rows holding
+        about BLOCK_ENTRIES entries at a time, so memory-mapped arrays are never loaded whole
+    '''
+
+    n = len(indptr) - 1
+    start = 0
+    while start < n:
+        end = int(np.searchsorted(indptr, indptr[start] + BLOCK_ENTRIES, side="right")) - 1
+        end = min(max(end, start + 1), n)
+        first, last = int(indptr[start]), int(indptr[end])
+        rows = np.repeat(np.arange(start, end), np.diff(np.asarray(indptr[start:end + 1], dtype=np.int64)))
+        yield rows, np.asarray(indices[first:last], dtype=np.int64), np.asarray(weights[first:last], dtype=np.float64)
+        start = end
+
+
+def _collapse(indptr, indices, weights, community, no_of_communities):
+    ''' The adjacency with every community collapsed into a node, summed a block of entries
+        at a time, see _entry_blocks(...)
+
+        Returns
+        -----------
+        matrix : scipy sparse csr matrix
+                the weight between every pair of communities
+    '''
+
+    shape = (no_of_communities, no_of_communities)
+    matrix = sparse.csr_matrix(shape, dtype=np.float64)
+    for rows, cols, block_weights in _entry_blocks(indptr, indices, weights):
+        matrix = matrix + sparse.csr_matrix((block_weights, (community[rows], community[cols])), shape=shape)
+    return matrix
+
+
+def _gather_rows(indptr, nodes):
+    ''' The positions in indices and weights of the entries of the given rows, and the row of
+        every position counted from 0 in nodes
+    '''
+
+    starts = np.asarray(indptr[nodes], dtype=np.int64)
+    lengths = np.asarray(indptr[nodes + 1], dtype=np.int64) - starts
+    owner = np.repeat(np.arange(len(nodes)), lengths)
+    positions = np.arange(int(lengths.sum()), dtype=np.int64) + np.repeat(starts - np.cumsum(lengths) + lengths,
+                                                                           lengths)
+    return positions, owner
+
+
+def _move_nodes(indptr, indices, weights, degree, total, resolution, order, community, max_passes=MAX_PASSES):
+    ''' The local moving phase of louvain: every node moves to the neighbouring community
+        with the highest modularity gain until no node moves. The nodes are visited in chunks
+        of order and the best moves of a chunk are found at once with numpy, reading only the
+        entries of the chunk, so memory-mapped arrays are never loaded whole. A node alone in
+        its community only joins another lone node with a smaller label, so two lone nodes
+        never swap communities within a chunk.
+    '''
+
+    n = len(degree)
+    community = np.array(community, dtype=np.int64)
+    community_degree = np.bincount(community, weights=degree, minlength=n)
+    community_size = np.bincount(community, minlength=n)
+    chunk_size = max(1, min(MOVE_CHUNK_SIZE, n // MIN_MOVE_CHUNKS))     # small graphs move a few nodes at a time
+    for passes in range(0, max_passes):
+        moved = 0
+        for chunk_start in range(0, n, chunk_size):
+            nodes = order[chunk_start:chunk_start + chunk_size]
+            positions, owner = _gather_rows(indptr, nodes)
+            neighbours = np.asarray(indices[positions], dtype=np.int64)
+            outside = neighbours != nodes[owner]
+            owner = owner[outside]
+            link_weights = np.asarray(weights[positions], dtype=np.float64)[outside]
+            candidates = community[neighbours[outside]]
+
+            # total link weight from every node of the chunk to every neighbouring community
+            pairs, inverse = np.unique(owner * n + candidates, return_inverse=True)
+            link_weights = np.bincount(inverse.ravel(), weights=link_weights, minlength=len(pairs))
+            owner = pairs // n
+            candidates = pairs % n
+
+            current = community[nodes]
+            node_degree = degree[nodes]
+            own = candidates == current[owner]
+            others_degree = community_degree[candidates] - np.where(own, node_degree[owner], 0.0)
+            gains = link_weights - resolution * others_degree * node_degree[owner] / total
+            stay = -resolution * (community_degree[current] - node_degree) * node_degree / total
+            stay[owner[own]] = gains[own]
+
+            allowed = ~own & (gains > stay[owner])
+            lone = (community_size[current[owner]] == 1) & (community_size[candidates] == 1)
+            allowed &= ~lone | (candidates < current[owner])
+            if not allowed.any():
+                continue
+            owner = owner[allowed]
+            candidates = candidates[allowed]
+            gains = gains[allowed]
+            best = np.lexsort((candidates, -gains, owner))          # highest gain first, then the smallest label
+            first = np.ones(len(best), dtype=bool)
+            first[1:] = owner[best][1:] != owner[best][:-1]
+            movers = owner[best][first]
+            targets = candidates[best][first]
+
+            np.subtract.at(community_degree, current[movers], node_degree[movers])
+            np.add.at(community_degree, targets, node_degree[movers])
+            np.subtract.at(community_size, current[movers], 1)
+            np.add.at(community_size, targets, 1)
+            community[nodes[movers]] = targets
+            moved += len(movers)
+        if moved == 0:
+            break
+    return np.unique(community, return_inverse=True)[1]
+
+
+def louvain(graph, resolution=1.0, seed=0, max_levels=20, initial_labels=None):
+    ''' Louvain community detection run directly on the CSR arrays. Nodes are moved between
+        communities while the modularity improves, then every community is collapsed into
+        a node and the process repeats on the smaller graph. Given initial_labels, the first
+        level starts from that partition instead of one community per node, so a graph that
+        changed a little since it was last clustered converges in a few moves.
+
+        The first level reads the arrays of graph a chunk of nodes or a block of entries at a
+        time, so a memory-mapped graph is never copied whole into memory. Only the graph of
+        collapsed communities, with one node per community of the first level, is held in memory.
+
+        Parameters
+        ------------
+        graph : CSRGraph
+                the graph
+
+        resolution : float
+                values above 1 favour smaller communities
+
+        seed : int
+                seed of the order the nodes are visited in
+
+        max_levels : int
+                maximum number of aggregation levels
+
+        initial_labels : numpy array, optional
+                community label of every node to start from, -1 starts a node on its own
+
+        Returns
+        -----------
+        labels : numpy array
+                community label of every node
+    '''
+
+    rng = np.random.RandomState(seed)
+    labels = np.arange(graph.number_of_nodes())
+    degree = graph.degree()
+    total = float(degree.sum())
+    if total == 0:
+        return labels
+    start = np.arange(len(labels))
+    if initial_labels is not None:
+        start = np.asarray(initial_labels, dtype=np.int64).copy()
+        unlabelled = start < 0
+        start[unlabelled] = start.max(initial=-1) + 1 + np.arange(np.count_nonzero(unlabelled))
+        start = np.unique(start, return_inverse=True)[1]
+    indptr, indices, weights = graph.indptr, graph.indices, graph.weights
+    for level in range(0, max_levels):
+        order = rng.permutation(len(degree))
+        community = _move_nodes(indptr, indices, weights, degree, total, resolution, order, start)
+        start = np.arange(community.max() + 1)
+        no_of_communities = community.max() + 1
+        labels = community[labels]
+        if no_of_communities == len(degree):
+            break
+        matrix = _collapse(indptr, indices, weights, community, no_of_communities)
+        indptr, indices, weights = matrix.indptr, matrix.indices, matrix.data
+        degree = np.asarray(matrix.sum(axis=1)).ravel()
+    return labels
+
+
+def clusters_from_labels(result_ids, labels):
+    ''' Groups the Result_id by label
+
+        Returns
+        -----------
+        clusters : list of tuples
+    '''
+
+    labels = np.asarray(labels)
+    order = np.argsort(labels, kind="stable")
+    boundaries = np.flatnonzero(np.diff(labels[order])) + 1
+    return [tuple(result_ids[x] for x in group) for group in np.split(order, boundaries) if len(group) > 0]
@@ -0,0 +1,240 @@
+import re
+import zlib
+import numpy as np
+import pandas as pd
+
+NUM_PERMUTATIONS = 64
+NUM_BANDS = 16                  # 16 bands of 4 rows, pairs above ~0.5 similarity become candidates
+SHINGLE_SIZE = 4
+MIN_SIMILARITY = 0.8
+MAX_YEAR_GAP = 1                # a preprint is often dated a year before the published version
+MAX_BUCKET_SIZE = 200           # larger buckets are generic titles like "Introduction"
+MERSENNE_PRIME = (1 << 31) - 1
+UNAVAILABLE = "Unavaliable"
+
+
+def normalize_title(title):
+    ''' Lowercases a title and removes punctuation and repeated whitespace
+    '''
+
+    if not isinstance(title, str):
+        return ""
+    return " ".join(re.sub(r"[^a-z0-9 ]", " ", title.lower()).split())
+
+
+def _author_surnames(authors):
+    ''' The lowercased last names of a ; separated list of authors, empty when unavailable
+    '''
+
+    if not isinstance(authors, str) or authors == UNAVAILABLE:
+        return frozenset()
+    surnames = set()
+    for author in authors.split(";"):
+        words = re.sub(r"[^a-z ]", " ", author.lower()).split()
+        if len(words) > 0:
+            surnames.add(words[-1])
+    return frozenset(surnames)
+
+
+def _shingle_hashes(title):
+    if len(title) <= SHINGLE_SIZE:
+        shingles = {title} if len(title) > 0 else set()
+    else:
+        shingles = {title[x:x + SHINGLE_SIZE] for x in range(0, len(title) - SHINGLE_SIZE + 1)}
+    return [zlib.crc32(shingle.encode("utf-8")) for shingle in shingles]
+
+
+def minhash_signatures(titles, num_permutations=NUM_PERMUTATIONS, seed=0):
+    ''' MinHash signatures of the character shingles of normalised titles
+
+        Parameters
+        ------------
+        titles : list of str
+                normalised titles, see normalize_title(...)
+
+        num_permutations : int
+                length of every signature
+
+        seed : int
+                seed of the hash functions
+
+        Returns
+        -----------
+        signatures : numpy array
+                shape (len(titles), num_permutations), rows of empty titles are all MERSENNE_PRIME
+    '''
+
+    hashes = [_shingle_hashes(title) for title in titles]
+    lengths = np.array([len(title_hashes) for title_hashes in hashes], dtype=np.int64)
+    flat = np.fromiter((h for title_hashes in hashes for h in title_hashes), dtype=np.uint64, count=int(lengths.sum()))
+    rng = np.random.RandomState(seed)
+    a = rng.randint(1, MERSENNE_PRIME, size=num_permutations).astype(np.uint64)
+    b = rng.randint(0, MERSENNE_PRIME, size=num_permutations).astype(np.uint64)
+
+    signatures = np.full((len(titles), num_permutations), MERSENNE_PRIME, dtype=np.uint64)
+    non_empty = np.flatnonzero(lengths > 0)
+    if len(non_empty) == 0:
+        return signatures
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])[non_empty]
+    for x in range(0, num_permutations):
+        permuted = (a[x] * flat + b[x]) % MERSENNE_PRIME
+        signatures[non_empty, x] = np.minimum.reduceat(permuted, starts)
+    return signatures
+
+
+def candidate_pairs(signatures, num_bands=NUM_BANDS):
+    ''' Locality sensitive hashing of the signatures: publications whose signatures agree on
+        every row of at least one band become candidate pairs
+
+        Returns
+        -----------
+        pairs : set of tuples
+                (x, y) with x < y
+    '''
+
+    rows_per_band = signatures.shape[1] // num_bands
+    filled = np.flatnonzero(signatures[:, 0] != MERSENNE_PRIME)
+    pairs = set()
+    for band in range(0, num_bands):
+        band_signatures = signatures[filled, band * rows_per_band:(band + 1) * rows_per_band]
+        keys, bucket = np.unique(band_signatures, axis=0, return_inverse=True)
+        bucket = bucket.ravel()
+        order = np.argsort(bucket, kind="stable")
+        boundaries = np.flatnonzero(np.diff(bucket[order])) + 1
+        for members in np.split(filled[order], boundaries):
+            if 1 < len(members) <= MAX_BUCKET_SIZE:
+                members = members.tolist()
+                for x in range(0, len(members)):
+                    for y in range(x + 1, len(members)):
+                        pairs.add((members[x], members[y]) if members[x] < members[y] else (members[y], members[x]))
+    return pairs
+
+
+def _find_root(parent, x):
+    while parent[x] != x:
+        parent[x] = parent[parent[x]]
+        x = parent[x]
+    return x
+
+
+def find_near_duplicates(alldata_df, min_similarity=MIN_SIMILARITY, max_year_gap=MAX_YEAR_GAP):
+    ''' Finds publications listed under several Result_id. Candidates come from MinHash LSH
+        on the normalised titles, so not every pair is compared, and are kept when their
+        estimated title similarity is at least min_similarity, their years are at most
+        max_year_gap apart and they share an author (when both list authors)
+
+        Parameters
+        ------------
+        alldata_df : pandas DataFrame
+                a DataFrame containing all publications extracted
+
+        min_similarity : float
+                minimum estimated Jaccard similarity of the title shingles
+
+        max_year_gap : int
+                maximum difference in publication year, a year of 0 matches any year
+
+        Returns
+        -----------
+        duplicates : dict
+                key, value: Result_id of a duplicate, Result_id of the publication it is merged into
+    '''
+
+    pubs_df = alldata_df.drop_duplicates("Result_id").reset_index(drop=True)
+    result_ids = pubs_df["Result_id"].tolist()
+    signatures = minhash_signatures([normalize_title(title) for title in pubs_df["Title"]])
+    years = pd.to_numeric(pubs_df["Year"], errors="coerce").fillna(0).astype(np.int64).to_numpy()
+    surnames = [_author_surnames(authors) for authors in pubs_df["Authors"]]
+
+    parent = list(range(len(result_ids)))
+    for x, y in sorted(candidate_pairs(signatures)):
+        if np.mean(signatures[x] == signatures[y]) < min_similarity:
+            continue
+        if years[x] != 0 and years[y] != 0 and abs(years[x] - years[y]) > max_year_gap:
+            continue
+        if len(surnames[x]) > 0 and len(surnames[y]) > 0 and surnames[x].isdisjoint(surnames[y]):
+            continue
+        root_x = _find_root(parent, x)
+        root_y = _find_root(parent, y)
+        if root_x != root_y:
+            parent[max(root_x, root_y)] = min(root_x, root_y)
+
+    groups = {}
+    for x in range(0, len(result_ids)):
+        groups.setdefault(_find_root(parent, x), []).append(x)
+    is_root = (pubs_df["Type of Pub"] == "Root Publication").to_numpy()
+    citations = pd.to_numeric(pubs_df["No_of_citations"], errors="coerce").fillna(0).to_numpy()
+    duplicates = {}
+    for members in groups.values():
+        if len(members) > 1:        # keep a root publication, then the most cited, then the first listed
+            kept = min(members, key=lambda x: (not is_root[x], -citations[x], x))
+            for x in members:
+                if x != kept:
+                    duplicates[result_ids[x]] = result_ids[kept]
+    return duplicates
+
+
+def _merge_ids(values, duplicates, exclude=None):
+    ''' Joins the ; separated Result_id of several cells into one cell, replacing duplicates
+        by the publication they are merged into and dropping repeats
+    '''
+
+    merged = []
+    for value in values:
+        if isinstance(value, str):
+            for result_id in value.split(";"):
+                if len(result_id) > 0:
+                    merged.append(duplicates.get(result_id, result_id))
+    return ";".join(result_id for result_id in dict.fromkeys(merged) if result_id != exclude)
+
+
+def merge_near_duplicates(alldata_df, min_similarity=MIN_SIMILARITY, max_year_gap=MAX_YEAR_GAP):
+    ''' Merges the near duplicate publications found by find_near_duplicates(...) into one row
+        each. The kept row takes the union of the Citing_pubs_id and Cites of its duplicates,
+        the highest No_of_citations, and becomes a root publication if any duplicate was one.
+        References to a duplicate anywhere in Citing_pubs_id and Cites are redirected.
+
+        Parameters
+        ------------
+        alldata_df : pandas DataFrame
+                a DataFrame containing all publications extracted
+
+        min_similarity : float
+                see find_near_duplicates(...)
+
+        max_year_gap : int
+                see find_near_duplicates(...)
+
+        Returns
+        -----------
+        alldata_df : pandas DataFrame
+                one row per publication
+
+        duplicates : dict
+                key, value: Result_id of a duplicate, Result_id of the publication it is merged into
+    '''
+
+    duplicates = find_near_duplicates(alldata_df, min_similarity, max_year_gap)
+    if len(duplicates) == 0:
+        return alldata_df, duplicates
+
+    alldata_df = alldata_df.copy()
+    kept_ids = [duplicates.get(result_id, result_id) for result_id in alldata_df["Result_id"]]
+    for column in ["Citing_pubs_id", "Cites"]:
+        alldata_df[column] = [_merge_ids([value], duplicates, kept_id)
+                              for value, kept_id in zip(alldata_df[column], kept_ids)]
+
+    alldata_df["Kept_id"] = kept_ids
+    merged = alldata_df["Kept_id"].isin(set(duplicates.values()))
+    merged_rows = []
+    for kept_id, group_df in alldata_df[merged].groupby("Kept_id", sort=False):
+        is_kept = group_df["Result_id"] == kept_id
+        row = group_df[is_kept].iloc[0].copy() if is_kept.any() else group_df.iloc[0].copy()
+        if (group_df["Type of Pub"] == "Root Publication").any():
+            row["Type of Pub"] = "Root Publication"
+        row["No_of_citations"] = pd.to_numeric(group_df["No_of_citations"], errors="coerce").max()
+        row["Citing_pubs_id"] = _merge_ids(group_df["Citing_pubs_id"], duplicates, kept_id)
+        row["Cites"] = _merge_ids(group_df["Cites"], duplicates, kept_id)
+        merged_rows.append(row)
+    alldata_df = pd.concat([alldata_df[~merged], pd.DataFrame(merged_rows)]).sort_index()
+    return alldata_df.drop(columns="Kept_id").reset_index(drop=True), duplicates
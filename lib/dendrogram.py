@@ -0,0 +1,477 @@
+import hashlib
+import heapq
+from collections import deque
+
+import numpy as np
+import networkx as nx
+
+
+class Dendrogram:
+    ''' A divisive clustering hierarchy. Level 0 is the starting partition (the connected
+        components) and every following level splits one community in two. Only the
+        publications moved into the new community are stored per level, so any level
+        can be rebuilt from the starting labels.
+
+        The modularity of every level is kept alongside, maintained incrementally from
+        the degree sum and internal edge weight of each community.
+
+        Attributes
+        ------------
+        nodes : list
+                the publications, position in the list is the node id used in the labels
+
+        initial_labels : numpy array
+                community label of every node at level 0
+
+        total_weight : float
+                total edge weight of the graph
+
+        initial_degree, initial_weight : list
+                degree sum and internal edge weight of every community at level 0
+
+        community_degree : list
+                degree sum of every community at the deepest level, indexed by label
+
+        community_weight : list
+                internal edge weight of every community at the deepest level, indexed by label
+
+        split_nodes : list of numpy arrays
+                the node ids moved into the new community at every level
+
+        split_parent : list
+                the label of the community split at every level
+
+        split_stats : list of tuples
+                (degree, weight, rest degree, rest weight, cut weight) of every split
+
+        modularity : list
+                modularity of every level
+
+        stop_level : int
+                the level where girvan newman first drops in modularity (rounded to 2 decimals),
+                best_level() does not look past it. None when every level is considered
+
+        Methods
+        ----------
+        add_split(parent, node_ids, degree, weight, cut)
+
+        number_of_levels()
+
+        best_level()
+
+        labels(level)
+
+        clusters(level=None)
+
+        save(path, key="")
+    '''
+
+    def __init__(self, nodes, initial_labels, community_degree, community_weight, total_weight):
+        self.nodes = list(nodes)
+        self.initial_labels = np.asarray(initial_labels, dtype=np.int64)
+        self.total_weight = float(total_weight)
+        self.initial_degree = [float(x) for x in community_degree]
+        self.initial_weight = [float(x) for x in community_weight]
+        self.community_degree = [float(x) for x in community_degree]
+        self.community_weight = [float(x) for x in community_weight]
+        self.split_nodes = []
+        self.split_parent = []
+        self.split_stats = []
+        self.modularity = [sum(self._modularity_term(weight, degree)
+                               for weight, degree in zip(self.community_weight, self.community_degree))]
+        self.stop_level = None
+
+    def _modularity_term(self, weight, degree):
+        if self.total_weight == 0:
+            return 0.0
+        return weight / self.total_weight - (degree / (2 * self.total_weight)) ** 2
+
+    def add_split(self, parent, node_ids, degree, weight, cut):
+        ''' Records the split of a community as a new level
+
+            Parameters
+            ------------
+            parent : int
+                    label of the community being split
+
+            node_ids : list
+                    ids of the nodes moving into the new community
+
+            degree : float
+                    degree sum of the new community
+
+            weight : float
+                    internal edge weight of the new community
+
+            cut : float
+                    weight of the edges between the new community and the rest of the parent
+
+            Returns
+            ----------
+            label : int
+                    the label of the new community
+        '''
+
+        rest_degree = self.community_degree[parent] - degree
+        rest_weight = self.community_weight[parent] - weight - cut
+        change = 0.0
+        if self.total_weight > 0:
+            change = -cut / self.total_weight + degree * rest_degree / (2 * self.total_weight ** 2)
+
+        label = len(self.community_degree)
+        self.community_degree[parent] = rest_degree
+        self.community_weight[parent] = rest_weight
+        self.community_degree.append(float(degree))
+        self.community_weight.append(float(weight))
+        self.split_nodes.append(np.asarray(node_ids, dtype=np.int64))
+        self.split_parent.append(parent)
+        self.split_stats.append((float(degree), float(weight), rest_degree, rest_weight, float(cut)))
+        self.modularity.append(self.modularity[-1] + change)
+        return label
+
+    def number_of_levels(self):
+        return len(self.modularity)
+
+    def best_level(self):
+        ''' The level with the highest modularity up to stop_level, the shallowest one on ties
+        '''
+
+        last_level = self.stop_level if self.stop_level is not None else self.number_of_levels() - 1
+        return int(np.argmax(self.modularity[:last_level + 1]))
+
+    def labels(self, level):
+        ''' The community label of every node at a level
+
+            Parameters
+            ------------
+            level : int
+                    0 for the starting partition up to number_of_levels() - 1
+
+            Returns
+            -----------
+            labels : numpy array
+                    community label of every node, indexed like nodes
+        '''
+
+        if level < 0 or level >= self.number_of_levels():
+            raise ValueError("Level {} not in dendrogram of {} levels".format(level, self.number_of_levels()))
+        labels = self.initial_labels.copy()
+        first_label = len(self.initial_degree)
+        for x in range(0, level):
+            labels[self.split_nodes[x]] = first_label + x
+        return labels
+
+    def clusters(self, level=None):
+        ''' The clusters at a level
+
+            Parameters
+            ------------
+            level : int, optional
+                    the level to cut the dendrogram at, defaults to best_level()
+
+            Returns
+            -----------
+            clusters : list of tuples
+                    the publications in every cluster
+        '''
+
+        if level is None:
+            level = self.best_level()
+        labels = self.labels(level)
+        order = np.argsort(labels, kind="stable")
+        boundaries = np.flatnonzero(np.diff(labels[order])) + 1
+        return [tuple(self.nodes[x] for x in group) for group in np.split(order, boundaries) if len(group) > 0]
+
+    def save(self, path, key=""):
+        ''' Saves the dendrogram to a .npz file
+
+            Parameters
+            ------------
+            path : str
+                    the file path, should end with .npz
+
+            key : str
+                    identifies the graph the dendrogram was built from, see graph_key(...)
+
+            Returns
+            -----------
+            None
+        '''
+
+        split_offsets = np.zeros(len(self.split_nodes) + 1, dtype=np.int64)
+        np.cumsum(np.array([len(x) for x in self.split_nodes], dtype=np.int64), out=split_offsets[1:])
+        split_nodes = np.concatenate(self.split_nodes) if self.split_nodes else np.zeros(0, dtype=np.int64)
+        np.savez_compressed(path,
+                            key=np.array(key),
+                            nodes=np.array(self.nodes, dtype=str),
+                            initial_labels=self.initial_labels,
+                            initial_degree=np.array(self.initial_degree),
+                            initial_weight=np.array(self.initial_weight),
+                            total_weight=np.array(self.total_weight),
+                            split_nodes=split_nodes,
+                            split_offsets=split_offsets,
+                            split_parent=np.array(self.split_parent, dtype=np.int64),
+                            split_stats=np.array(self.split_stats, dtype=np.float64).reshape(-1, 5),
+                            modularity=np.array(self.modularity),
+                            stop_level=np.array(self.stop_level if self.stop_level is not None else -1))
+        return None
+
+
+def load_dendrogram(path, key=None):
+    ''' Loads a dendrogram saved with Dendrogram.save(...)
+
+        Parameters
+        ------------
+        path : str
+                the .npz file path
+
+        key : str, optional
+                when given, the dendrogram is only returned if it was saved with the same key
+                and holds every level, ie. was not saved before stop_level was kept
+
+        Returns
+        -----------
+        dendrogram : Dendrogram
+                the loaded dendrogram, None if the file is missing or the key does not match
+    '''
+
+    try:
+        data = np.load(path)
+    except FileNotFoundError:
+        return None
+    with data:
+        if key is not None and (str(data["key"]) != key or "stop_level" not in data.files):
+            return None
+        result = Dendrogram(data["nodes"].tolist(), data["initial_labels"], data["initial_degree"],
+                            data["initial_weight"], float(data["total_weight"]))
+        offsets = data["split_offsets"]
+        split_nodes = data["split_nodes"]
+        for x, (parent, stats) in enumerate(zip(data["split_parent"].tolist(), data["split_stats"].tolist())):
+            degree, weight, rest_degree, rest_weight, cut = stats
+            result.add_split(parent, split_nodes[offsets[x]:offsets[x + 1]], degree, weight, cut)
+        result.modularity = data["modularity"].tolist()     # as saved, avoids drift from re-summing
+        if "stop_level" in data.files and int(data["stop_level"]) >= 0:
+            result.stop_level = int(data["stop_level"])
+    return result
+
+
+def graph_key(graph, weight="weight"):
+    ''' A hash of the nodes and weighted edges of a graph, used to check that a saved
+        dendrogram belongs to the graph being clustered
+    '''
+
+    edges = sorted(tuple(sorted((str(u), str(v)))) + (data.get(weight, 1),) for u, v, data in graph.edges(data=True))
+    digest = hashlib.sha1()
+    digest.update(repr(sorted(str(node) for node in graph.nodes())).encode("utf-8"))
+    digest.update(repr(edges).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def single_community(graph, weight="weight"):
+    ''' A dendrogram of a single level holding the whole graph as one community, for
+        components too small to split
+    '''
+
+    degree = sum(dict(graph.degree(weight=weight)).values())
+    total_weight = graph.size(weight=weight)
+    return Dendrogram(list(graph.nodes()), [0] * graph.number_of_nodes(), [degree], [total_weight], total_weight)
+
+
+def merge_dendrograms(dendrograms):
+    ''' Combines the dendrograms of disconnected components into one dendrogram of the
+        whole graph. Splits in different components do not affect each other, so the
+        modularity change of every split is known upfront; at every level the pending
+        split with the largest modularity gain is applied next, keeping the order of the
+        splits inside each component. The splits up to the stop_level of every component
+        come first, so the levels up to the stop_level of the result are the same as if
+        every component had stopped early.
+
+        Parameters
+        ------------
+        dendrograms : list of Dendrogram
+                one dendrogram per connected component
+
+        Returns
+        -----------
+        dendrogram : Dendrogram
+                the dendrogram of the whole graph
+    '''
+
+    nodes = []
+    initial_labels = []
+    initial_degree = []
+    initial_weight = []
+    node_offsets = []
+    label_maps = []
+    for component in dendrograms:
+        node_offsets.append(len(nodes))
+        label_maps.append({label: label + len(initial_degree) for label in range(len(component.initial_degree))})
+        nodes.extend(component.nodes)
+        initial_labels.append(component.initial_labels + len(initial_degree))
+        initial_degree.extend(component.initial_degree)
+        initial_weight.extend(component.initial_weight)
+
+    total_weight = sum(component.total_weight for component in dendrograms)
+    labels = np.concatenate(initial_labels) if initial_labels else np.zeros(0, dtype=np.int64)
+    result = Dendrogram(nodes, labels, initial_degree, initial_weight, total_weight)
+
+    def gain(component, x):
+        degree, weight, rest_degree, rest_weight, cut = component.split_stats[x]
+        if total_weight == 0:
+            return 0.0
+        return -cut / total_weight + degree * rest_degree / (2 * total_weight ** 2)
+
+    def past_stop(component, x):
+        return component.stop_level is not None and x >= component.stop_level
+
+    heap = [(past_stop(component, 0), -gain(component, 0), y, 0)
+            for y, component in enumerate(dendrograms) if component.split_nodes]
+    heapq.heapify(heap)
+    while heap:
+        deep, change, y, x = heapq.heappop(heap)
+        if deep and result.stop_level is None:
+            result.stop_level = result.number_of_levels() - 1
+        component = dendrograms[y]
+        degree, weight, rest_degree, rest_weight, cut = component.split_stats[x]
+        first_label = len(component.initial_degree)
+        label = result.add_split(label_maps[y][component.split_parent[x]],
+                                 component.split_nodes[x] + node_offsets[y], degree, weight, cut)
+        label_maps[y][first_label + x] = label
+        if x + 1 < len(component.split_nodes):
+            heapq.heappush(heap, (past_stop(component, x + 1), -gain(component, x + 1), y, x + 1))
+
+    return result
+
+
+def _smaller_side(graph, u, v):
+    ''' Searches outwards from both ends of a removed edge in lockstep. Returns the
+        component of the side whose search finishes first, or None when the two searches
+        meet, ie. the removal did not disconnect the graph. The cost is bounded by
+        the smaller side rather than the whole component.
+    '''
+
+    searches = [(deque([u]), {u}), (deque([v]), {v})]
+    while True:
+        for side in (0, 1):
+            queue, seen = searches[side]
+            other = searches[1 - side][1]
+            if not queue:
+                return seen
+            x = queue.popleft()
+            for y in graph[x]:
+                if y in other:
+                    return None
+                if y not in seen:
+                    seen.add(y)
+                    queue.append(y)
+
+
+def _best_edge(work, members, edge_betweenness):
+    subgraph = work.subgraph(members)
+    if subgraph.number_of_edges() == 0:
+        return None
+    values = edge_betweenness(subgraph)
+    edge = max(values, key=values.get)
+    return edge, values[edge]
+
+
+def girvan_newman_dendrogram(graph, edge_betweenness=None, weight="weight", full=False):
+    ''' Runs the girvan newman algorithm and records every level of the hierarchy with
+        its modularity. Modularity is updated incrementally as communities split instead
+        of being recomputed over the whole graph. Edge betweenness is only recomputed for
+        the community that lost an edge, as shortest paths never cross communities.
+
+        Parameters
+        ------------
+        graph : networkx graph
+                a graph of nodes and edges created using the networkx graph constructor
+
+        edge_betweenness : function, optional
+                returns a dictionary of edge, unnormalised edge betweenness for a graph.
+                Defaults to networkx.edge_betweenness_centrality(graph, normalized=False)
+
+        weight : str
+                the edge attribute used as weight for the modularity
+
+        full : bool
+                False stops at the first level where the modularity (rounded to 2 decimals)
+                drops, True splits until no edges are left. Either way that level is kept
+                as stop_level, so best_level() is the same
+
+        Returns
+        -----------
+        dendrogram : Dendrogram
+                the levels visited with their modularity
+    '''
+
+    if edge_betweenness is None:
+        edge_betweenness = lambda subgraph: nx.edge_betweenness_centrality(subgraph, normalized=False)
+
+    nodes = list(graph.nodes())
+    node_index = {node: x for x, node in enumerate(nodes)}
+    node_degree = dict(graph.degree(weight=weight))
+    members = {}
+    labels = {}
+    community_degree = []
+    community_weight = []
+    for label, component in enumerate(nx.connected_components(graph)):
+        members[label] = set(component)
+        for node in component:
+            labels[node] = label
+        community_degree.append(sum(node_degree[node] for node in component))
+        community_weight.append(graph.subgraph(component).size(weight=weight))
+
+    result = Dendrogram(nodes, [labels[node] for node in nodes], community_degree,
+                        community_weight, graph.size(weight=weight))
+
+    work = graph.copy()
+    best_edges = {}
+    for label, component in members.items():
+        best_edge = _best_edge(work, component, edge_betweenness)
+        if best_edge is not None:
+            best_edges[label] = best_edge
+
+    while best_edges:
+        parent = max(best_edges, key=lambda label: best_edges[label][1])
+        u, v = best_edges[parent][0]
+        work.remove_edge(u, v)
+        side = _smaller_side(work, u, v)
+        if side is None:
+            best_edge = _best_edge(work, members[parent], edge_betweenness)
+            if best_edge is None:
+                del best_edges[parent]
+            else:
+                best_edges[parent] = best_edge
+            continue
+
+        parent_members = members[parent]
+        degree = 0.0
+        internal = 0.0
+        cut = 0.0
+        for x in side:                    # weights measured on the original graph
+            degree += node_degree[x]
+            for y, data in graph[x].items():
+                edge_weight = data.get(weight, 1)
+                if y == x:
+                    internal += 2 * edge_weight
+                elif y in side:
+                    internal += edge_weight
+                elif y in parent_members:
+                    cut += edge_weight
+
+        label = result.add_split(parent, [node_index[x] for x in side], degree, internal / 2, cut)
+        parent_members -= side
+        members[label] = side
+        for changed in (parent, label):
+            best_edge = _best_edge(work, members[changed], edge_betweenness)
+            if best_edge is None:
+                best_edges.pop(changed, None)
+            else:
+                best_edges[changed] = best_edge
+
+        if result.stop_level is None and round(result.modularity[-1], 2) < round(result.modularity[-2], 2):
+            result.stop_level = result.number_of_levels() - 1
+            if not full:
+                break
+
+    return result
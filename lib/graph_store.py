@@ -0,0 +1,201 @@
+import os
+import hashlib
+import numpy as np
+import pandas as pd
+from scipy import sparse
+import lib.csr_graph as csr_graph
+
+STORE_FOLDER = "graph_store"
+STORE_VERSION = 1               # bump when the network construction or the stored formats change
+READ_BLOCK_SIZE = 1 << 20
+MAX_STORED_DATASETS = 3         # binary copies of alldata.xlsx kept, least recently used are removed
+MAX_STORED_NETWORKS = 20
+
+
+def file_key(file_path):
+    ''' The sha1 hash of the contents of a file, used as the key of a dataset
+
+        Parameters
+        ------------
+        file_path : str
+                path to the file
+
+        Returns
+        -----------
+        key : str
+                hex digest of the file contents
+    '''
+
+    digest = hashlib.sha1()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(READ_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def network_key(dataset_key, **parameters):
+    ''' The key of a network built from a dataset with the given parameters, for example
+        network_key(dataset_key, network_mode=0, min_strength=2, normalization=0, top_k=None).
+        Includes STORE_VERSION, so networks stored by an older version are not reused.
+    '''
+
+    text = "v" + str(STORE_VERSION) + ";" + dataset_key + ";" + \
+        ";".join(name + "=" + repr(value) for name, value in sorted(parameters.items()))
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def store_path(alldata_file):
+    ''' The store folder of a dataset, next to its alldata.xlsx file so every analysis of the
+        dataset shares it
+    '''
+
+    folder = os.path.join(os.path.dirname(os.path.abspath(alldata_file)), STORE_FOLDER)
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+    return folder
+
+
+def _touch(file_path):
+    os.utime(file_path)         # marks the entry as recently used, see _evict(...)
+
+
+def _evict(folder, prefix, suffix, keep):
+    ''' Removes all but the keep most recently used files of the store named prefix*suffix,
+        including those left by older store versions
+    '''
+
+    names = [name for name in os.listdir(folder) if name.startswith(prefix) and name.endswith(suffix)]
+    names.sort(key=lambda name: os.path.getmtime(os.path.join(folder, name)), reverse=True)
+    for name in names[keep:]:
+        os.remove(os.path.join(folder, name))
+    return len(names[keep:])
+
+
+def load_alldata(alldata_file):
+    ''' Reads alldata.xlsx, or its binary copy in the store if the file has not changed since
+        it was last read. Only the MAX_STORED_DATASETS most recently used copies are kept.
+
+        Parameters
+        ------------
+        alldata_file : str
+                path to alldata.xlsx
+
+        Returns
+        -----------
+        alldata_df : pandas DataFrame
+                a DataFrame containing all publications extracted
+
+        dataset_key : str
+                the hash of alldata.xlsx, see file_key(...)
+    '''
+
+    dataset_key = file_key(alldata_file)
+    folder = store_path(alldata_file)
+    pickle_path = os.path.join(folder, "alldata_v" + str(STORE_VERSION) + "_" + dataset_key + ".pkl")
+    if os.path.exists(pickle_path):
+        _touch(pickle_path)
+        return pd.read_pickle(pickle_path), dataset_key
+    alldata_df = pd.read_excel(alldata_file)
+    alldata_df.to_pickle(pickle_path)
+    _evict(folder, "alldata_", ".pkl", MAX_STORED_DATASETS)
+    return alldata_df, dataset_key
+
+
+def save_graph(folder, key, graph):
+    ''' Saves a CSRGraph to the store under key, uncompressed so it loads without decoding.
+        Only the MAX_STORED_NETWORKS most recently used networks are kept.
+
+        Parameters
+        ------------
+        folder : str
+                the store folder, see store_path(...)
+
+        key : str
+                the network key, see network_key(...)
+
+        graph : CSRGraph
+                the graph to save
+    '''
+
+    np.savez(os.path.join(folder, "network_" + key + ".npz"), result_ids=np.array(graph.result_ids),
+             indptr=np.asarray(graph.indptr), indices=np.asarray(graph.indices), weights=np.asarray(graph.weights))
+    _evict(folder, "network_", ".npz", MAX_STORED_NETWORKS)
+    return None
+
+
+def load_graph(folder, key):
+    ''' Loads the CSRGraph saved under key
+
+        Returns
+        -----------
+        graph : CSRGraph or None
+                None if no graph was saved under key
+    '''
+
+    file_path = os.path.join(folder, "network_" + key + ".npz")
+    if not os.path.exists(file_path):
+        return None
+    _touch(file_path)
+    with np.load(file_path) as saved:
+        return csr_graph.CSRGraph(saved["result_ids"].tolist(), saved["indptr"], saved["indices"], saved["weights"])
+
+
+def save_coupling_state(folder, alldata_df, result_ids, citation_matrix, weights, labels):
+    ''' Saves what analysis.update_coupling_network_file(...) needs to apply the next delta:
+        the publications, the citation matrix, the unpruned coupling strengths and the
+        cluster label of every publication
+
+        Parameters
+        ------------
+        folder : str
+                the folder of the state
+
+        alldata_df : pandas DataFrame
+                a DataFrame containing all publications extracted
+
+        result_ids : list
+                the Result_id of every row of the matrices
+
+        citation_matrix, weights : scipy sparse matrix
+                see citation_network.create_citation_matrix(...) and bibliographic_coupling(...)
+
+        labels : numpy array
+                cluster label of every publication in result_ids
+    '''
+
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+    alldata_df.to_pickle(os.path.join(folder, "alldata.pkl"))
+    citation_matrix = citation_matrix.tocsr()
+    weights = weights.tocsr()
+    np.savez(os.path.join(folder, "coupling_state.npz"), version=np.array(STORE_VERSION),
+             result_ids=np.array(result_ids), citation_indptr=citation_matrix.indptr,
+             citation_indices=citation_matrix.indices, citation_data=citation_matrix.data, weights_indptr=weights.indptr,
+             weights_indices=weights.indices, weights_data=weights.data, labels=np.asarray(labels))
+    return None
+
+
+def load_coupling_state(folder):
+    ''' Loads the state saved by save_coupling_state(...)
+
+        Returns
+        -----------
+        state : tuple or None
+                (alldata_df, result_ids, citation_matrix, weights, labels), None if no state was saved
+                or it was saved by another STORE_VERSION
+    '''
+
+    file_path = os.path.join(folder, "coupling_state.npz")
+    if not os.path.exists(file_path):
+        return None
+    with np.load(file_path) as saved:
+        if "version" not in saved or int(saved["version"]) != STORE_VERSION:
+            return None
+        result_ids = saved["result_ids"].tolist()
+        size = len(result_ids)
+        citation_matrix = sparse.csr_matrix((saved["citation_data"], saved["citation_indices"],
+                                             saved["citation_indptr"]), shape=(size, size))
+        weights = sparse.csr_matrix((saved["weights_data"], saved["weights_indices"], saved["weights_indptr"]),
+                                    shape=(size, size))
+        labels = saved["labels"]
+    return pd.read_pickle(os.path.join(folder, "alldata.pkl")), result_ids, citation_matrix, weights, labels
@@ -0,0 +1,85 @@
+import os
+import pickle
+from collections import OrderedDict
+
+MAX_ENTRIES = 200000
+LEMMA_CACHE_FILE = "lemma_cache.pkl"
+ANY_POS = ""            # wordnet.morphy(...) without a part of speech
+TAGGED_POS = "tagged"   # part of speech tagged from the word alone, see textminer_nlp.get_wordnet_pos(...)
+
+_lemmas = OrderedDict()     # (word, pos) -> lemma, least recently used first
+
+
+def lemmatize(word, pos, function):
+    ''' The lemma of a word, computed once per (word, pos) and then taken from the cache.
+        The cache keeps the MAX_ENTRIES most recently used lemmas.
+
+        Parameters
+        ------------
+        word : str
+                the word to lemmatize
+
+        pos : str
+                a wordnet part of speech, ANY_POS or TAGGED_POS
+
+        function : function
+                function(word, pos) returning the lemma, called when the lemma is not cached
+
+        Returns
+        -----------
+        lemma : str
+    '''
+
+    key = (word, pos)
+    lemma = _lemmas.get(key)
+    if lemma is not None:
+        _lemmas.move_to_end(key)
+        return lemma
+    lemma = function(word, pos)
+    _lemmas[key] = lemma
+    if len(_lemmas) > MAX_ENTRIES:
+        _lemmas.popitem(last=False)
+    return lemma
+
+
+def add_lemmas(lemmas, pos):
+    ''' Adds lemmas computed elsewhere, for example by a worker process
+
+        Parameters
+        ------------
+        lemmas : dict
+                key, value: word, lemma
+
+        pos : str
+                the part of speech the lemmas were computed for, see lemmatize(...)
+    '''
+
+    for word, lemma in lemmas.items():
+        _lemmas[(word, pos)] = lemma
+        _lemmas.move_to_end((word, pos))
+    while len(_lemmas) > MAX_ENTRIES:
+        _lemmas.popitem(last=False)
+    return len(_lemmas)
+
+
+def load_lemma_cache(folder):
+    ''' Loads the lemmas saved by save_lemma_cache(...), keeping the current ones if there is
+        no saved cache
+    '''
+
+    cache_path = os.path.join(folder, LEMMA_CACHE_FILE)
+    if os.path.exists(cache_path):
+        with open(cache_path, "rb") as file:
+            _lemmas.update(pickle.load(file))
+        while len(_lemmas) > MAX_ENTRIES:
+            _lemmas.popitem(last=False)
+    return len(_lemmas)
+
+
+def save_lemma_cache(folder):
+    ''' Saves the cached lemmas as LEMMA_CACHE_FILE in folder
+    '''
+
+    with open(os.path.join(folder, LEMMA_CACHE_FILE), "wb") as file:
+        pickle.dump(_lemmas, file, protocol=pickle.HIGHEST_PROTOCOL)
+    return None
@@ -112,3 +112,26 @@ def get_cluster_type(cluster, min_year, max_year):
     
     return cluster_type
 
+
+def centrality_aggregates(cluster):
+    ''' Aggregates the centrality columns of the publications in the cluster, see
+        lib.centrality.publication_centrality(...)
+
+        Parameters
+        ------------
+        cluster : pandas DataFrame
+                cluster DataFrame containing each publication in the cluster, with
+                the PageRank, Weighted Degree, Eigenvector Centrality and K-Core columns
+
+        Returns
+        ----------
+        aggregates : list
+                [total PageRank, mean weighted degree, mean eigenvector centrality,
+                highest k-core, title of the publication with the highest PageRank]
+    '''
+
+    if len(cluster.index) == 0:
+        return [0.0, 0.0, 0.0, 0, ""]
+    most_central = cluster.loc[cluster["PageRank"].fillna(0).idxmax(), "Title"]
+    return [cluster["PageRank"].sum(), cluster["Weighted Degree"].mean(), cluster["Eigenvector Centrality"].mean(),
+            cluster["K-Core"].max(), most_central]
@@ -0,0 +1,321 @@
+import os
+import numpy as np
+import pandas as pd
+import openpyxl
+from scipy import sparse
+import lib.csr_graph as csr_graph
+from lib.citation_network import _split_ids
+
+CHUNK_SIZE = 100000             # publications read at a time
+MAX_BLOCK_ENTRIES = 20000000    # bound on the coupling entries computed at a time
+EDGE_CHUNK_SIZE = 10000000      # spilled edges processed at a time
+COLUMNS = ["Result_id", "Type of Pub", "Citing_pubs_id", "Year"]
+
+
+def iter_alldata_chunks(alldata_file, chunk_size=CHUNK_SIZE, columns=COLUMNS):
+    ''' Reads the publication table a chunk of rows at a time, without loading the whole
+        file. alldata.xlsx is streamed with openpyxl in read only mode, a .csv export with pandas.
+
+        Parameters
+        ------------
+        alldata_file : str
+                path to alldata.xlsx or alldata.csv
+
+        chunk_size : int
+                number of rows per chunk
+
+        columns : list of str
+                the columns to read
+
+        Returns
+        -----------
+        chunks : generator of pandas DataFrame
+    '''
+
+    if alldata_file.endswith(".csv"):
+        for chunk_df in pd.read_csv(alldata_file, usecols=columns, chunksize=chunk_size):
+            yield chunk_df[columns]
+        return
+
+    workbook = openpyxl.load_workbook(alldata_file, read_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = list(next(rows))
+        positions = [header.index(column) for column in columns]
+        chunk = []
+        for row in rows:
+            chunk.append([row[position] for position in positions])
+            if len(chunk) == chunk_size:
+                yield pd.DataFrame(chunk, columns=columns)
+                chunk = []
+        if len(chunk) > 0:
+            yield pd.DataFrame(chunk, columns=columns)
+    finally:
+        workbook.close()
+
+
+def _append(file_path, array):
+    with open(file_path, "ab") as file:
+        array.tofile(file)
+
+
+def _remove(*file_paths):
+    for file_path in file_paths:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+
+def _lookup(sorted_ids, node_ids, result_ids):
+    ''' The node id of every Result_id in result_ids, -1 when it is not a publication of the table
+    '''
+
+    result_ids = np.asarray(result_ids, dtype=str)        # not cast to the width of sorted_ids, which would truncate
+    if len(sorted_ids) == 0:
+        return np.full(len(result_ids), -1, dtype=np.int64)
+    positions = np.minimum(np.searchsorted(sorted_ids, result_ids), len(sorted_ids) - 1)
+    found = sorted_ids[positions] == result_ids
+    return np.where(found, node_ids[positions], -1)
+
+
+def spill_citations(alldata_file, folder, chunk_size=CHUNK_SIZE):
+    ''' Two passes over the publication table. The first numbers the publications, the second
+        writes every (citing publication, root publication) pair to citations.bin on disk.
+        The Result_id are kept as a sorted numpy array of strings, memory-mapped from
+        sorted_ids.npy and searched with numpy, instead of a dict of every publication.
+
+        Parameters
+        ------------
+        alldata_file : str
+                path to alldata.xlsx or alldata.csv
+
+        folder : str
+                the folder to spill to
+
+        chunk_size : int
+                number of rows read at a time
+
+        Returns
+        -----------
+        result_ids : numpy array
+                the Result_id of every publication, position in the array is its id
+
+        years : numpy array
+                the publication year of every publication
+    '''
+
+    chunk_ids = []
+    chunk_years = []
+    for chunk_df in iter_alldata_chunks(alldata_file, chunk_size):
+        chunk_ids.append(chunk_df["Result_id"].astype(str).to_numpy(dtype=str))
+        chunk_years.append(pd.to_numeric(chunk_df["Year"], errors="coerce").fillna(0).to_numpy(dtype=np.int32))
+    all_ids = np.concatenate(chunk_ids) if chunk_ids else np.zeros(0, dtype=str)
+    years = np.concatenate(chunk_years) if chunk_years else np.zeros(0, dtype=np.int32)
+    del chunk_ids, chunk_years
+    sorted_ids, first = np.unique(all_ids, return_index=True)
+    node_ids = np.empty(len(first), dtype=np.int64)
+    node_ids[np.argsort(first, kind="stable")] = np.arange(len(first))      # publications numbered as first listed
+    result_ids = all_ids[np.sort(first)]
+    years = years[np.sort(first)]
+    del all_ids, first
+    np.save(os.path.join(folder, "sorted_ids.npy"), sorted_ids)
+    np.save(os.path.join(folder, "node_ids.npy"), node_ids)
+    del sorted_ids, node_ids
+    sorted_ids = np.load(os.path.join(folder, "sorted_ids.npy"), mmap_mode="r")
+    node_ids = np.load(os.path.join(folder, "node_ids.npy"), mmap_mode="r")
+
+    citations_path = os.path.join(folder, "citations.bin")
+    _remove(citations_path)
+    for chunk_df in iter_alldata_chunks(alldata_file, chunk_size):
+        rootpub_df = chunk_df[chunk_df["Type of Pub"] == "Root Publication"]
+        root_ids = []
+        citing_ids = []
+        for root_id, citing_pubs_id in zip(rootpub_df["Result_id"].astype(str), rootpub_df["Citing_pubs_id"]):
+            for citing_id in _split_ids(citing_pubs_id):
+                root_ids.append(root_id)
+                citing_ids.append(citing_id)
+        citing = _lookup(sorted_ids, node_ids, citing_ids)
+        roots = _lookup(sorted_ids, node_ids, root_ids)
+        known = citing >= 0
+        _append(citations_path, np.stack([citing[known], roots[known]], axis=1).astype(np.int32))
+    return result_ids, years
+
+
+def _coupling_blocks(citation_matrix, max_block_entries):
+    ''' Splits the rows into blocks whose coupling products hold at most about max_block_entries
+        entries, estimated from the number of citers of every root a row cites
+    '''
+
+    citers = np.asarray(citation_matrix.sum(axis=0)).ravel()
+    estimate = citation_matrix @ citers + 1
+    boundaries = [0]
+    total = 0
+    for x, entries in enumerate(estimate.tolist()):
+        if total > 0 and total + entries > max_block_entries:
+            boundaries.append(x)
+            total = 0
+        total += entries
+    boundaries.append(len(estimate))
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def spill_coupling_edges(folder, size, min_strength, max_block_entries=MAX_BLOCK_ENTRIES):
+    ''' Computes the bibliographic coupling (see citation_network.bibliographic_coupling(...))
+        a block of rows at a time and spills every edge of at least min_strength once to
+        edge_rows.bin, edge_cols.bin and edge_weights.bin
+
+        Parameters
+        ------------
+        folder : str
+                the folder holding citations.bin, see spill_citations(...)
+
+        size : int
+                number of publications
+
+        min_strength : int
+                the minimum coupling strength to keep an edge
+
+        max_block_entries : int
+                bound on the entries of the coupling computed at a time
+
+        Returns
+        -----------
+        no_of_edges : int
+    '''
+
+    pairs = np.fromfile(os.path.join(folder, "citations.bin"), dtype=np.int32).reshape(-1, 2)
+    citation_matrix = sparse.csr_matrix((np.ones(len(pairs), dtype=np.int32), (pairs[:, 0], pairs[:, 1])),
+                                        shape=(size, size))
+    del pairs
+    citation_matrix.sum_duplicates()
+    transposed = citation_matrix.T.tocsr()
+
+    edge_paths = [os.path.join(folder, name) for name in ["edge_rows.bin", "edge_cols.bin", "edge_weights.bin"]]
+    _remove(*edge_paths)
+    no_of_edges = 0
+    for start, end in _coupling_blocks(citation_matrix, max_block_entries):
+        block = citation_matrix[start:end]
+        coupling = (block @ transposed + block + transposed[start:end]).tocsr()
+        coupling.sort_indices()
+        coupling = coupling.tocoo()
+        rows = coupling.row.astype(np.int64) + start
+        keep = (coupling.col > rows) & (coupling.data >= min_strength)        # upper triangle, every edge once
+        _append(edge_paths[0], rows[keep].astype(np.int32))
+        _append(edge_paths[1], coupling.col[keep].astype(np.int32))
+        _append(edge_paths[2], coupling.data[keep].astype(np.float32))
+        no_of_edges += int(np.count_nonzero(keep))
+    return no_of_edges
+
+
+def iter_spilled_edges(folder, edge_chunk_size=EDGE_CHUNK_SIZE):
+    ''' Reads the spilled edges back a chunk at a time
+
+        Returns
+        -----------
+        chunks : generator of tuples
+                (rows, cols, weights) numpy arrays
+    '''
+
+    rows_path = os.path.join(folder, "edge_rows.bin")
+    if not os.path.exists(rows_path) or os.path.getsize(rows_path) == 0:        # numpy cannot map an empty file
+        return
+    rows = np.memmap(rows_path, dtype=np.int32, mode="r")
+    cols = np.memmap(os.path.join(folder, "edge_cols.bin"), dtype=np.int32, mode="r")
+    weights = np.memmap(os.path.join(folder, "edge_weights.bin"), dtype=np.float32, mode="r")
+    for start in range(0, len(rows), edge_chunk_size):
+        end = start + edge_chunk_size
+        yield np.asarray(rows[start:end]), np.asarray(cols[start:end]), np.asarray(weights[start:end])
+
+
+def spilled_edges_to_graph(folder, result_ids, edge_chunk_size=EDGE_CHUNK_SIZE):
+    ''' Assembles the spilled edges into a CSRGraph saved in folder (see CSRGraph.save(...)),
+        writing the adjacency straight into memory-mapped .npy files, and loads it back
+        memory-mapped. The edges are spilled in row order, so every row is written sorted and
+        scipy never has to sort the read only arrays.
+
+        Parameters
+        ------------
+        folder : str
+                the folder holding the spilled edges, see spill_coupling_edges(...)
+
+        result_ids : numpy array
+                the Result_id of every publication, see spill_citations(...)
+
+        edge_chunk_size : int
+                number of spilled edges processed at a time
+
+        Returns
+        -----------
+        graph : CSRGraph
+                with memory-mapped indptr, indices and weights
+    '''
+
+    size = len(result_ids)
+    degree = np.zeros(size, dtype=np.int64)
+    for rows, cols, weights in iter_spilled_edges(folder, edge_chunk_size):
+        degree += np.bincount(rows, minlength=size) + np.bincount(cols, minlength=size)
+    indptr = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(degree, out=indptr[1:])
+    np.save(os.path.join(folder, "indptr.npy"), indptr)
+    np.save(os.path.join(folder, "result_ids.npy"), np.array(result_ids, dtype=str))
+
+    no_of_entries = max(int(indptr[-1]), 0)
+    indices = np.lib.format.open_memmap(os.path.join(folder, "indices.npy"), mode="w+", dtype=np.int64,
+                                        shape=(no_of_entries,))
+    weights_out = np.lib.format.open_memmap(os.path.join(folder, "weights.npy"), mode="w+", dtype=np.float64,
+                                            shape=(no_of_entries,))
+    cursor = indptr[:-1].copy()
+    for rows, cols, weights in iter_spilled_edges(folder, edge_chunk_size):
+        sources = np.concatenate([rows, cols]).astype(np.int64)
+        targets = np.concatenate([cols, rows])
+        values = np.concatenate([weights, weights])
+        order = np.lexsort((targets, sources))
+        sources = sources[order]
+        first = np.searchsorted(sources, sources, side="left")       # rank of every entry within its row
+        positions = cursor[sources] + np.arange(len(sources)) - first
+        indices[positions] = targets[order]
+        weights_out[positions] = values[order]
+        cursor += np.bincount(sources, minlength=size)
+    indices.flush()
+    weights_out.flush()
+    del indices, weights_out
+    return csr_graph.CSRGraph.load(folder, mmap=True)
+
+
+def build_coupling_graph(alldata_file, folder, min_strength, chunk_size=CHUNK_SIZE,
+                         max_block_entries=MAX_BLOCK_ENTRIES):
+    ''' Builds the bibliographic coupling graph of a publication table larger than memory:
+        the table is streamed in chunks, the coupling is computed blockwise and the edges are
+        spilled to folder before being assembled into a memory-mapped CSRGraph
+
+        Parameters
+        ------------
+        alldata_file : str
+                path to alldata.xlsx or alldata.csv
+
+        folder : str
+                the folder for the spilled files and the graph
+
+        min_strength : int
+                the minimum coupling strength to keep an edge
+
+        chunk_size : int
+                number of rows read at a time
+
+        max_block_entries : int
+                bound on the entries of the coupling computed at a time
+
+        Returns
+        -----------
+        graph : CSRGraph
+                the coupling graph, memory-mapped from folder
+
+        years : numpy array
+                the publication year of every node
+    '''
+
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+    result_ids, years = spill_citations(alldata_file, folder, chunk_size)
+    spill_coupling_edges(folder, len(result_ids), min_strength, max_block_entries)
+    graph = spilled_edges_to_graph(folder, result_ids)
+    return graph, years
@@ -0,0 +1,179 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+import lib.csr_graph as csr_graph
+
+MIN_OVERLAP = 0.3
+
+_worker_state = {}          # the shared graph and years, sent once to every worker process
+
+
+def window_ranges(min_year, max_year, window_size, step=1):
+    ''' The rolling time windows covering [min_year, max_year]
+
+        Parameters
+        ------------
+        min_year, max_year : int
+                the period to cover
+
+        window_size : int
+                number of years in a window
+
+        step : int
+                number of years between the starts of two windows
+
+        Returns
+        -----------
+        windows : list of tuples
+                (first year, last year) of every window
+    '''
+
+    last_start = max(min_year, max_year - window_size + 1)
+    return [(start, start + window_size - 1) for start in range(min_year, last_start + 1, step)]
+
+
+def window_clusters(graph, years, window):
+    ''' Louvain clusters of the publications of one time window, taken from the shared graph
+
+        Parameters
+        ------------
+        graph : CSRGraph
+                the network of every publication
+
+        years : numpy array
+                publication year of every node of graph
+
+        window : tuple
+                (first year, last year)
+
+        Returns
+        -----------
+        clusters : list of tuples
+                the clusters of more than one publication, largest first
+    '''
+
+    nodes = np.flatnonzero((years >= window[0]) & (years <= window[1]))
+    window_graph = graph.subgraph(nodes)
+    labels = csr_graph.louvain(window_graph)
+    clusters = [cluster for cluster in csr_graph.clusters_from_labels(window_graph.result_ids, labels) if len(cluster) > 1]
+    clusters.sort(key=len, reverse=True)
+    return clusters
+
+
+def _init_worker(graph, years):
+    _worker_state["graph"] = graph
+    _worker_state["years"] = years
+
+
+def _window_task(window):
+    return window_clusters(_worker_state["graph"], _worker_state["years"], window)
+
+
+def cluster_windows(graph, years, windows, processes=None):
+    ''' Clusters every time window in parallel. The graph is sent once to every worker and
+        each window graph is sliced out of it.
+
+        Parameters
+        ------------
+        graph : CSRGraph
+                the network of every publication
+
+        years : numpy array
+                publication year of every node of graph
+
+        windows : list of tuples
+                see window_ranges(...)
+
+        processes : int, optional
+                number of worker processes, defaults to os.cpu_count()
+
+        Returns
+        -----------
+        clusters : list
+                the clusters of every window, see window_clusters(...)
+    '''
+
+    processes = processes if processes is not None else (os.cpu_count() or 1)
+    if processes <= 1 or len(windows) <= 1:
+        return [window_clusters(graph, years, window) for window in windows]
+    with ProcessPoolExecutor(min(processes, len(windows)), initializer=_init_worker, initargs=(graph, years)) as pool:
+        return list(pool.map(_window_task, windows))
+
+
+def match_clusters(previous, current, common, min_overlap=MIN_OVERLAP):
+    ''' Links the clusters of two windows that share publications. The overlap of two clusters
+        is the Jaccard similarity of their publications within both windows.
+
+        Parameters
+        ------------
+        previous, current : list of tuples
+                the clusters of the two windows
+
+        common : set
+                the publications in both windows
+
+        min_overlap : float
+                the minimum overlap to link two clusters
+
+        Returns
+        -----------
+        links : list of tuples
+                (index in previous, index in current, overlap)
+    '''
+
+    current_index = {}
+    current_sizes = []
+    for y, cluster in enumerate(current):
+        members = [pub for pub in cluster if pub in common]
+        current_sizes.append(len(members))
+        for pub in members:
+            current_index[pub] = y
+
+    links = []
+    for x, cluster in enumerate(previous):
+        members = [pub for pub in cluster if pub in common]
+        shared = {}
+        for pub in members:
+            if pub in current_index:
+                shared[current_index[pub]] = shared.get(current_index[pub], 0) + 1
+        for y, count in sorted(shared.items()):
+            overlap = count / (len(members) + current_sizes[y] - count)
+            if overlap >= min_overlap:
+                links.append((x, y, overlap))
+    return links
+
+
+def cluster_events(no_of_previous, no_of_current, links):
+    ''' Names what happened to the clusters between two windows
+
+        Parameters
+        ------------
+        no_of_previous, no_of_current : int
+                number of clusters in the two windows
+
+        links : list of tuples
+                see match_clusters(...)
+
+        Returns
+        -----------
+        events : list of tuples
+                (index in previous or None, index in current or None, overlap, event), the event is
+                "Continuation", "Merge", "Split", "Merge and Split", "Birth" or "Death"
+    '''
+
+    outgoing = np.bincount([x for x, y, overlap in links], minlength=no_of_previous)
+    incoming = np.bincount([y for x, y, overlap in links], minlength=no_of_current)
+    events = []
+    for x, y, overlap in links:
+        if incoming[y] > 1 and outgoing[x] > 1:
+            event = "Merge and Split"
+        elif incoming[y] > 1:
+            event = "Merge"
+        elif outgoing[x] > 1:
+            event = "Split"
+        else:
+            event = "Continuation"
+        events.append((x, y, overlap, event))
+    events.extend((x, None, 0.0, "Death") for x in np.flatnonzero(outgoing == 0).tolist())
+    events.extend((None, y, 0.0, "Birth") for y in np.flatnonzero(incoming == 0).tolist())
+    return events
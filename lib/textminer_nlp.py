@@ -5,7 +5,10 @@ from nltk.corpus import stopwords, wordnet
 from nltk import RegexpTokenizer
 from nltk import WordNetLemmatizer
 
+import lib.lemma_cache as lemma_cache
+
 TOKENIZER = RegexpTokenizer(r"\w+")
+LEMMATIZER = WordNetLemmatizer()
 
 
 def _merge_cluster_abstracts(cluster):
@@ -324,12 +327,14 @@ def get_wordnet_pos(word) :
 
     return word_tag
 
+def _lemmatize_tagged(word, pos):
+    return LEMMATIZER.lemmatize(word, get_wordnet_pos(word))
+
 def create_tf_table(df, *args):
     tf_table = {}
     list_of_words = []
     stop_words = set(stopwords.words("english"))
     # port_stemmer = PorterStemmer()
-    lemmatizer = WordNetLemmatizer()
     for index, row in df.iterrows():
         for arg in args:
             words = TOKENIZER.tokenize(row[arg]) 
@@ -340,7 +345,7 @@ def create_tf_table(df, *args):
         if word in stop_words:
             continue
 
-        word = lemmatizer.lemmatize(word, get_wordnet_pos(word))    #lemmatize each word to calculate a more acc freq
+        word = lemma_cache.lemmatize(word, lemma_cache.TAGGED_POS, _lemmatize_tagged)    #lemmatize each word to calculate a more acc freq
         
         if word in tf_table:
             tf_table[word] += 1
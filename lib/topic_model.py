@@ -1,6 +1,15 @@
+import os
 import random
+import hashlib
+import pickle
+import time
+import queue
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
+from scipy import sparse
 from kneed import KneeLocator
 import matplotlib.pyplot as plt
 
@@ -9,15 +18,57 @@ from spacy.lang.en import English
 
 from gensim.corpora import Dictionary
 from gensim.models.ldamodel import LdaModel
+from gensim.models.ldamulticore import LdaMulticore
 
-from sklearn.cluster import KMeans
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.decomposition import PCA
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.feature_extraction.text import TfidfVectorizer, HashingVectorizer
+from sklearn.random_projection import SparseRandomProjection
+from sklearn.decomposition import PCA, IncrementalPCA
 from sklearn.manifold import TSNE
 
+import lib.lemma_cache as lemma_cache
+import lib.out_of_core as out_of_core
+
 parser = English()
 en_stop = set(stopwords.words('english'))
 
+TOKEN_CACHE_FILE = "token_cache.pkl"
+TOKEN_VERSION = 1       # part of the token cache key, raise it when prepare_text_for_lda(...) changes
+PIPE_BATCH_SIZE = 256
+FULL_SWEEP = 0          # KMeans for every k, see find_optimal_clusters(...)
+FAST_SWEEP = 1          # coarse to fine MiniBatchKMeans, see find_optimal_clusters_fast(...)
+CLUSTER_TOPICS = 0      # a topic model trained for every cluster
+CORPUS_TOPICS = 1       # one topic model trained on every publication, see corpus_topic_model(...)
+ONLINE_TOPICS = 2       # the corpus topic model updated with the changed publications, see update_online_model(...)
+ONLINE_MODEL_FILE = "lda_online"
+ASSIGNMENT_COLUMNS = ['Hash', 'Topic', 'Topic Probability', 'Topic Keyword']
+CORPUS_MODEL_PREFIX = "lda_"    # corpus models are saved as lda_<sha1 of the publications>.*
+MAX_CORPUS_MODELS = 3           # corpus models kept in the store, the least recently used are removed
+DICTIONARY_NO_BELOW = 2         # words in fewer publications are pruned from the online dictionary
+DICTIONARY_NO_ABOVE = 0.95      # and words in a larger share of them
+DICTIONARY_KEEP_N = 100000
+LDA_PASSES = 15
+INFERENCE_CHUNK_SIZE = 2000     # documents inferred at a time
+COHERENCE_SELECTION = 2 # LDA for several topic counts, scored by coherence, see select_num_topics(...)
+COHERENCE_POINTS = 8    # topic counts tried by select_num_topics(...)
+COHERENCE_WORDS = 10    # top words of a topic scored for coherence
+SELECTION_PASSES = 5
+SELECTION_TIME_BUDGET = 300     # seconds
+MAX_TOPICS = 50
+STREAMING_SELECTION = 3 # hashed features streamed in chunks, see find_optimal_clusters_streaming(...)
+HASH_FEATURES = 2 ** 18
+PROJECTION_COMPONENTS = 256     # sparse random projection of the hashed features
+PROJECTION_DENSITY = 1 / 32     # every hashed feature reaches about 8 components
+SVD_COMPONENTS = 50             # incremental PCA of the projection
+STREAM_CHUNK_SIZE = 10000       # documents per chunk
+MINIBATCH_SIZE = 1024           # documents per MiniBatchKMeans update
+STREAM_EPOCHS = 3               # passes over the chunks to fit MiniBatchKMeans
+COARSE_POINTS = 8       # values of k evaluated per round of the fast sweep
+MIN_PARALLEL_K = 50     # fast sweeps of fewer clusters run in process
+_worker_state = {}      # the documents, sent once to every worker process or memory-mapped once per sweep
+_sweep_pools = {}       # number of processes -> the pool shared by every fast sweep, see shutdown_sweep_pool()
+_token_cache = {}       # sha1 of a text -> its tokens from prepare_text_for_lda(...), shared by every cluster
+
 
 def tokenise(text):
     ''' Tokenises the provided string into individual words and converting them into lower caps, 
@@ -34,9 +85,12 @@ def tokenise(text):
                 A list of words
     '''
 
+    return _doc_tokens(parser(text))
+
+
+def _doc_tokens(doc):
     lda_tokens = []
-    tokens = parser(text)
-    for token in tokens:
+    for token in doc:
         if token.orth_.isspace():
             continue
         elif token.like_url:
@@ -67,6 +121,10 @@ def get_lemma(word):
                 the root form of the word
     '''
 
+    return lemma_cache.lemmatize(word, lemma_cache.ANY_POS, _morphy)
+
+
+def _morphy(word, pos):
     lemma = wordnet.morphy(word)
     if lemma is None:
         return word
@@ -89,13 +147,168 @@ def prepare_text_for_lda(text):
             A list of words that have been processed
     '''
 
-    tokens = tokenise(text)
+    return _filter_tokens(tokenise(text))
+
+
+def _content_words(tokens):
     tokens = [token for token in tokens if len(token) >= 4]
     tokens = [token for token in tokens if token not in en_stop]
-    tokens = [get_lemma(token) for token in tokens]
     return tokens
 
 
+def _filter_tokens(tokens):
+    return [get_lemma(token) for token in _content_words(tokens)]
+
+
+def _prepare_batch(texts):
+    ''' prepare_text_for_lda(...) of a batch of texts in a worker process. The lemmas are
+        returned too, so the lemma cache of the parent process learns them.
+    '''
+
+    text_list = []
+    lemmas = {}
+    for doc in parser.pipe(texts, batch_size=len(texts)):
+        words = _content_words(_doc_tokens(doc))
+        tokens = [get_lemma(word) for word in words]
+        lemmas.update(zip(words, tokens))
+        text_list.append(tokens)
+    return text_list, lemmas
+
+
+def prepare_texts_for_lda(texts, batch_size=PIPE_BATCH_SIZE, n_process=1):
+    ''' prepare_text_for_lda(...) of many texts, streamed through the spaCy pipeline in
+        batches. With n_process > 1 the batches are split over a process pool and every
+        worker tokenises, filters and lemmatizes its batches.
+
+        Parameters
+        ------------
+        texts : list of str
+            the texts to process
+
+        batch_size : int
+            number of texts sent to the pipeline at a time
+
+        n_process : int
+            number of processes, -1 for one per core
+
+        Returns
+        -----------
+        text_list : list of lists
+            the processed tokens of every text, in order
+    '''
+
+    n_process = n_process if n_process > 0 else (os.cpu_count() or 1)
+    batches = [texts[start:start + batch_size] for start in range(0, len(texts), batch_size)]
+    if n_process <= 1 or len(batches) <= 1:
+        docs = parser.pipe(texts, batch_size=batch_size)
+        return [_filter_tokens(_doc_tokens(doc)) for doc in docs]
+    text_list = []
+    with ProcessPoolExecutor(min(n_process, len(batches))) as pool:
+        for batch_tokens, lemmas in pool.map(_prepare_batch, batches):
+            text_list.extend(batch_tokens)
+            lemma_cache.add_lemmas(lemmas, lemma_cache.ANY_POS)
+    return text_list
+
+
+def _text_key(text):
+    return hashlib.sha1((str(TOKEN_VERSION) + "\t" + text).encode("utf-8")).hexdigest()
+
+
+def cached_tokens(text):
+    ''' prepare_text_for_lda(...) of a text, computed once per distinct text and then taken
+        from the token cache
+
+        Parameters
+        ------------
+        text : str
+            A string of words
+
+        Returns
+        -----------
+        tokens : list
+            A list of words that have been processed, do not modify
+    '''
+
+    key = _text_key(text)
+    tokens = _token_cache.get(key)
+    if tokens is None:
+        tokens = prepare_text_for_lda(text)
+        _token_cache[key] = tokens
+    return tokens
+
+
+def document_tokens(df):
+    ''' The processed tokens of the Title followed by the Abstract of every publication
+
+        Parameters
+        ------------
+        df : pandas DataFrame
+                columns : ['Title', 'Abstract', ...]
+
+        Returns
+        -----------
+        text_list : list of lists
+                the tokens of every row of df, in order
+    '''
+
+    return [cached_tokens(title) + cached_tokens(abstract) for title, abstract in zip(df["Title"], df["Abstract"])]
+
+
+def corpus_tokens(df, batch_size=PIPE_BATCH_SIZE, n_process=1):
+    ''' The processed tokens of the Title followed by the Abstract of every publication. Texts
+        missing from the token cache are processed together with prepare_texts_for_lda(...)
+        and added to it, so per cluster calls of document_tokens(...) only read the cache.
+
+        Parameters
+        ------------
+        df : pandas DataFrame
+                columns : ['Result_id', 'Title', 'Abstract', ...]
+
+        batch_size : int
+                see prepare_texts_for_lda(...)
+
+        n_process : int
+                see prepare_texts_for_lda(...)
+
+        Returns
+        -----------
+        tokens : dict
+                key, value: Result_id, list of tokens
+    '''
+
+    pubs_df = df.drop_duplicates("Result_id")
+    missing = {}
+    for text in list(pubs_df["Title"]) + list(pubs_df["Abstract"]):
+        key = _text_key(text)
+        if key not in _token_cache:
+            missing[key] = text
+    if len(missing) > 0:
+        processed = prepare_texts_for_lda(list(missing.values()), batch_size, n_process)
+        _token_cache.update(zip(missing.keys(), processed))
+    return dict(zip(pubs_df["Result_id"], document_tokens(pubs_df)))
+
+
+def load_token_cache(folder):
+    ''' Loads the token cache saved by save_token_cache(...), so texts processed in earlier
+        runs are not processed again. Keeps the current cache if there is no saved one.
+    '''
+
+    cache_path = os.path.join(folder, TOKEN_CACHE_FILE)
+    if os.path.exists(cache_path):
+        with open(cache_path, "rb") as file:
+            _token_cache.update(pickle.load(file))
+    return len(_token_cache)
+
+
+def save_token_cache(folder):
+    ''' Saves the token cache as TOKEN_CACHE_FILE in folder
+    '''
+
+    with open(os.path.join(folder, TOKEN_CACHE_FILE), "wb") as file:
+        pickle.dump(_token_cache, file, protocol=pickle.HIGHEST_PROTOCOL)
+    return None
+
+
 def prepare_bow_dictionary(text_list):
     ''' Prepares a list of words to create a bag of word dictionary and a corpus
 
@@ -142,27 +355,258 @@ def retrieve_topic_for_doc(token_list, ldamodel, dictionary):
 
     return topic
 
-def get_optimal_cluster_value(df):
-    list_of_docs = []
-    for index, row in df.iterrows():
-        list_of_docs.append(row["Title"] + " " + row["Abstract"])
+def fit_corpus_tfidf(df):
+    ''' Fits the TF-IDF vocabulary and weights once on the Title and Abstract of every
+        publication, so clusters take their rows instead of fitting their own
+
+        Parameters
+        ------------
+        df : pandas DataFrame
+                a DataFrame containing all publications extracted
+                columns : ['Result_id', 'Title', 'Abstract', ...]
 
-    max_cluster = int(len(df.index) / 4) #25% of the size of the cluster
+        Returns
+        -----------
+        corpus_tfidf : tuple
+                (dict of Result_id to row, scipy csr matrix of documents by terms)
+    '''
 
+    pubs_df = df.drop_duplicates("Result_id")
+    list_of_docs = [title + " " + abstract for title, abstract in zip(pubs_df["Title"], pubs_df["Abstract"])]
     tfidf = TfidfVectorizer(min_df = 3, max_df = 0.95, max_features=8000, stop_words='english')
-    text = tfidf.fit_transform(list_of_docs)
-    optimal_cluster = find_optimal_clusters(text, max_cluster)
+    matrix = tfidf.fit_transform(list_of_docs).tocsr()
+    return {result_id: x for x, result_id in enumerate(pubs_df["Result_id"])}, matrix
+
+
+def cluster_tfidf(corpus_tfidf, df):
+    ''' The rows of the corpus TF-IDF matrix for the publications of df, in order. Only these
+        rows are copied, scipy copies any slice that is a view of a much larger matrix anyway.
+
+        Parameters
+        ------------
+        corpus_tfidf : tuple
+                see fit_corpus_tfidf(...)
+
+        df : pandas DataFrame
+                the publications of one cluster
+
+        Returns
+        -----------
+        matrix : scipy csr matrix
+    '''
+
+    row_index, matrix = corpus_tfidf
+    return matrix[[row_index[result_id] for result_id in df["Result_id"]]]
+
+
+def get_optimal_cluster_value(df, k_selection=FULL_SWEEP, processes=None, corpus_tfidf=None, max_cluster=None):
+    if max_cluster is None:
+        max_cluster = int(len(df.index) / 4) #25% of the size of the cluster
+    else:
+        max_cluster = min(int(len(df.index) / 4), max_cluster)
+
+    if k_selection == STREAMING_SELECTION:
+        optimal_cluster = find_optimal_clusters_streaming(lambda: dataframe_chunks(df), max_cluster)
+        return optimal_cluster if optimal_cluster is not None else 1
+
+    if corpus_tfidf is not None:
+        text = cluster_tfidf(corpus_tfidf, df)
+    else:
+        list_of_docs = []
+        for index, row in df.iterrows():
+            list_of_docs.append(row["Title"] + " " + row["Abstract"])
+        tfidf = TfidfVectorizer(min_df = 3, max_df = 0.95, max_features=8000, stop_words='english')
+        text = tfidf.fit_transform(list_of_docs)
+    if k_selection == FAST_SWEEP:
+        optimal_cluster = find_optimal_clusters_fast(text, max_cluster, processes)
+    else:
+        optimal_cluster = find_optimal_clusters(text, max_cluster)
     if optimal_cluster == None:
         optimal_cluster = 1
     return optimal_cluster
 
 
+def dataframe_chunks(df, chunk_size=STREAM_CHUNK_SIZE):
+    ''' The Title and Abstract of the publications of df, chunk_size documents at a time
+
+        Returns
+        -----------
+        chunks : generator of lists of str
+    '''
+
+    for start in range(0, len(df.index), chunk_size):
+        chunk_df = df.iloc[start:start + chunk_size]
+        yield [str(title) + " " + str(abstract) for title, abstract in zip(chunk_df["Title"], chunk_df["Abstract"])]
+
+
+def file_chunks(alldata_file, chunk_size=STREAM_CHUNK_SIZE):
+    ''' The Title and Abstract of every publication of alldata.xlsx or alldata.csv, read from
+        the file chunk_size rows at a time, see out_of_core.iter_alldata_chunks(...)
+
+        Returns
+        -----------
+        chunks : generator of lists of str
+    '''
+
+    for chunk_df in out_of_core.iter_alldata_chunks(alldata_file, chunk_size, ["Title", "Abstract"]):
+        yield [str(title) + " " + str(abstract) for title, abstract in zip(chunk_df["Title"], chunk_df["Abstract"])]
+
+
+def fit_stream_reducer(chunks):
+    ''' Fits the reduction of documents to SVD_COMPONENTS dense features in one pass with a
+        fixed amount of memory: words are hashed into HASH_FEATURES features, randomly
+        projected to PROJECTION_COMPONENTS and reduced with incremental PCA
+
+        Parameters
+        ------------
+        chunks : function
+                returns a new iterable of lists of documents on every call, for example
+                lambda: dataframe_chunks(df) or lambda: file_chunks(alldata_file)
+
+        Returns
+        -----------
+        reducer : tuple
+                (HashingVectorizer, SparseRandomProjection, IncrementalPCA)
+    '''
+
+    hashing = HashingVectorizer(n_features=HASH_FEATURES, alternate_sign=False, stop_words='english')
+    projection = SparseRandomProjection(n_components=PROJECTION_COMPONENTS, density=PROJECTION_DENSITY,
+                                        dense_output=True, random_state=0)
+    projection.fit(sparse.csr_matrix((1, HASH_FEATURES)))         # only uses the number of features
+    pca = IncrementalPCA(n_components=SVD_COMPONENTS)
+    fitted = False
+    pending = np.zeros((0, PROJECTION_COMPONENTS))
+    for docs in chunks():
+        pending = np.vstack([pending, projection.transform(hashing.transform(docs))])
+        if len(pending) >= SVD_COMPONENTS:          # every batch of incremental PCA needs as many rows as components
+            pca.partial_fit(pending)
+            fitted = True
+            pending = np.zeros((0, PROJECTION_COMPONENTS))
+    if not fitted and len(pending) > 0:
+        pca = IncrementalPCA(n_components=len(pending)).partial_fit(pending)
+    return hashing, projection, pca
+
+
+def reduce_documents(reducer, docs):
+    ''' The reduced features of a list of documents, see fit_stream_reducer(...)
+    '''
+
+    hashing, projection, pca = reducer
+    return pca.transform(projection.transform(hashing.transform(docs)))
+
+
+def _fit_streaming_kmeans(chunks, reducer, ks):
+    models = [MiniBatchKMeans(n_clusters=k, random_state=20, n_init=3) for k in ks]
+    started = [False] * len(ks)
+    for epoch in range(0, STREAM_EPOCHS):
+        for docs in chunks():
+            features = reduce_documents(reducer, docs)
+            for start in range(0, len(features), MINIBATCH_SIZE):
+                batch = features[start:start + MINIBATCH_SIZE]
+                for x, model in enumerate(models):
+                    if started[x] or len(batch) >= ks[x]:    # the first batch needs at least k documents
+                        model.partial_fit(batch)
+                        started[x] = True
+    return [model for model, is_fitted in zip(models, started) if is_fitted]
+
+
+def _streaming_sse(chunks, reducer, ks):
+    models = _fit_streaming_kmeans(chunks, reducer, ks)
+    sse = [0.0] * len(models)
+    for docs in chunks():
+        features = reduce_documents(reducer, docs)
+        for x, model in enumerate(models):
+            sse[x] -= model.score(features)
+    return {model.n_clusters: value for model, value in zip(models, sse)}
+
+
+def find_optimal_clusters_streaming(chunks, max_k, reducer=None):
+    ''' Finds the elbow of the SSE by number of clusters like find_optimal_clusters_fast(...)
+        on documents streamed in chunks. Every round fits MiniBatchKMeans for its values of k
+        at once on the reduced features of every chunk, then sums their SSE in another pass.
+
+        Parameters
+        ------------
+        chunks : function
+                see fit_stream_reducer(...)
+
+        max_k : int
+                the largest number of clusters
+
+        reducer : tuple, optional
+                see fit_stream_reducer(...), fitted on chunks by default
+
+        Returns
+        -----------
+        knee : int
+                the number of clusters at the knee, None if there is no knee. A refinement round
+                without a knee keeps the knee of the round before.
+    '''
+
+    if max_k < 1:
+        return None
+    reducer = reducer if reducer is not None else fit_stream_reducer(chunks)
+    sse = {}
+    knee = None
+    candidates = _grid(1, max_k, COARSE_POINTS)
+    while True:
+        sse.update(_streaming_sse(chunks, reducer, [k for k in candidates if k not in sse]))
+        iters = sorted(sse)
+        if len(iters) < 2:
+            return None
+        kn = KneeLocator(iters, [sse[k] for k in iters], curve='convex', direction='decreasing')
+        if kn.knee is None or kn.knee == knee:
+            break
+        knee = kn.knee
+        position = iters.index(knee)
+        candidates = _grid(iters[max(position - 1, 0)], iters[min(position + 1, len(iters) - 1)], COARSE_POINTS)
+        if all(k in sse for k in candidates):
+            break
+    _plot_elbow(iters, [sse[k] for k in iters], knee)
+    return knee
+
+
+def streaming_clusters(chunks, n_clusters, reducer=None):
+    ''' Clusters documents streamed in chunks with MiniBatchKMeans on their reduced features,
+        see fit_stream_reducer(...)
+
+        Parameters
+        ------------
+        chunks : function
+                see fit_stream_reducer(...)
+
+        n_clusters : int
+                number of clusters
+
+        reducer : tuple, optional
+                see fit_stream_reducer(...), fitted on chunks by default
+
+        Returns
+        -----------
+        labels : numpy array
+                the cluster of every document, in the order of the chunks
+    '''
+
+    reducer = reducer if reducer is not None else fit_stream_reducer(chunks)
+    models = _fit_streaming_kmeans(chunks, reducer, [n_clusters])
+    if len(models) == 0:
+        return np.zeros(sum(len(docs) for docs in chunks()), dtype=np.int64)
+    labels = [models[0].predict(reduce_documents(reducer, docs)) for docs in chunks()]
+    return np.concatenate(labels) if len(labels) > 0 else np.zeros(0, dtype=np.int64)
+
+
 def find_optimal_clusters(data, max_k):
     iters = range(1, max_k+1)
     sse = []
     for k in iters:
         sse.append(KMeans(n_clusters=k, random_state=20).fit(data).inertia_)
 
+    kn = KneeLocator(iters, sse, curve='convex', direction='decreasing')
+    _plot_elbow(iters, sse, kn.knee)
+    return kn.knee
+
+
+def _plot_elbow(iters, sse, knee):
     fig, ax = plt.subplots(1, 1)
     ax.plot(iters, sse, marker='o')
     ax.set_xlabel('Cluster Centers')
@@ -170,29 +614,670 @@ def find_optimal_clusters(data, max_k):
     ax.set_xticklabels(iters)
     ax.set_ylabel('SSE')
     ax.set_title('SSE by Cluster Center Plot')
-    kn = KneeLocator(iters, sse, curve='convex', direction='decreasing')
-    if kn.knee is not None:
-        plt.vlines(kn.knee, plt.ylim()[0], plt.ylim()[1], linestyles='dashed')
-    return kn.knee
+    if knee is not None:
+        plt.vlines(knee, plt.ylim()[0], plt.ylim()[1], linestyles='dashed')
 
 
-def apply_topic_modelling(df):
-    num_of_topics = get_optimal_cluster_value(df)
-    print("NUMBER OF TOPICS " + str(num_of_topics))
-    text_list = []
-    for index, row in df.iterrows():
-        tokens = prepare_text_for_lda(row["Title"])
-        tokens.extend(prepare_text_for_lda(row["Abstract"]))
-        text_list.append(tokens)
+def _plot_coherence(scores, num_topics):
+    iters = sorted(scores)
+    fig, ax = plt.subplots(1, 1)
+    ax.plot(iters, [scores[k] for k in iters], marker='o')
+    ax.set_xlabel('Number of Topics')
+    ax.set_xticks(iters)
+    ax.set_xticklabels(iters)
+    ax.set_ylabel('UMass Coherence')
+    ax.set_title('Coherence by Number of Topics Plot')
+    plt.vlines(num_topics, plt.ylim()[0], plt.ylim()[1], linestyles='dashed')
+
+
+def _minibatch_inertia(data, k):
+    return MiniBatchKMeans(n_clusters=k, random_state=20, n_init=3).fit(data).inertia_
 
+
+def _save_sweep_data(data, folder):
+    ''' Writes the documents of a fast sweep to folder once, as .npy files the workers memory-map
+    '''
+
+    if sparse.issparse(data):
+        data = sparse.csr_matrix(data)
+        np.save(os.path.join(folder, "data.npy"), data.data)
+        np.save(os.path.join(folder, "indices.npy"), data.indices)
+        np.save(os.path.join(folder, "indptr.npy"), data.indptr)
+        np.save(os.path.join(folder, "shape.npy"), np.array(data.shape))
+    else:
+        np.save(os.path.join(folder, "dense.npy"), np.asarray(data))
+    return None
+
+
+def _shared_minibatch_inertia(folder, k):
+    if _worker_state.get("sweep_folder") != folder:        # mapped by the first task of the sweep in this worker
+        # copy on write, as sklearn asks for writable buffers, pages stay shared while they are only read
+        if os.path.exists(os.path.join(folder, "dense.npy")):
+            data = np.load(os.path.join(folder, "dense.npy"), mmap_mode="c")
+        else:
+            arrays = [np.load(os.path.join(folder, name + ".npy"), mmap_mode="c")
+                      for name in ["data", "indices", "indptr"]]
+            data = sparse.csr_matrix(tuple(arrays), shape=tuple(np.load(os.path.join(folder, "shape.npy"))))
+        _worker_state["sweep_folder"] = folder
+        _worker_state["sweep_data"] = data
+    return _minibatch_inertia(_worker_state["sweep_data"], k)
+
+
+def _sweep_pool(processes):
+    processes = min(processes, COARSE_POINTS)
+    if processes not in _sweep_pools:
+        _sweep_pools[processes] = ProcessPoolExecutor(processes)
+    return _sweep_pools[processes]
+
+
+def shutdown_sweep_pool():
+    ''' Shuts down the worker processes shared by the fast sweeps of an analysis, see
+        find_optimal_clusters_fast(...)
+    '''
+
+    for pool in _sweep_pools.values():
+        pool.shutdown()
+    _sweep_pools.clear()
+    return None
+
+
+def _grid(low, high, points):
+    return sorted(set(np.linspace(low, high, points).round().astype(int).tolist()))
+
+
+def find_optimal_clusters_fast(data, max_k, processes=None):
+    ''' Finds the elbow of the SSE by number of clusters like find_optimal_clusters(...) without
+        fitting every k. MiniBatchKMeans is fitted for COARSE_POINTS values of k spread over
+        [1, max_k], then for finer values between the neighbours of the knee, until the knee
+        stays the same for two rounds. The values of a round are fitted in parallel on a process
+        pool created once and shared by every sweep until shutdown_sweep_pool(...), sweeps of
+        fewer than MIN_PARALLEL_K clusters run in process. The documents are written once per
+        sweep to a temporary folder that every worker memory-maps, instead of being sent with
+        every value of k.
+
+        Parameters
+        ------------
+        data : sparse matrix
+                the TF-IDF of every document
+
+        max_k : int
+                the largest number of clusters
+
+        processes : int, optional
+                number of worker processes, defaults to os.cpu_count()
+
+        Returns
+        -----------
+        knee : int
+                the number of clusters at the knee, None if there is no knee. A refinement round
+                without a knee keeps the knee of the round before.
+    '''
+
+    if max_k < 1:
+        return None
+    processes = processes if processes is not None else (os.cpu_count() or 1)
+    if processes > 1 and max_k >= MIN_PARALLEL_K:
+        pool = _sweep_pool(processes)
+        with tempfile.TemporaryDirectory() as folder:
+            _save_sweep_data(data, folder)
+            return _fast_sweep(lambda ks: pool.map(_shared_minibatch_inertia, [folder] * len(ks), ks), max_k)
+    return _fast_sweep(lambda ks: [_minibatch_inertia(data, k) for k in ks], max_k)
+
+
+def _fast_sweep(inertia, max_k):
+    sse = {}
+    knee = None
+    candidates = _grid(1, max_k, COARSE_POINTS)
+    while True:
+        new_k = [k for k in candidates if k not in sse]
+        sse.update(zip(new_k, inertia(new_k)))
+        iters = sorted(sse)
+        kn = KneeLocator(iters, [sse[k] for k in iters], curve='convex', direction='decreasing')
+        if kn.knee is None or kn.knee == knee:
+            break
+        knee = kn.knee
+        position = iters.index(knee)
+        candidates = _grid(iters[max(position - 1, 0)], iters[min(position + 1, len(iters) - 1)], COARSE_POINTS)
+        if all(k in sse for k in candidates):
+            break
+    iters = sorted(sse)
+    _plot_elbow(iters, [sse[k] for k in iters], knee)
+    return knee
+
+
+def cooccurrence_table(corpus, num_terms):
+    ''' Number of documents every pair of words occurs in together, the diagonal is the
+        number of documents of every word
+
+        Parameters
+        ------------
+        corpus : list
+                bag of words of every document, see prepare_bow_dictionary(...)
+
+        num_terms : int
+                number of words in the dictionary
+
+        Returns
+        -----------
+        cooccurrence : scipy csr matrix
+                shape (num_terms, num_terms)
+    '''
+
+    rows = [x for x, bow in enumerate(corpus) for word_id, count in bow]
+    cols = [word_id for bow in corpus for word_id, count in bow]
+    occurrence = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(corpus), num_terms))
+    return (occurrence.T @ occurrence).tocsr()
+
+
+def umass_coherence(ldamodel, cooccurrence, top_n=COHERENCE_WORDS):
+    ''' Mean UMass coherence of the topics of a model: for every topic, the sum over pairs of
+        its top words of log((documents with both + 1) / documents with the more likely word)
+
+        Returns
+        -----------
+        coherence : float
+                closer to 0 is better
+    '''
+
+    scores = []
+    for topic in ldamodel.get_topics():
+        top = np.argsort(-topic)[:top_n]
+        counts = cooccurrence[top][:, top].toarray()
+        pairs = np.tril_indices(len(top), -1)          # every word with the more likely words before it
+        scores.append(np.sum(np.log((counts[pairs] + 1) / np.maximum(counts[pairs[1], pairs[1]], 1))))
+    return float(np.mean(scores))
+
+
+def _init_selection_worker(corpus, dictionary, cooccurrence):
+    _worker_state["corpus"] = corpus
+    _worker_state["dictionary"] = dictionary
+    _worker_state["cooccurrence"] = cooccurrence
+
+
+def _coherence_task(num_topics):
+    ldamodel = LdaModel(_worker_state["corpus"], num_topics=num_topics, id2word=_worker_state["dictionary"],
+                        passes=SELECTION_PASSES, random_state=0)
+    return num_topics, umass_coherence(ldamodel, _worker_state["cooccurrence"])
+
+
+def select_num_topics(text_list, max_topics=None, processes=None, time_budget=SELECTION_TIME_BUDGET):
+    ''' Chooses the number of topics by training LDA models for COHERENCE_POINTS topic counts in
+        parallel and keeping the count with the best UMass coherence. The co-occurrence table
+        is computed once and sent once to every worker. Counts not trained within time_budget
+        seconds are skipped and the workers still training them are terminated.
+
+        Parameters
+        ------------
+        text_list : list of lists
+                the tokens of every document, see document_tokens(...)
+
+        max_topics : int, optional
+                the largest number of topics, defaults to a quarter of the documents up to MAX_TOPICS
+
+        processes : int, optional
+                number of worker processes, defaults to os.cpu_count()
+
+        time_budget : float
+                seconds after which no more topic counts are waited for
+
+        Returns
+        -----------
+        num_topics : int
+
+        scores : dict
+                key, value: number of topics, coherence
+    '''
+
+    deadline = time.time() + time_budget
+    max_topics = max_topics if max_topics is not None else min(int(len(text_list) / 4), MAX_TOPICS)
+    candidates = _grid(min(2, max_topics), max_topics, COHERENCE_POINTS) if max_topics >= 1 else []
+    if len(candidates) <= 1:
+        return max(max_topics, 1), {}
+    dictionary, corpus = prepare_bow_dictionary(text_list)
+    cooccurrence = cooccurrence_table(corpus, len(dictionary))
+    processes = processes if processes is not None else (os.cpu_count() or 1)
+
+    scores = {}
+    if processes <= 1:
+        _init_selection_worker(corpus, dictionary, cooccurrence)
+        try:
+            for num_topics in candidates:
+                if time.time() > deadline and len(scores) > 0:
+                    break
+                scores.update([_coherence_task(num_topics)])
+        finally:
+            _worker_state.clear()
+    else:
+        finished = queue.Queue()        # results and errors, put by the result thread of the pool
+        pool = multiprocessing.Pool(min(processes, len(candidates)), initializer=_init_selection_worker,
+                                    initargs=(corpus, dictionary, cooccurrence))
+        try:
+            for num_topics in candidates:
+                pool.apply_async(_coherence_task, (num_topics,), callback=finished.put, error_callback=finished.put)
+            for received in range(0, len(candidates)):
+                timeout = max(deadline - time.time(), 0) if len(scores) > 0 else None
+                try:
+                    result = finished.get(timeout=timeout)
+                except queue.Empty:         # out of time
+                    break
+                if isinstance(result, BaseException):
+                    raise result
+                scores.update([result])
+        finally:
+            pool.terminate()        # stops the LDA fits still running
+            pool.join()
+    return max(scores, key=lambda num_topics: (scores[num_topics], -num_topics)), scores
+
+
+def _corpus_key(df):
+    digest = hashlib.sha1()
+    for result_id, title, abstract in zip(df["Result_id"], df["Title"], df["Abstract"]):
+        digest.update((str(result_id) + "\t" + str(title) + "\t" + str(abstract) + "\n").encode("utf-8"))
+    return digest.hexdigest()
+
+
+def train_corpus_model(df, num_topics=None, workers=None, passes=LDA_PASSES, corpus_tfidf=None,
+                       k_selection=FULL_SWEEP, dictionary=None, plot_path=None):
+    ''' Trains one LDA model on every publication with LdaMulticore
+
+        Parameters
+        ------------
+        df : pandas DataFrame
+                a DataFrame containing all publications extracted
+                columns : ['Result_id', 'Title', 'Abstract', ...]
+
+        num_topics : int, optional
+                number of topics, chosen with get_optimal_cluster_value(...) by default, at most MAX_TOPICS
+
+        workers : int, optional
+                number of worker processes of LdaMulticore, defaults to one less than the cores
+
+        passes : int
+                number of passes through the corpus
+
+        corpus_tfidf : tuple, optional
+                see fit_corpus_tfidf(...), used to choose the number of topics
+
+        k_selection : int
+                FULL_SWEEP, FAST_SWEEP, COHERENCE_SELECTION or STREAMING_SELECTION, how the number
+                of topics is chosen
+
+        dictionary : gensim library dictionary object, optional
+                the words of the model, every word of the publications by default
+
+        plot_path : str, optional
+                the file the elbow or coherence plot of the number of topics is saved to. The
+                plot is closed either way
+
+        Returns
+        -----------
+        ldamodel : gensim LdaMulticore
+
+        dictionary : gensim library dictionary object
+    '''
+
+    pubs_df = df.drop_duplicates("Result_id")
+    if num_topics is None:
+        if k_selection == COHERENCE_SELECTION:
+            num_topics, scores = select_num_topics(document_tokens(pubs_df))
+            _plot_coherence(scores, num_topics)
+        else:
+            num_topics = get_optimal_cluster_value(pubs_df, k_selection, corpus_tfidf=corpus_tfidf,
+                                                   max_cluster=MAX_TOPICS)
+        if plot_path is not None and len(plt.get_fignums()) > 0:
+            plt.savefig(plot_path)
+        plt.close()
+    workers = workers if workers is not None else max((os.cpu_count() or 1) - 1, 1)
+    if dictionary is None:
+        dictionary, corpus = prepare_bow_dictionary(document_tokens(pubs_df))
+    else:
+        corpus = [dictionary.doc2bow(tokens) for tokens in document_tokens(pubs_df)]
+    ldamodel = LdaMulticore(corpus, num_topics=num_topics, id2word=dictionary, passes=passes, workers=workers,
+                            random_state=0)
+    return ldamodel, dictionary
+
+
+def corpus_topic_model(df, folder, workers=None, corpus_tfidf=None, k_selection=FULL_SWEEP, plot_path=None):
+    ''' The LDA model of every publication, loaded from folder if it was trained on the same
+        publications before, otherwise trained with train_corpus_model(...) and saved in folder
+
+        Parameters
+        ------------
+        df : pandas DataFrame
+                a DataFrame containing all publications extracted
+
+        folder : str
+                the folder the model is saved in, keeping the MAX_CORPUS_MODELS most recently used
+
+        workers : int, optional
+                see train_corpus_model(...)
+
+        corpus_tfidf : tuple, optional
+                see train_corpus_model(...)
+
+        k_selection : int
+                see train_corpus_model(...), a model is saved for every way of choosing the topics
+
+        plot_path : str, optional
+                see train_corpus_model(...), only saved when the model is trained
+
+        Returns
+        -----------
+        corpus_model : tuple
+                (ldamodel, dictionary)
+    '''
+
+    model_name = CORPUS_MODEL_PREFIX + _corpus_key(df.drop_duplicates("Result_id")) + "_k" + str(k_selection)
+    model_path = os.path.join(folder, model_name)
+    if os.path.exists(model_path + ".model"):
+        os.utime(model_path + ".model")         # recently used, see _prune_corpus_models(...)
+        return LdaMulticore.load(model_path + ".model"), Dictionary.load(model_path + ".dict")
+    ldamodel, dictionary = train_corpus_model(df, workers=workers, corpus_tfidf=corpus_tfidf, k_selection=k_selection,
+                                              plot_path=plot_path)
+    ldamodel.save(model_path + ".model")
+    dictionary.save(model_path + ".dict")
+    _prune_corpus_models(folder)
+    return ldamodel, dictionary
+
+
+def _prune_corpus_models(folder, keep=MAX_CORPUS_MODELS):
+    ''' Removes every file of all but the keep most recently used corpus models in folder.
+        The files of a model start with its name, gensim saves large arrays next to the .model.
+    '''
+
+    names = {}
+    for file_name in os.listdir(folder):
+        model_name = file_name.split(".")[0]
+        if model_name.startswith(CORPUS_MODEL_PREFIX) and model_name != ONLINE_MODEL_FILE:
+            names.setdefault(model_name, []).append(file_name)
+    used = {model_name: os.path.getmtime(os.path.join(folder, model_name + ".model"))
+            if os.path.exists(os.path.join(folder, model_name + ".model")) else 0.0 for model_name in names}
+    superseded = sorted(names, key=lambda model_name: used[model_name], reverse=True)[keep:]
+    for model_name in superseded:
+        for file_name in names[model_name]:
+            os.remove(os.path.join(folder, file_name))
+    return len(superseded)
+
+
+def _document_hashes(df):
+    return {result_id: _text_key(str(title) + "\t" + str(abstract))
+            for result_id, title, abstract in zip(df["Result_id"], df["Title"], df["Abstract"])}
+
+
+def _count_words(document_words, document_frequencies, result_ids, text_list=None):
+    ''' Removes the words of result_ids from the document frequencies, then adds the words of
+        text_list under the same Result_id when given
+    '''
+
+    for result_id in result_ids:
+        for token in document_words.pop(result_id, ()):
+            document_frequencies[token] -= 1
+            if document_frequencies[token] == 0:
+                del document_frequencies[token]
+    if text_list is not None:
+        for result_id, tokens in zip(result_ids, text_list):
+            words = tuple(set(tokens))
+            document_words[result_id] = words
+            for token in words:
+                document_frequencies[token] = document_frequencies.get(token, 0) + 1
+    return None
+
+
+def _prune_dictionary(document_frequencies, num_docs, dictionary=None):
+    ''' The dictionary of the online model: the words in at least DICTIONARY_NO_BELOW and at
+        most a DICTIONARY_NO_ABOVE share of the publications, the DICTIONARY_KEEP_N most frequent
+        of them, like Dictionary.filter_extremes(...). Every word is kept when none would be left.
+        The words of dictionary keep their order, new words follow, so a small change of the
+        publications changes few words.
+    '''
+
+    no_above = int(DICTIONARY_NO_ABOVE * num_docs)
+    kept = [token for token, frequency in document_frequencies.items() if DICTIONARY_NO_BELOW <= frequency <= no_above]
+    if len(kept) > DICTIONARY_KEEP_N:
+        kept = sorted(kept, key=lambda token: (-document_frequencies[token], token))[:DICTIONARY_KEEP_N]
+    if len(kept) == 0:
+        kept = list(document_frequencies)
+    old_token2id = dictionary.token2id if dictionary is not None else {}
+    kept.sort(key=lambda token: (old_token2id.get(token, len(old_token2id)), token))
+
+    pruned = Dictionary()
+    pruned.token2id = {token: x for x, token in enumerate(kept)}
+    pruned.dfs = {x: document_frequencies[token] for x, token in enumerate(kept)}
+    pruned.num_docs = num_docs
+    pruned.num_nnz = sum(pruned.dfs.values())
+    return pruned
+
+
+def _load_vocabulary(folder):
+    vocabulary_path = os.path.join(folder, ONLINE_MODEL_FILE + ".vocab")
+    if not os.path.exists(vocabulary_path):
+        return None
+    with open(vocabulary_path, "rb") as file:
+        return pickle.load(file)
+
+
+def _align_model(ldamodel, dictionary, old_token2id):
+    ''' Resizes the topic word statistics of ldamodel to the words of dictionary after the
+        dictionary grew and was pruned, keeping the statistics of every word still in it
+    '''
+
+    old_ids = []
+    new_ids = []
+    for token, new_id in dictionary.token2id.items():
+        if token in old_token2id:
+            old_ids.append(old_token2id[token])
+            new_ids.append(new_id)
+    eta = np.full(len(dictionary), np.mean(ldamodel.eta), dtype=ldamodel.dtype)
+    eta[new_ids] = ldamodel.eta[old_ids]
+    sstats = np.zeros((ldamodel.num_topics, len(dictionary)), dtype=ldamodel.dtype)
+    sstats[:, new_ids] = ldamodel.state.sstats[:, old_ids]
+
+    ldamodel.num_terms = len(dictionary)
+    ldamodel.id2word = dictionary
+    ldamodel.eta = eta
+    ldamodel.state.eta = eta
+    ldamodel.state.sstats = sstats
+    ldamodel.sync_state()
+    return ldamodel
+
+
+def load_online_model(folder):
+    ''' Loads the model saved by update_online_model(...)
+
+        Returns
+        -----------
+        online_model : tuple
+                (ldamodel, dictionary, assignments_df), None if there is no saved model
+    '''
+
+    model_path = os.path.join(folder, ONLINE_MODEL_FILE)
+    if not os.path.exists(model_path + ".model"):
+        return None
+    return (LdaMulticore.load(model_path + ".model"), Dictionary.load(model_path + ".dict"),
+            pd.read_pickle(model_path + ".pkl"))
+
+
+def update_online_model(df, folder, workers=None, corpus_tfidf=None, k_selection=FULL_SWEEP, plot_path=None):
+    ''' Keeps a corpus topic model up to date as the publications grow. The first call trains
+        it with train_corpus_model(...). Later calls feed only the publications that are new or
+        whose Title or Abstract changed through an online LDA update, and refresh the topics of
+        those publications only. The document frequency of every word is kept with the words of
+        every publication, so an update subtracts the old words of the changed and removed
+        publications and adds the new ones before the dictionary is pruned, see
+        _prune_dictionary(...). The first call prunes the dictionary the same way. Every topic
+        is stored with its keywords at the time it was assigned. The model, dictionary,
+        document frequencies and topics are saved in folder.
+
+        Parameters
+        ------------
+        df : pandas DataFrame
+                a DataFrame containing all publications extracted
+                columns : ['Result_id', 'Title', 'Abstract', ...]
+
+        folder : str
+                the folder the model is saved in
+
+        workers : int, optional
+                see train_corpus_model(...)
+
+        corpus_tfidf : tuple, optional
+                see train_corpus_model(...), only used by the first call
+
+        k_selection : int
+                see train_corpus_model(...), only used by the first call
+
+        plot_path : str, optional
+                see train_corpus_model(...), only used by the first call
+
+        Returns
+        -----------
+        ldamodel : gensim LdaMulticore
+
+        dictionary : gensim library dictionary object
+
+        assignments_df : pandas DataFrame
+                indexed by Result_id
+                columns : ASSIGNMENT_COLUMNS
+    '''
+
+    pubs_df = df.drop_duplicates("Result_id")
+    hashes = _document_hashes(pubs_df)
+    online_model = load_online_model(folder)
+    vocabulary = _load_vocabulary(folder)
+    if online_model is None or vocabulary is None:      # a model saved without its document frequencies is retrained
+        changed_df = pubs_df
+        text_list = document_tokens(changed_df)
+        document_words, document_frequencies = {}, {}
+        _count_words(document_words, document_frequencies, list(changed_df["Result_id"]), text_list)
+        dictionary = _prune_dictionary(document_frequencies, len(document_words))
+        ldamodel, dictionary = train_corpus_model(pubs_df, workers=workers, corpus_tfidf=corpus_tfidf,
+                                                  k_selection=k_selection, dictionary=dictionary, plot_path=plot_path)
+        assignments_df = pd.DataFrame(columns=ASSIGNMENT_COLUMNS, index=pd.Index([], name="Result_id"))
+    else:
+        ldamodel, dictionary, assignments_df = online_model
+        document_words, document_frequencies = vocabulary
+        assignments_df = assignments_df[assignments_df.index.isin(list(hashes))]     # removed publications
+        previous = assignments_df["Hash"].to_dict() if "Topic Keyword" in assignments_df.columns else {}
+        changed_df = pubs_df[[previous.get(result_id) != key for result_id, key in hashes.items()]]
+        removed = [result_id for result_id in document_words if result_id not in hashes]
+        text_list = document_tokens(changed_df)
+        if len(changed_df.index) > 0 or len(removed) > 0:
+            _count_words(document_words, document_frequencies, removed)
+            _count_words(document_words, document_frequencies, list(changed_df["Result_id"]), text_list)
+            old_token2id = dict(dictionary.token2id)
+            dictionary = _prune_dictionary(document_frequencies, len(document_words), dictionary)
+            _align_model(ldamodel, dictionary, old_token2id)
+        if len(changed_df.index) > 0:
+            ldamodel.update([dictionary.doc2bow(tokens) for tokens in text_list])
+
+    topic_number, probability = best_topics(text_list, ldamodel, dictionary)
+    changed = pd.DataFrame({'Hash': [hashes[result_id] for result_id in changed_df["Result_id"]],
+                            'Topic': topic_number, 'Topic Probability': probability,
+                            'Topic Keyword': _topic_keywords(ldamodel)[topic_number]},
+                           index=pd.Index(changed_df["Result_id"], name="Result_id"), columns=ASSIGNMENT_COLUMNS)
+    assignments_df = pd.concat([assignments_df[~assignments_df.index.isin(changed.index)], changed])
+
+    model_path = os.path.join(folder, ONLINE_MODEL_FILE)
+    ldamodel.save(model_path + ".model")
+    dictionary.save(model_path + ".dict")
+    assignments_df.to_pickle(model_path + ".pkl")
+    with open(model_path + ".vocab", "wb") as file:
+        pickle.dump((document_words, document_frequencies), file, protocol=pickle.HIGHEST_PROTOCOL)
+    return ldamodel, dictionary, assignments_df
+
+
+def apply_topic_modelling(df, k_selection=FULL_SWEEP, corpus_model=None, corpus_tfidf=None, topic_assignments=None):
+    ''' Tags every publication of a cluster with its most likely topic. Trains a topic model
+        on the cluster unless corpus_model is given.
+
+        Parameters
+        ------------
+        df : pandas DataFrame
+                the publications of one cluster
+
+        k_selection : int
+                FULL_SWEEP, FAST_SWEEP, COHERENCE_SELECTION or STREAMING_SELECTION, how the number
+                of topics is chosen
+
+        corpus_model : tuple, optional
+                (ldamodel, dictionary) of every publication, see corpus_topic_model(...)
+
+        corpus_tfidf : tuple, optional
+                the TF-IDF of every publication, see fit_corpus_tfidf(...), by default it is
+                fitted on the cluster
+
+        topic_assignments : pandas DataFrame, optional
+                the topics of every publication under corpus_model, see update_online_model(...),
+                by default they are inferred
+
+        Returns
+        -----------
+        df : pandas DataFrame
+                with the columns 'Topic', 'Topic Keyword' and 'Topic Probability'
+    '''
+
+    if corpus_model is not None and topic_assignments is not None:
+        assignments = topic_assignments.reindex(df["Result_id"])
+        topic_number = assignments["Topic"].fillna(-1).to_numpy(dtype=np.int64)
+        keywords = assignments["Topic Keyword"].to_numpy(dtype=object, copy=True)     # the topic when it was assigned
+        keywords[topic_number == -1] = "OUTLIER"
+        df.insert(len(df.columns), "Topic", topic_number)
+        df.insert(len(df.columns), "Topic Keyword", keywords)
+        df.insert(len(df.columns), "Topic Probability", assignments["Topic Probability"].fillna(0).to_numpy())
+        return df
+
+    text_list = document_tokens(df)       # processed once, reused for training and assignment
+    if corpus_model is not None:
+        ldamodel, dictionary = corpus_model
+        return assign_topics(df, text_list, ldamodel, dictionary)
+
+    if k_selection == COHERENCE_SELECTION:
+        num_of_topics, scores = select_num_topics(text_list)
+        _plot_coherence(scores, num_of_topics)
+    else:
+        num_of_topics = get_optimal_cluster_value(df, k_selection, corpus_tfidf=corpus_tfidf)
+    print("NUMBER OF TOPICS " + str(num_of_topics))
     dictionary, corpus = prepare_bow_dictionary(text_list)
 
     ldamodel = LdaModel(
-        corpus, num_topics=num_of_topics, id2word=dictionary, passes=15, random_state=0)
+        corpus, num_topics=num_of_topics, id2word=dictionary, passes=LDA_PASSES, random_state=0)
+    return assign_topics(df, text_list, ldamodel, dictionary)
+
+
+def assign_topics(df, text_list, ldamodel, dictionary):
+    ''' Adds the most likely topic of every publication to df
+
+        Parameters
+        ------------
+        df : pandas DataFrame
+                the publications
+
+        text_list : list of lists
+                the tokens of every row of df, see document_tokens(...)
+
+        ldamodel : gensim LDAModel
+
+        dictionary : gensim library dictionary object
+
+        Returns
+        -----------
+        df : pandas DataFrame
+                with the columns 'Topic', 'Topic Keyword' and 'Topic Probability'
+    '''
+
+    topic_number, probability = best_topics(text_list, ldamodel, dictionary)
+    df.insert(len(df.columns), "Topic", topic_number)
+    df.insert(len(df.columns), "Topic Keyword", _topic_keywords(ldamodel)[topic_number])
+    df.insert(len(df.columns), "Topic Probability", probability)
+    return df
+
+
+def _topic_keywords(ldamodel):
+    ''' The words of every topic, indexed by topic number, with "OUTLIER" at index -1
+    '''
 
     topics = ldamodel.show_topics(num_topics=-1, formatted=False)
     topics = sorted(topics)
-    topic_word_list = []
     topic_dict = {}
     for topic_number, topic in topics:
         list_of_words = []
@@ -200,25 +1285,59 @@ def apply_topic_modelling(df):
             list_of_words.append(word)
         topic_dict[topic_number] = list_of_words
 
-    df.insert(len(df.columns), "Topic", None)
-    df.insert(len(df.columns), "Topic Keyword", None)
-    df.insert(len(df.columns), "Topic Probability", None)
-    for index, row in df.iterrows():
-        pub_bow = prepare_text_for_lda(row["Title"])
-        pub_bow.extend(prepare_text_for_lda(row["Abstract"]))
-        pub_topics = retrieve_topic_for_doc(pub_bow, ldamodel, dictionary)
-        topic_keywords = "OUTLIER"
-        topic_number = -1
-        topic_probablity = 0
-        if len(pub_topics) > 0:
-            pub_topics.sort(key=lambda x:x[1], reverse=True)
-            topic_keywords = topic_dict[pub_topics[0][0]]
-            topic_number = pub_topics[0][0]
-            topic_probablity = pub_topics[0][1]
-
-        df.at[index, "Topic"] = topic_number
-        df.at[index, "Topic Keyword"] = topic_keywords
-        df.at[index, "Topic Probability"] = topic_probablity
-
-
-    return df
\ No newline at end of file
+    keywords = np.empty(ldamodel.num_topics + 1, dtype=object)
+    for topic_number in range(0, ldamodel.num_topics):
+        keywords[topic_number] = topic_dict.get(topic_number, [])
+    keywords[-1] = "OUTLIER"
+    return keywords
+
+
+def best_topics(text_list, ldamodel, dictionary):
+    ''' The most likely topic of every document and its probability, see document_topic_matrix(...)
+
+        Returns
+        -----------
+        topic_number : numpy array
+                -1 when no topic reaches the minimum probability of the model
+
+        probability : numpy array
+                0 for those documents
+    '''
+
+    topic_matrix = document_topic_matrix(text_list, ldamodel, dictionary)
+    if len(text_list) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0)
+    probability = topic_matrix.max(axis=1)
+    outlier = probability < ldamodel.minimum_probability     # get_document_topics(...) would return no topic
+    return np.where(outlier, -1, topic_matrix.argmax(axis=1)), np.where(outlier, 0, probability)
+
+
+def document_topic_matrix(text_list, ldamodel, dictionary, chunk_size=INFERENCE_CHUNK_SIZE):
+    ''' The topic distribution of every document, inferred a chunk of documents at a time
+        instead of one get_document_topics(...) call per document
+
+        Parameters
+        ------------
+        text_list : list of lists
+                the tokens of every document
+
+        ldamodel : gensim LDAModel
+                The LDAModel produced through training with a set of data
+
+        dictionary : gensim library dictionary object
+
+        chunk_size : int
+                number of documents inferred at a time
+
+        Returns
+        -----------
+        topic_matrix : numpy array
+                shape (documents, topics), every row sums to 1
+    '''
+
+    corpus = [dictionary.doc2bow(tokens) for tokens in text_list]
+    chunks = [ldamodel.inference(corpus[start:start + chunk_size])[0] for start in range(0, len(corpus), chunk_size)]
+    if len(chunks) == 0:
+        return np.zeros((0, ldamodel.num_topics))
+    gamma = np.vstack(chunks)
+    return gamma / gamma.sum(axis=1, keepdims=True)
\ No newline at end of file
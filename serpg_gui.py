@@ -9,12 +9,21 @@ import pandas as pd
 import serpg
 import analysis
 import lib.topic_model as topic_model
+import lib.lemma_cache as lemma_cache
 import lib.textminer as textminer
 import lib.textminer_nlp as textminer_nlp
+import lib.citation_network as citation_network
+import lib.graph_store as graph_store
+import lib.dedup as dedup
+import lib.author_network as author_network
+import lib.csr_graph as csr_graph
 
 SIDEBAR_LIGHTGREY = "#d4d4d4"
 MAINWINDOW_WHITE = "#ffffff"
 ERROR_COLOUR = "#fa8072"
+ALL_NETWORK_MODES = 3
+AUTHOR_NETWORK_MODE = 4
+OUT_OF_CORE_FILE_SIZE = 500 * 1024 * 1024      # larger publication tables are streamed from disk
 
 
 class Application(tk.Frame):
@@ -229,6 +238,7 @@ class Application(tk.Frame):
             widget.destroy()
 
         reg_valid_number = frame.register(is_valid_number)  
+        reg_valid_number_list = frame.register(is_valid_number_list)
 
         self.update_output_message("Hello")
 
@@ -262,22 +272,85 @@ class Application(tk.Frame):
         max_year.place(relx=0.4, rely=0.55, relwidth=0.2, relheight=0.05)
 
         min_str_label = tk.Label(
-            frame, text="Please indicate min \nedge strength eg. 2", bg=MAINWINDOW_WHITE)
-        min_str_label.place(relx=0.1, rely=0.65, relwidth=0.2, relheight=0.1)
+            frame, text="Please indicate min \nedge strength eg. 2 \nor 1,2,3 to compare", bg=MAINWINDOW_WHITE)
+        min_str_label.place(relx=0.1, rely=0.63, relwidth=0.2, relheight=0.12)
         min_str = tk.Entry(master=frame, bg=SIDEBAR_LIGHTGREY)
-        min_str.config(validate="key", validatecommand=(reg_valid_number, "%P"))
+        min_str.config(validate="key", validatecommand=(reg_valid_number_list, "%P"))
         min_str.place(relx=0.1, rely=0.75, relwidth=0.2, relheight=0.05)
 
         algo_label = tk.Label(
-            frame, text="Please indicate clustering algorithm. \n 0 - Clauset Newman Moore Algorithm \n 1 - Girvan Newman Algorithm", bg=MAINWINDOW_WHITE)
+            frame, text="Please indicate clustering algorithm. \n 0 - Clauset Newman Moore Algorithm \n 1 - Girvan Newman Algorithm \n 2 - Louvain Algorithm", bg=MAINWINDOW_WHITE)
         algo_label.place(relx=0.3, rely=0.62, relwidth=0.4, relheight=0.15)
         algo = tk.Entry(master=frame, bg=SIDEBAR_LIGHTGREY)
         algo.config(validate="key", validatecommand=(reg_valid_number, "%P"))
         algo.place(relx=0.4, rely=0.75, relwidth=0.2, relheight=0.05)
 
+        level_label = tk.Label(
+            frame, text="Optional: Girvan Newman \nlevel eg. 12", bg=MAINWINDOW_WHITE)
+        level_label.place(relx=0.7, rely=0.65, relwidth=0.25, relheight=0.1)
+        level = tk.Entry(master=frame, bg=SIDEBAR_LIGHTGREY)
+        level.config(validate="key", validatecommand=(reg_valid_number, "%P"))
+        level.place(relx=0.72, rely=0.75, relwidth=0.2, relheight=0.05)
+
+        network_label = tk.Label(
+            frame, text="Network: 0 - Bibliographic coupling \n1 - Co-citation, 2 - Direct citation \n3 - All, 4 - Authors", bg=MAINWINDOW_WHITE)
+        network_label.place(relx=0.62, rely=0.43, relwidth=0.36, relheight=0.12)
+        network = tk.Entry(master=frame, bg=SIDEBAR_LIGHTGREY)
+        network.config(validate="key", validatecommand=(reg_valid_number, "%P"))
+        network.insert(tk.END, "0")
+        network.place(relx=0.72, rely=0.55, relwidth=0.2, relheight=0.05)
+
+        normalization_label = tk.Label(
+            frame, text="Weights: 0 - counts, 1 - cosine \n2 - Jaccard, 3 - association", bg=MAINWINDOW_WHITE)
+        normalization_label.place(relx=0.62, rely=0.81, relwidth=0.36, relheight=0.08)
+        normalization = tk.Entry(master=frame, bg=SIDEBAR_LIGHTGREY)
+        normalization.config(validate="key", validatecommand=(reg_valid_number, "%P"))
+        normalization.insert(tk.END, "0")
+        normalization.place(relx=0.72, rely=0.89, relwidth=0.2, relheight=0.05)
+
+        top_k_label = tk.Label(
+            frame, text="Optional: keep top k edges \nper publication, not in sweeps", bg=MAINWINDOW_WHITE)
+        top_k_label.place(relx=0.4, rely=0.81, relwidth=0.2, relheight=0.08)
+        top_k = tk.Entry(master=frame, bg=SIDEBAR_LIGHTGREY)
+        top_k.config(validate="key", validatecommand=(reg_valid_number, "%P"))
+        top_k.place(relx=0.4, rely=0.89, relwidth=0.2, relheight=0.05)
+
+        window_label = tk.Label(
+            frame, text="Optional: rolling window \nin years eg. 3", bg=MAINWINDOW_WHITE)
+        window_label.place(relx=0.1, rely=0.36, relwidth=0.2, relheight=0.08)
+        window = tk.Entry(master=frame, bg=SIDEBAR_LIGHTGREY)
+        window.config(validate="key", validatecommand=(reg_valid_number, "%P"))
+        window.place(relx=0.4, rely=0.375, relwidth=0.2, relheight=0.05)
+
+        topics_label = tk.Label(
+            frame, text="Topics: 0 - per cluster \n1 - whole corpus, 2 - update", bg=MAINWINDOW_WHITE)
+        topics_label.place(relx=0.62, rely=0.36, relwidth=0.2, relheight=0.07)
+        topics = tk.Entry(master=frame, bg=SIDEBAR_LIGHTGREY)
+        topics.config(validate="key", validatecommand=(reg_valid_number, "%P"))
+        topics.insert(tk.END, "0")
+        topics.place(relx=0.82, rely=0.37, relwidth=0.1, relheight=0.05)
+
+        dedup_label = tk.Label(
+            frame, text="Merge duplicates: \n1 - yes, 0 - no", bg=MAINWINDOW_WHITE)
+        dedup_label.place(relx=0.86, rely=0.20, relwidth=0.13, relheight=0.07)
+        merge_duplicates = tk.Entry(master=frame, bg=SIDEBAR_LIGHTGREY)
+        merge_duplicates.config(validate="key", validatecommand=(reg_valid_number, "%P"))
+        merge_duplicates.insert(tk.END, "1")
+        merge_duplicates.place(relx=0.88, rely=0.27, relwidth=0.08, relheight=0.05)
+
+        topic_count_label = tk.Label(
+            frame, text="Topic count: 0 - full, \n1 - fast, 2 - coherence, \n3 - streaming", bg=MAINWINDOW_WHITE)
+        topic_count_label.place(relx=0.86, rely=0.03, relwidth=0.13, relheight=0.1)
+        topic_count = tk.Entry(master=frame, bg=SIDEBAR_LIGHTGREY)
+        topic_count.config(validate="key", validatecommand=(reg_valid_number, "%P"))
+        topic_count.insert(tk.END, "0")
+        topic_count.place(relx=0.88, rely=0.13, relwidth=0.08, relheight=0.05)
+
         start_analysis = self.start_analysis_button(frame, all_data_file,
-                                                    save_folder, min_year, max_year, min_str, algo)
-        start_analysis.place(relx=0.1, rely=0.85, relwidth=0.6, relheight=0.1)
+                                                    save_folder, min_year, max_year, min_str, algo, level, network,
+                                                    normalization, top_k, window, topics, merge_duplicates,
+                                                    topic_count)
+        start_analysis.place(relx=0.05, rely=0.85, relwidth=0.3, relheight=0.1)
 
         return 0
 
@@ -389,7 +462,8 @@ class Application(tk.Frame):
                         command=lambda: self.retrieve_folder(frame, entry))
         return btn
 
-    def start_analysis_button(self, frame, alldata_path, save_path, min_year, max_year, min_strength, algo):
+    def start_analysis_button(self, frame, alldata_path, save_path, min_year, max_year, min_strength, algo, level, network,
+                              normalization, top_k, window, topics, merge_duplicates, topic_count):
         '''Creates a button that will trigger the data analysis
 
         Parameters
@@ -418,7 +492,9 @@ class Application(tk.Frame):
 
         btn = btn = tk.Button(master=frame, text="Start Analysis",
                               command=lambda: self.analyse_data(alldata_path, save_path, min_year, 
-                                                                max_year, min_strength, algo))
+                                                                max_year, min_strength, algo, level, network,
+                                                                normalization, top_k, window, topics,
+                                                                merge_duplicates, topic_count))
         return btn
 
     def retrieve_info_button(self, frame, savepath, topic, key, min_year, max_year, root_doc, cite_doc):
@@ -499,7 +575,8 @@ class Application(tk.Frame):
         entry.insert(tk.END, folder)
         return folder
 
-    def analyse_data(self, alldata_path, save_path, min_year, max_year, min_strength, algo):
+    def analyse_data(self, alldata_path, save_path, min_year, max_year, min_strength, algo, level, network,
+                     normalization, top_k, window, topics, merge_duplicates, topic_count):
         ''' Function that will initiate the analysis of data. This function will execute
             input validation too.
 
@@ -523,6 +600,33 @@ class Application(tk.Frame):
             min_strength : str
                     the minimum coupling strength of publications
 
+            level : str
+                    the Girvan Newman hierarchy level to cut at, empty for the highest modularity
+
+            network : str
+                    the network mode, 0 - Bibliographic coupling, 1 - Co-citation, 2 - Direct citation, 3 - All,
+                    4 - Co-authorship and author bibliographic coupling
+
+            normalization : str
+                    the edge weights, 0 - Raw counts, 1 - Salton cosine, 2 - Jaccard, 3 - Association strength
+
+            top_k : str
+                    the number of strongest edges kept per publication, empty to keep all
+
+            window : str
+                    the number of years in a rolling window for temporal clustering, empty to skip
+
+            topics : str
+                    the topic model, 0 - one per cluster, 1 - one for the whole corpus, 2 - the whole corpus
+                    model updated with the new and changed publications
+
+            merge_duplicates : str
+                    1 - merge near duplicate publications before building the networks, 0 - keep every Result_id
+
+            topic_count : str
+                    how the number of topics is chosen, 0 - KMeans for every count, 1 - coarse to fine
+                    MiniBatchKMeans, 2 - LDA coherence, 3 - hashed features streamed in chunks
+
             Returns
             ----------
             None
@@ -536,6 +640,14 @@ class Application(tk.Frame):
         maximum_year = max_year.get()
         minimum_strength = min_strength.get()
         cluster_algo = algo.get()
+        cluster_level = level.get()
+        network_mode = network.get()
+        weight_normalization = normalization.get()
+        edges_per_pub = top_k.get()
+        window_size = window.get()
+        topic_mode = topics.get()
+        deduplicate = merge_duplicates.get()
+        k_selection = topic_count.get()
         error_message = ""
         if (len(alldata_file) == 0) or not path.exists(alldata_file):
             alldata_path.config({'background': ERROR_COLOUR})
@@ -557,22 +669,56 @@ class Application(tk.Frame):
             error_message += "Latest Year cannot be empty. \n"
             all_valid = False  
 
-        if (len(minimum_strength) == 0):
+        if (len(parse_number_list(minimum_strength)) == 0):
             min_strength.config({'background': ERROR_COLOUR})
             error_message += "Minimum Edge Strength cannot be empty. \n"
             all_valid = False  
 
-        if (len(cluster_algo) == 0):
-            cluster_algo.config({'background': ERROR_COLOUR})
-            error_message += "Minimum Edge Strength cannot be empty. \n"
+        if (len(cluster_algo) == 0) or int(cluster_algo) > 2:
+            algo.config({'background': ERROR_COLOUR})
+            error_message += "Clustering algorithm must be 0, 1 or 2. \n"
             all_valid = False 
         
+        if (len(network_mode) == 0) or int(network_mode) > AUTHOR_NETWORK_MODE:
+            network.config({'background': ERROR_COLOUR})
+            error_message += "Network must be 0, 1, 2, 3 or 4. \n"
+            all_valid = False
+
+        if (len(weight_normalization) == 0) or int(weight_normalization) > 3:
+            normalization.config({'background': ERROR_COLOUR})
+            error_message += "Weights must be 0, 1, 2 or 3. \n"
+            all_valid = False
+
+        if (len(edges_per_pub) > 0) and int(edges_per_pub) < 1:
+            top_k.config({'background': ERROR_COLOUR})
+            error_message += "Top k edges must be at least 1, or empty to keep all. \n"
+            all_valid = False
+
+        if (len(topic_mode) == 0) or int(topic_mode) > topic_model.ONLINE_TOPICS:
+            topics.config({'background': ERROR_COLOUR})
+            error_message += "Topics must be 0, 1 or 2. \n"
+            all_valid = False
+
+        if (len(deduplicate) == 0) or int(deduplicate) > 1:
+            merge_duplicates.config({'background': ERROR_COLOUR})
+            error_message += "Merge duplicates must be 0 or 1. \n"
+            all_valid = False
+
+        if (len(k_selection) == 0) or int(k_selection) > topic_model.STREAMING_SELECTION:
+            topic_count.config({'background': ERROR_COLOUR})
+            error_message += "Topic count must be 0, 1, 2 or 3. \n"
+            all_valid = False
+
         if (all_valid):
-            all_entry = [alldata_path, save_path, min_year, max_year, min_strength, algo]
+            all_entry = [alldata_path, save_path, min_year, max_year, min_strength, algo, network, normalization, top_k,
+                         topics, merge_duplicates, topic_count]
             for entry in all_entry:
                 entry.config({'background': SIDEBAR_LIGHTGREY})
             print("EXECUTING")
-            analysis_of_data(alldata_file, folder_path, minimum_year, maximum_year, minimum_strength, cluster_algo)
+            analysis_of_data(alldata_file, folder_path, minimum_year, maximum_year, minimum_strength, cluster_algo,
+                             cluster_level if len(cluster_level) > 0 else None, network_mode,
+                             weight_normalization, edges_per_pub if len(edges_per_pub) > 0 else None,
+                             window_size if len(window_size) > 0 else None, topic_mode, deduplicate, k_selection)
             return "COMPLETED"
         else:
             self.update_output_message(error_message)
@@ -675,6 +821,43 @@ def is_valid_number(input):
     else:
         return False
 
+def is_valid_number_list(input):
+    values = input.split(",")
+    return input == "" or (all(is_valid_number(value) for value in values) and any(len(value) > 0 for value in values))
+
+def parse_number_list(input):
+    return [int(value) for value in str(input).split(",") if len(value) > 0]
+
+def out_of_core_limitations(min_strengths, cluster_algo, cluster_level, normalization, top_k, window_size,
+                            deduplicate, topic_mode=topic_model.CLUSTER_TOPICS, k_selection=topic_model.FULL_SWEEP):
+    ''' The options a large file analysed out of core does not support, see
+        analysis.create_out_of_core_network_file(...)
+
+        Returns
+        -----------
+        messages : list of str
+                one message per option that was set but not applied
+    '''
+
+    messages = []
+    if len(min_strengths) > 1:
+        messages.append("Only the first minimum edge strength is used for large files")
+    if cluster_algo != 2 or cluster_level is not None:
+        messages.append("Large files are always clustered with the Louvain Algorithm")
+    if normalization != 0 or top_k is not None:
+        messages.append("Large files keep raw coupling counts, the weights and top k edges are not applied")
+    if window_size is not None:
+        messages.append("Rolling windows are not clustered for large files")
+    if deduplicate:
+        messages.append("Duplicate publications are not merged for large files")
+    if topic_mode != topic_model.CLUSTER_TOPICS:
+        messages.append("Topic models are not trained for large files, topics.csv groups the publications by "
+                        "their titles and abstracts")
+    if k_selection != topic_model.STREAMING_SELECTION:
+        messages.append("The topic count of large files is always streamed")
+    messages.append("Cluster workbooks are not created for large files")
+    return messages
+
 def retrieval_of_data(savepath, topic, key, min_year, max_year, limit, citation_limit):
     total_retrieved = 0
     app.update_output_message("Starting retrieval of data")
@@ -719,16 +902,58 @@ def retrieval_of_data(savepath, topic, key, min_year, max_year, limit, citation_
 
     return 0
 
-def analysis_of_data(alldata_file, savepath, min_year, max_year, min_strength, cluster_algo):
+def analysis_of_data(alldata_file, savepath, min_year, max_year, min_strength, cluster_algo, cluster_level=None, network_mode=0,
+                     normalization=0, top_k=None, window_size=None, topic_mode=0, deduplicate=1,
+                     k_selection=topic_model.FULL_SWEEP):
     min_year = int(min_year)
     max_year = int(max_year)
-    min_strength = int(min_strength)
+    min_strengths = parse_number_list(min_strength)
+    if len(min_strengths) == 0:
+        raise ValueError("Minimum edge strength needs at least one number")
+    min_strength = min_strengths[0]
     cluster_algo = int(cluster_algo)
+    cluster_level = int(cluster_level) if cluster_level is not None else None
+    network_mode = int(network_mode)
+    normalization = int(normalization)
+    top_k = int(top_k) if top_k is not None else None
+    window_size = int(window_size) if window_size is not None else None
+    topic_mode = int(topic_mode)
+    deduplicate = bool(int(deduplicate))
+    k_selection = int(k_selection)
+    network_modes = list(citation_network.NETWORK_MODES) if network_mode == ALL_NETWORK_MODES else [network_mode]
+    if network_mode == AUTHOR_NETWORK_MODE:
+        network_modes = []
     print(min_strength)
     app.update_output_message("Starting retrieval of data")
     app.master.update()
     try: 
-        alldata_df = pd.read_excel(alldata_file)
+        if os.path.getsize(alldata_file) > OUT_OF_CORE_FILE_SIZE and network_mode == citation_network.BIBLIOGRAPHIC_COUPLING:
+            app.update_output_message("Large file, building the network out of core")
+            app.master.update()
+            network_graph, labels = analysis.create_out_of_core_network_file(alldata_file, min_strength, savepath)
+            app.update_output_message(str(network_graph.number_of_edges()) + " edges in " + str(labels.max(initial=0))
+                                      + " clusters, see clusters.csv and network.csv")
+            app.update_output_message("Grouping the publications into topics", overwrite=False)
+            app.master.update()
+            no_of_topics, topics = analysis.create_streaming_topic_file(alldata_file, savepath)
+            app.update_output_message(str(no_of_topics) + " topics, see topics.csv")
+            for message in out_of_core_limitations(min_strengths, cluster_algo, cluster_level, normalization, top_k,
+                                                   window_size, deduplicate, topic_mode, k_selection):
+                app.update_output_message(message, overwrite=False)
+            app.progress_bar["value"] = 100
+            app.master.update()
+            return 0
+        alldata_df, dataset_key = graph_store.load_alldata(alldata_file)     # binary copy after the first read
+        store = graph_store.store_path(alldata_file)
+        topic_model.load_token_cache(store)       # titles and abstracts processed in earlier runs
+        lemma_cache.load_lemma_cache(store)
+        if deduplicate:
+            alldata_df, duplicates = dedup.merge_near_duplicates(alldata_df)      # before any network is built
+            if len(duplicates) > 0:
+                pd.DataFrame(list(duplicates.items()), columns=["Result_id", "Merged_into"]).to_excel(
+                    savepath + "/duplicates.xlsx", index=False)
+            app.update_output_message("Merged " + str(len(duplicates)) + " duplicate publications")
+            app.master.update()
 
         # no_of_topics = int(len(alldata_df.index) * 0.10)   # 10% of all publications in the topic
         # topics, lda_model, dictionary = topic_model.prepare_topics(alldata_df, no_of_topics)
@@ -738,54 +963,144 @@ def analysis_of_data(alldata_file, savepath, min_year, max_year, min_strength, c
         app.progress_bar["value"] = 10
         app.master.update()
 
-        node_dict = analysis.create_nodes(alldata_df)
-        app.update_output_message("Number of nodes: " + str(len(node_dict.keys())))
+        corpus_tfidf = None
+        corpus_model = None
+        topic_assignments = None
+        elbowmethod_path = savepath + "/elbow_method.png"      # the topic count of the corpus model, if trained
+        if network_mode != AUTHOR_NETWORK_MODE:
+            corpus_tfidf = topic_model.fit_corpus_tfidf(alldata_df)      # every cluster takes its rows
+        if topic_mode == topic_model.CORPUS_TOPICS and network_mode != AUTHOR_NETWORK_MODE:
+            app.update_output_message("Training the topic model of all publications")
+            app.master.update()
+            topic_model.corpus_tokens(alldata_df, n_process=os.cpu_count() or 1)
+            corpus_model = topic_model.corpus_topic_model(alldata_df, store, corpus_tfidf=corpus_tfidf,
+                                                          k_selection=k_selection,
+                                                          plot_path=elbowmethod_path)   # reused by every cluster
+        if topic_mode == topic_model.ONLINE_TOPICS and network_mode != AUTHOR_NETWORK_MODE:
+            app.update_output_message("Updating the topic model with new publications")
+            app.master.update()
+            ldamodel, dictionary, topic_assignments = topic_model.update_online_model(alldata_df, store,
+                                                                                     corpus_tfidf=corpus_tfidf,
+                                                                                     k_selection=k_selection,
+                                                                                     plot_path=elbowmethod_path)
+            corpus_model = (ldamodel, dictionary)
+
+        networks = None         # only built when a network is missing from the store
+        app.update_output_message("Number of nodes: " + str(len(alldata_df.index)))
         app.progress_bar["value"] = 15
         app.master.update()
-        components = analysis.create_network_file(node_dict, alldata_df, min_strength, cluster_algo, savepath)
-
-        app.progress_bar["value"] = 20
-        app.master.update()
-
-        cluster_names = textminer_nlp.create_cluster_names(components, alldata_df, 2, "Title", "Abstract")
-        clusters = {}
-        linegraph_data_dict = {}
-        for x in range(0, len(components)):
-            print("Component " + str(x + 1) + "/" + str(len(components)) + "Starting")
-            cluster = components[x]
-            cluster_no = x + 1
-            cluster_name = cluster_names[x]
-            
-            app.update_output_message("Analysing Component " + str(cluster_no) + ": " + cluster_name)
-            app.progress_bar["value"] += (70/len(components))
+        if network_mode == AUTHOR_NETWORK_MODE:
+            analysis_of_authors(alldata_df, min_strength, cluster_algo, savepath, 80)
+        for mode in network_modes:
+            mode_name = citation_network.NETWORK_MODES[mode]
+            mode_savepath = savepath
+            if len(network_modes) > 1:
+                mode_savepath = savepath + "/" + mode_name
+                if not os.path.exists(mode_savepath):
+                    os.makedirs(mode_savepath)
+
+            if len(min_strengths) > 1:        # sweep mode, only compares the minimum strengths
+                app.update_output_message(mode_name + ": comparing minimum edge strengths " + ", ".join(map(str, min_strengths)))
+                if top_k is not None:
+                    app.update_output_message("Top k edges is not applied when comparing minimum edge strengths",
+                                              overwrite=False)
+                app.master.update()
+                if networks is None:
+                    networks = citation_network.create_networks(alldata_df, network_modes)      # all modes from one read
+                result_ids, weights, occurrences = networks[mode]
+                analysis.sweep_min_strength(result_ids, citation_network.to_sweep_edges(networks[mode], normalization),
+                                            min_strengths, cluster_algo, mode_savepath)
+                continue
+
+            app.update_output_message("Creating " + mode_name + " network")
             app.master.update()
-
-            
-            cluster_df, linegraph_data = analysis.create_cluster_indi(cluster, cluster_no, cluster_name,
-                                                                        alldata_df, min_year, max_year, savepath)
-            clusters[cluster_name] = cluster_df
-            linegraph_data_dict[cluster_name] = linegraph_data
-
-        combined_df = pd.concat(clusters)
-        combineddata_path = savepath + "/combined_data.xlsx"
-        combined_df.to_excel(combineddata_path, index=False)
-        analysis.create_cluster_sum(clusters, linegraph_data_dict, min_year, max_year, savepath)
-
+            key = graph_store.network_key(dataset_key, network_mode=mode, min_strength=min_strength,
+                                          normalization=normalization, top_k=top_k, deduplicated=deduplicate)
+            network_graph = graph_store.load_graph(store, key)
+            if network_graph is None:
+                if networks is None:
+                    networks = citation_network.create_networks(alldata_df, network_modes)
+                result_ids, weights, occurrences = citation_network.prune_network(networks[mode], min_strength,
+                                                                                  normalization, top_k)
+                network_graph = csr_graph.CSRGraph.from_matrix(result_ids, weights)
+                graph_store.save_graph(store, key, network_graph)
+            components = analysis.create_graph_network_file(network_graph, mode, alldata_df, cluster_algo,
+                                                            mode_savepath, cluster_level=cluster_level)
+            app.progress_bar["value"] += (5/len(network_modes))
+            app.master.update()
+            if window_size is not None:
+                app.update_output_message(mode_name + ": clustering " + str(window_size) + " year windows")
+                app.master.update()
+                analysis.create_temporal_clusters(network_graph, alldata_df, min_year, max_year, window_size,
+                                                  mode_savepath)
+            mode_df = analysis.add_centrality(alldata_df, network_graph)       # centrality columns in the cluster workbooks
+            analysis_of_clusters(components, mode_df, min_year, max_year, mode_savepath, 70/len(network_modes),
+                                 corpus_model, corpus_tfidf, topic_assignments, k_selection)
+
+        topic_model.save_token_cache(store)
+        lemma_cache.save_lemma_cache(store)
         app.update_output_message("Analysis Completed")
         app.progress_bar["value"] = 100
         app.master.update()
-    except Exception as err:
-        raise Exception
+    except Exception as err:        # shown to the user, eg. a Girvan Newman level outside the hierarchy
         app.update_output_message("{}".format(err).upper())
         app.progress_bar["value"] = 0
         app.master.update()
+        raise
+    finally:
+        topic_model.shutdown_sweep_pool()       # the fast sweep workers are shared by every cluster of the analysis
 
     # list_of_cluster_df, linegraph_data = analysis.create_cluster_indi(components, alldata_df, word_bank, min_year, max_year, lda_model, dictionary)
     # analysis.create_cluster_sum(list_of_cluster_df, linegraph_data, min_year, max_year)
 
     return 0
+
+def analysis_of_authors(alldata_df, min_strength, cluster_algo, savepath, progress):
+    for author_network_type, network_name in author_network.AUTHOR_NETWORKS.items():
+        network_savepath = savepath + "/" + network_name
+        if not os.path.exists(network_savepath):
+            os.makedirs(network_savepath)
+        app.update_output_message("Creating " + network_name + " network")
+        app.master.update()
+        clusters, authors_df = analysis.create_author_network_file(alldata_df, author_network_type, min_strength,
+                                                                   cluster_algo, network_savepath)
+        app.update_output_message(network_name + ": " + str(len(authors_df.index)) + " authors in "
+                                  + str(len(clusters)) + " clusters")
+        app.progress_bar["value"] += (progress/len(author_network.AUTHOR_NETWORKS))
+        app.master.update()
+    return 0
+
+def analysis_of_clusters(components, alldata_df, min_year, max_year, savepath, progress, corpus_model=None,
+                         corpus_tfidf=None, topic_assignments=None, k_selection=topic_model.FULL_SWEEP):
+    topic_model.corpus_tokens(alldata_df, n_process=os.cpu_count() or 1)      # every cluster then reads the token cache
+    cluster_names = textminer_nlp.create_cluster_names(components, alldata_df, 2, "Title", "Abstract")
+    clusters = {}
+    linegraph_data_dict = {}
+    for x in range(0, len(components)):
+        print("Component " + str(x + 1) + "/" + str(len(components)) + "Starting")
+        cluster = components[x]
+        cluster_no = x + 1
+        cluster_name = cluster_names[x]
+        
+        app.update_output_message("Analysing Component " + str(cluster_no) + ": " + cluster_name)
+        app.progress_bar["value"] += (progress/len(components))
+        app.master.update()
+
+        
+        cluster_df, linegraph_data = analysis.create_cluster_indi(cluster, cluster_no, cluster_name,
+                                                                    alldata_df, min_year, max_year, savepath, corpus_model,
+                                                                    corpus_tfidf, topic_assignments, k_selection)
+        clusters[cluster_name] = cluster_df
+        linegraph_data_dict[cluster_name] = linegraph_data
+
+    combined_df = pd.concat(clusters)
+    combineddata_path = savepath + "/combined_data.xlsx"
+    combined_df.to_excel(combineddata_path, index=False)
+    analysis.create_cluster_sum(clusters, linegraph_data_dict, min_year, max_year, savepath)
+    return 0
     
 
-root = tk.Tk()
-app = Application(master=root)
-app.mainloop()
+if __name__ == "__main__":      # guarded so analysis worker processes do not open the GUI
+    root = tk.Tk()
+    app = Application(master=root)
+    app.mainloop()
@@ -0,0 +1,82 @@
+import os
+import sys
+
+import networkx as nx
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))     # analysis.py and lib/
+
+SUBJECTS = [("Neural networks", "neural networks learning training layers gradient"),
+            ("Citation analysis", "citation coupling bibliometrics references journals"),
+            ("Protein folding", "protein folding structure molecules biology")]
+ALLDATA_COLUMNS = ['Title', 'Year', 'Abstract', 'Authors', 'Authors_id', 'Hyperlink', 'Citedby_id', 'No_of_citations',
+                   'Result_id', "Type of Pub", "Citing_pubs_id", "Cites"]
+
+
+def publication(result_id, root=False, citing_pubs_id="", cites="", year=2015, title=None, abstract=None,
+                authors="Unavaliable", authors_id="Unavaliable", no_of_citations=0):
+    ''' One row of alldata.xlsx, see serpg.add_to_df(...)
+    '''
+
+    return [title if title is not None else "Title of " + result_id, year,
+            abstract if abstract is not None else "Abstract of " + result_id, authors, authors_id,
+            "https://example.org/" + result_id, "", no_of_citations, result_id,
+            "Root Publication" if root else "Citing Publication", citing_pubs_id, cites]
+
+
+def alldata(rows):
+    return pd.DataFrame(rows, columns=ALLDATA_COLUMNS)
+
+
+@pytest.fixture
+def citation_df():
+    ''' Three root publications and the publications citing them. R1 also cites R3
+    '''
+
+    return alldata([publication("R1", root=True, citing_pubs_id="A;B;C", cites="R3", year=2012),
+                    publication("R2", root=True, citing_pubs_id="B;C;D", year=2013),
+                    publication("R3", root=True, citing_pubs_id="C;R1", year=2010),
+                    publication("A", cites="R1", year=2016),
+                    publication("B", cites="R1;R2", year=2017),
+                    publication("C", cites="R1;R2;R3", year=2018),
+                    publication("D", cites="R2;B", year=2019)])
+
+
+def corpus_df(no_of_pubs, prefix="P"):
+    ''' Publications on the SUBJECTS in turn, numbered in their titles
+    '''
+
+    rows = []
+    for x in range(0, no_of_pubs):
+        title, abstract = SUBJECTS[x % len(SUBJECTS)]
+        rows.append(publication(prefix + str(x), title=title + " study " + str(x), abstract=abstract))
+    return alldata(rows)
+
+
+def edge_pairs(ids, weights):
+    ''' Every edge of a symmetric weight matrix once, keyed by the sorted pair of ids
+    '''
+
+    import lib.citation_network as citation_network
+
+    return {tuple(sorted((u, v))): weight for u, v, weight in citation_network.to_edge_list(ids, weights)}
+
+
+def weighted_graph():
+    ''' The weighted les miserables graph with a publication without edges
+    '''
+
+    graph = nx.les_miserables_graph()
+    graph.add_node("orphan")
+    return graph
+
+
+@pytest.fixture
+def no_plots(monkeypatch):
+    ''' Skips the elbow plots of the topic count
+    '''
+
+    import lib.topic_model as topic_model
+
+    monkeypatch.setattr(topic_model, "_plot_elbow", lambda iters, sse, knee: None)
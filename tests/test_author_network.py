@@ -0,0 +1,57 @@
+import pytest
+
+import lib.author_network as author_network
+import lib.citation_network as citation_network
+from conftest import alldata, edge_pairs, publication
+
+
+@pytest.fixture
+def authored_df():
+    ''' Ann and Bob wrote the root R1, Cat the root R2, Dan wrote A with Ann and B with Bob
+    '''
+
+    return alldata([publication("R1", root=True, citing_pubs_id="A;B", year=2012, authors="Ann;Bob",
+                                authors_id="a1;b1", no_of_citations=10),
+                    publication("R2", root=True, citing_pubs_id="B;C", year=2014, authors="Cat", authors_id="c1",
+                                no_of_citations=3),
+                    publication("A", cites="R1", year=2015, authors="Ann;Dan", authors_id="a1;d1", no_of_citations=2),
+                    publication("B", cites="R1;R2", year=2016, authors="Bob;Dan", authors_id="b1;d1",
+                                no_of_citations=1),
+                    publication("C", cites="R2", year=2017)])
+
+
+def test_incidence_matrix(authored_df):
+    result_ids, citation_matrix = citation_network.create_citation_matrix(authored_df)
+    author_ids, author_names, incidence = author_network.create_incidence_matrix(authored_df, result_ids)
+    assert author_ids == ["a1", "b1", "c1", "d1"]
+    assert author_names == ["Ann", "Bob", "Cat", "Dan"]
+    assert incidence.toarray().tolist() == [[1, 1, 0, 0], [0, 0, 1, 0], [1, 0, 0, 1], [0, 1, 0, 1], [0, 0, 0, 0]]
+
+
+def test_co_authorship_by_hand(authored_df):
+    result_ids, citation_matrix = citation_network.create_citation_matrix(authored_df)
+    author_ids, author_names, incidence = author_network.create_incidence_matrix(authored_df, result_ids)
+    assert edge_pairs(author_ids, author_network.co_authorship(incidence)) == \
+        {("a1", "b1"): 1, ("a1", "d1"): 1, ("b1", "d1"): 1}
+
+
+def test_author_coupling_by_hand(authored_df):
+    result_ids, citation_matrix = citation_network.create_citation_matrix(authored_df)
+    author_ids, author_names, incidence = author_network.create_incidence_matrix(authored_df, result_ids)
+    weights = author_network.author_coupling(incidence, citation_matrix)
+    assert (weights != weights.T).nnz == 0
+    assert edge_pairs(author_ids, weights) == {("a1", "b1"): 1, ("a1", "d1"): 2, ("b1", "d1"): 3}
+
+
+def test_author_metrics_by_hand(authored_df):
+    result_ids, citation_matrix = citation_network.create_citation_matrix(authored_df)
+    author_ids, author_names, incidence = author_network.create_incidence_matrix(authored_df, result_ids)
+    metrics_df = author_network.author_metrics(authored_df, result_ids, author_ids, author_names, incidence)
+
+    assert list(metrics_df.columns) == author_network.METRIC_COLUMNS
+    assert metrics_df.drop(columns="Mean Citations").values.tolist() == [
+        ["a1", "Ann", 2, 12, 2, 2012, 2015, 2],
+        ["b1", "Bob", 2, 11, 1, 2012, 2016, 2],
+        ["c1", "Cat", 1, 3, 1, 2014, 2014, 0],
+        ["d1", "Dan", 2, 3, 1, 2015, 2016, 2]]
+    assert metrics_df["Mean Citations"].tolist() == [6.0, 5.5, 3.0, 1.5]
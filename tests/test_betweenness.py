@@ -0,0 +1,46 @@
+import networkx as nx
+import pytest
+
+import lib.betweenness as betweenness
+import lib.csr_graph as csr_graph
+
+
+def _assert_same_betweenness(result, expected):
+    assert len(result) == len(expected)
+    for (u, v), value in expected.items():
+        edge = (u, v) if (u, v) in result else (v, u)
+        assert result[edge] == pytest.approx(value)
+
+
+def test_edge_betweenness_matches_networkx_in_process():
+    graph = nx.karate_club_graph()
+    with betweenness.ParallelEdgeBetweenness(processes=1) as pool:
+        result = pool.edge_betweenness(graph)
+    _assert_same_betweenness(result, nx.edge_betweenness_centrality(graph))
+
+
+def test_edge_betweenness_matches_networkx_in_parallel():
+    graph = nx.gnm_random_graph(60, 150, seed=1)
+    with betweenness.ParallelEdgeBetweenness(processes=2, min_parallel_nodes=0) as pool:
+        result = pool.edge_betweenness(graph)
+        again = pool.edge_betweenness(graph, normalized=False)      # the pool is reused between calls
+    _assert_same_betweenness(result, nx.edge_betweenness_centrality(graph))
+    _assert_same_betweenness(again, nx.edge_betweenness_centrality(graph, normalized=False))
+
+
+def test_edge_betweenness_of_csr_graph():
+    graph = nx.les_miserables_graph()
+    graph = nx.Graph(graph.edges())         # unweighted
+    result = betweenness.edge_betweenness_centrality(csr_graph.CSRGraph.from_networkx(graph), processes=1)
+    _assert_same_betweenness(result, nx.edge_betweenness_centrality(graph))
+
+
+def test_most_valuable_edge_is_the_bridge():
+    graph = nx.barbell_graph(5, 0)
+    with betweenness.ParallelEdgeBetweenness(processes=1) as pool:
+        assert set(pool.most_valuable_edge(graph)) == {4, 5}
+
+
+def test_graph_without_edges():
+    graph = nx.empty_graph(3)
+    assert betweenness.edge_betweenness_centrality(graph, processes=1) == {}
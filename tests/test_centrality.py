@@ -0,0 +1,64 @@
+import networkx as nx
+import numpy as np
+import pytest
+from scipy import sparse
+
+import analysis
+import lib.centrality as centrality
+import lib.csr_graph as csr_graph
+from conftest import alldata, publication, weighted_graph
+
+
+def _by_node(csr, values):
+    return dict(zip(csr.result_ids, values.tolist()))
+
+
+def test_pagerank_matches_networkx():
+    graph = weighted_graph()
+    csr = csr_graph.CSRGraph.from_networkx(graph)
+    rank = centrality.pagerank(csr, tol=1e-10)
+    expected = nx.pagerank(graph, weight="weight", tol=1e-10)
+    assert rank.sum() == pytest.approx(1.0)
+    assert _by_node(csr, rank) == pytest.approx(expected, abs=1e-6)
+
+
+def test_eigenvector_centrality_matches_networkx():
+    graph = nx.les_miserables_graph()
+    csr = csr_graph.CSRGraph.from_networkx(graph)
+    values = centrality.eigenvector_centrality(csr, tol=1e-10)
+    expected = nx.eigenvector_centrality(graph, weight="weight", tol=1e-10, max_iter=1000)
+    assert np.linalg.norm(values) == pytest.approx(1.0)
+    assert _by_node(csr, values) == pytest.approx(expected, abs=1e-5)
+
+
+def test_core_number_matches_networkx():
+    graph = nx.disjoint_union(nx.les_miserables_graph(), nx.complete_graph(6))
+    graph.add_node("orphan")
+    csr = csr_graph.CSRGraph.from_networkx(graph)
+    assert _by_node(csr, centrality.core_number(csr)) == nx.core_number(graph)
+
+
+@pytest.mark.parametrize("graph", [nx.path_graph(200000), nx.balanced_tree(3, 9),
+                                   nx.gnm_random_graph(2000, 20000, seed=1)])
+def test_core_number_of_long_chains_and_trees(graph):
+    csr = csr_graph.CSRGraph.from_networkx(graph)       # one peeling round per node of a chain before
+    assert _by_node(csr, centrality.core_number(csr)) == nx.core_number(graph)
+
+
+def test_empty_graph():
+    csr = csr_graph.CSRGraph.from_matrix([], sparse.csr_matrix((0, 0)))
+    assert len(centrality.pagerank(csr)) == 0
+    assert len(centrality.eigenvector_centrality(csr)) == 0
+    assert len(centrality.core_number(csr)) == 0
+
+
+def test_add_centrality_leaves_outside_publications_empty():
+    graph = nx.Graph()
+    graph.add_weighted_edges_from([("A", "B", 2), ("B", "C", 1)])
+    alldata_df = alldata([publication("A"), publication("B"), publication("C"), publication("D")])
+    alldata_df = analysis.add_centrality(alldata_df, csr_graph.CSRGraph.from_networkx(graph))
+
+    assert list(alldata_df.columns[-len(centrality.CENTRALITY_COLUMNS):]) == centrality.CENTRALITY_COLUMNS
+    assert alldata_df["Weighted Degree"].tolist()[:3] == [2, 3, 1]
+    assert alldata_df["K-Core"].tolist()[:3] == [1, 1, 1]
+    assert alldata_df.loc[3, centrality.CENTRALITY_COLUMNS].isna().all()
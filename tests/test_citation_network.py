@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from scipy import sparse
+
+import lib.citation_network as citation_network
+from conftest import edge_pairs
+
+
+def test_citation_matrix(citation_df):
+    result_ids, citation_matrix = citation_network.create_citation_matrix(citation_df)
+    assert result_ids == ["R1", "R2", "R3", "A", "B", "C", "D"]
+    cites = {(result_ids[x], result_ids[y]) for x, y in zip(*citation_matrix.nonzero())}
+    assert cites == {("A", "R1"), ("B", "R1"), ("C", "R1"), ("B", "R2"), ("C", "R2"), ("D", "R2"),
+                     ("C", "R3"), ("R1", "R3")}
+
+
+def test_bibliographic_coupling_by_hand(citation_df):
+    result_ids, citation_matrix = citation_network.create_citation_matrix(citation_df)
+    weights = citation_network.bibliographic_coupling(citation_matrix)
+    assert (weights != weights.T).nnz == 0
+    assert edge_pairs(result_ids, weights) == {("A", "B"): 1, ("A", "C"): 1, ("B", "C"): 2, ("B", "D"): 1,
+                                               ("C", "D"): 1, ("C", "R1"): 2, ("A", "R1"): 1, ("B", "R1"): 1,
+                                               ("B", "R2"): 1, ("C", "R2"): 1, ("D", "R2"): 1, ("C", "R3"): 1,
+                                               ("R1", "R3"): 1}
+
+
+def test_co_citation_by_hand(citation_df):
+    networks = citation_network.create_networks(citation_df, [citation_network.CO_CITATION])
+    result_ids, weights, occurrences = networks[citation_network.CO_CITATION]
+    assert result_ids == ["R1", "R2", "R3"]
+    assert edge_pairs(result_ids, weights) == {("R1", "R2"): 2, ("R1", "R3"): 1, ("R2", "R3"): 1}
+    assert occurrences.tolist() == [3, 3, 2]
+
+
+def test_direct_citation_by_hand(citation_df):
+    networks = citation_network.create_networks(citation_df, [citation_network.DIRECT_CITATION])
+    result_ids, weights, occurrences = networks[citation_network.DIRECT_CITATION]
+    assert edge_pairs(result_ids, weights) == {("A", "R1"): 1, ("B", "R1"): 1, ("B", "R2"): 1, ("C", "R1"): 1,
+                                               ("C", "R2"): 1, ("C", "R3"): 1, ("D", "R2"): 1, ("B", "D"): 1,
+                                               ("R1", "R3"): 1}
+
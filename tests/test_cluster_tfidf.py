@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+import lib.topic_model as topic_model
+from conftest import alldata, publication
+
+WORDS = ["network", "citation", "protein", "cluster", "journal"]
+
+
+def _corpus_df():
+    rows = []
+    for x in range(0, 12):
+        words = [WORDS[(x + y) % len(WORDS)] for y in range(0, 3)]
+        rows.append(publication("P" + str(x), title=" ".join(words), abstract=" ".join(reversed(words))))
+    return alldata(rows)
+
+
+def test_corpus_tfidf_equals_one_fit():
+    df = _corpus_df()
+    row_index, matrix = topic_model.fit_corpus_tfidf(pd.concat([df, df.iloc[[0]]]))      # P0 listed twice
+    assert row_index == {"P" + str(x): x for x in range(0, 12)}
+    tfidf = TfidfVectorizer(min_df=3, max_df=0.95, max_features=8000, stop_words='english')
+    expected = tfidf.fit_transform([title + " " + abstract for title, abstract in zip(df["Title"], df["Abstract"])])
+    assert np.allclose(matrix.toarray(), expected.toarray())
+
+
+def test_cluster_rows_in_cluster_order():
+    df = _corpus_df()
+    corpus_tfidf = topic_model.fit_corpus_tfidf(df)
+    cluster_df = df.iloc[[7, 2, 9]]
+    rows = topic_model.cluster_tfidf(corpus_tfidf, cluster_df)
+    assert rows.shape == (3, corpus_tfidf[1].shape[1])
+    assert np.array_equal(rows.toarray(), corpus_tfidf[1].toarray()[[7, 2, 9]])
+
+
+def test_sweep_uses_the_corpus_rows(monkeypatch):
+    df = _corpus_df()
+    corpus_tfidf = topic_model.fit_corpus_tfidf(df)
+    swept = []
+    monkeypatch.setattr(topic_model, "find_optimal_clusters", lambda data, max_k: swept.append(data) or 1)
+    cluster_df = df.iloc[4:12]
+    topic_model.get_optimal_cluster_value(cluster_df, corpus_tfidf=corpus_tfidf)
+    assert np.array_equal(swept[0].toarray(), corpus_tfidf[1].toarray()[4:12])
@@ -0,0 +1,42 @@
+import networkx as nx
+
+import analysis
+
+
+def _cliques(sizes):
+    graph = nx.Graph()
+    start = 0
+    for size in sizes:
+        nodes = ["p{}".format(x) for x in range(start, start + size)]
+        graph.add_edges_from((u, v, {"weight": 1}) for x, u in enumerate(nodes) for v in nodes[x + 1:])
+        start += size
+    return graph
+
+
+def test_every_clique_is_a_cluster():
+    graph = _cliques([5, 4, 3, 2])
+    graph.add_node("orphan")
+    for cluster_algo in (0, 1, 2):
+        clusters = analysis._create_clusters_by_component(graph, cluster_algo, processes=2)
+        assert [len(cluster) for cluster in clusters] == [5, 4, 3, 2, 1]
+        assert sorted(node for cluster in clusters for node in cluster) == sorted(graph.nodes())
+
+
+def test_parallel_and_serial_clusters_agree():
+    graph = nx.disjoint_union_all([nx.karate_club_graph(), nx.davis_southern_women_graph(),
+                                   nx.florentine_families_graph()])
+    nx.set_edge_attributes(graph, 1, "weight")
+    serial = analysis._create_clusters_by_component(graph, 0, processes=1)
+    parallel = analysis._create_clusters_by_component(graph, 0, processes=3)
+    assert serial == parallel
+
+
+def test_component_clusters_match_whole_graph_clusters():
+    graph = nx.disjoint_union(nx.karate_club_graph(), nx.karate_club_graph())
+    expected = nx.algorithms.community.greedy_modularity_communities(nx.karate_club_graph())
+    clusters = analysis._create_clusters_by_component(graph, 0, processes=2)
+    assert sorted(len(cluster) for cluster in clusters) == sorted([len(cluster) for cluster in expected] * 2)
+
+
+def test_order_clusters():
+    assert analysis._order_clusters([("b",), ("d", "c"), ("a",)]) == [("c", "d"), ("a",), ("b",)]
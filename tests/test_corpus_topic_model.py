@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+import lib.topic_model as topic_model
+from conftest import corpus_df
+
+PLOT_ELBOW = topic_model._plot_elbow
+pytestmark = pytest.mark.usefixtures("no_plots")
+
+
+def test_sweep_capped_by_max_cluster(monkeypatch):
+    swept = []
+    monkeypatch.setattr(topic_model, "find_optimal_clusters", lambda data, max_k: swept.append(max_k) or 2)
+    df = corpus_df(40)
+    assert topic_model.get_optimal_cluster_value(df) == 2
+    assert topic_model.get_optimal_cluster_value(df, max_cluster=4) == 2
+    assert topic_model.get_optimal_cluster_value(df, max_cluster=50) == 2
+    assert swept == [10, 4, 10]
+
+
+def test_corpus_model_topics_capped(monkeypatch):
+    calls = []
+    monkeypatch.setattr(topic_model, "get_optimal_cluster_value",
+                        lambda df, k_selection, corpus_tfidf=None, max_cluster=None: calls.append(max_cluster) or 3)
+    ldamodel, dictionary = topic_model.train_corpus_model(corpus_df(12), workers=1, passes=1)
+    assert calls == [topic_model.MAX_TOPICS]
+    assert ldamodel.num_topics == 3
+
+
+def test_superseded_corpus_models_pruned(tmp_path):
+    folder = str(tmp_path)
+    for x in range(0, topic_model.MAX_CORPUS_MODELS + 1):
+        topic_model.corpus_topic_model(corpus_df(12, prefix="V" + str(x)), folder, workers=1)
+    files = os.listdir(folder)
+    models = {file_name.split(".")[0] for file_name in files}
+    assert len(models) == topic_model.MAX_CORPUS_MODELS
+    latest = topic_model.CORPUS_MODEL_PREFIX + topic_model._corpus_key(corpus_df(12, prefix="V3")) + "_k0"
+    assert latest in models
+    oldest = topic_model.CORPUS_MODEL_PREFIX + topic_model._corpus_key(corpus_df(12, prefix="V0")) + "_k0"
+    assert oldest not in models
+
+
+def test_prune_keeps_the_online_model_and_recently_used(tmp_path):
+    folder = str(tmp_path)
+    names = ["lda_old.model", "lda_old.model.state", "lda_old.dict", "lda_new.model", "lda_new.dict",
+             topic_model.ONLINE_MODEL_FILE + ".model", topic_model.ONLINE_MODEL_FILE + ".pkl", "token_cache.pkl"]
+    for x, name in enumerate(names):
+        path = os.path.join(folder, name)
+        open(path, "w").close()
+        os.utime(path, (1000 + x, 1000 + x))
+    assert topic_model._prune_corpus_models(folder, keep=1) == 1
+    assert sorted(os.listdir(folder)) == sorted(names[3:])
+
+
+def test_corpus_model_per_topic_selection(tmp_path, monkeypatch):
+    trained = []
+    train = topic_model.train_corpus_model
+    monkeypatch.setattr(topic_model, "train_corpus_model",
+                        lambda df, workers, corpus_tfidf, k_selection, plot_path: trained.append(k_selection) or
+                        train(df, num_topics=2, workers=1, passes=1))
+    df = corpus_df(12)
+    topic_model.corpus_topic_model(df, str(tmp_path), k_selection=topic_model.FAST_SWEEP)
+    topic_model.corpus_topic_model(df, str(tmp_path), k_selection=topic_model.FAST_SWEEP)
+    topic_model.corpus_topic_model(df, str(tmp_path), k_selection=topic_model.COHERENCE_SELECTION)
+    assert trained == [topic_model.FAST_SWEEP, topic_model.COHERENCE_SELECTION]
+
+
+def test_topic_count_plot_saved_and_closed(tmp_path, monkeypatch):
+    import matplotlib.pyplot as plt
+
+    monkeypatch.setattr(topic_model, "_plot_elbow", PLOT_ELBOW)
+    plt.close("all")
+    plot_path = str(tmp_path / "elbow_method.png")
+    topic_model.corpus_topic_model(corpus_df(12), str(tmp_path), workers=1, plot_path=plot_path)
+    assert os.path.exists(plot_path)
+    assert plt.get_fignums() == []
+    topic_model.train_corpus_model(corpus_df(12), workers=1, passes=1)
+    assert plt.get_fignums() == []
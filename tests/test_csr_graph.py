@@ -0,0 +1,90 @@
+import networkx as nx
+import numpy as np
+import pytest
+from networkx.algorithms import community
+
+import lib.csr_graph as csr_graph
+from conftest import weighted_graph
+
+
+def test_round_trip_through_networkx():
+    graph = weighted_graph()
+    csr = csr_graph.CSRGraph.from_networkx(graph)
+    assert csr.number_of_nodes() == graph.number_of_nodes()
+    assert csr.number_of_edges() == graph.number_of_edges()
+    back = csr.to_networkx()
+    assert set(back.nodes()) == set(graph.nodes())
+    assert {frozenset((u, v)): w for u, v, w in back.edges(data="weight")} == \
+        {frozenset((u, v)): w for u, v, w in graph.edges(data="weight")}
+
+
+def test_degree_and_neighbors():
+    graph = weighted_graph()
+    csr = csr_graph.CSRGraph.from_networkx(graph)
+    weighted = dict(graph.degree(weight="weight"))
+    assert csr.degree().tolist() == [weighted[node] for node in csr.result_ids]
+    assert csr.degree(weighted=False).tolist() == [graph.degree(node) for node in csr.result_ids]
+    x = csr.result_ids.index("Valjean")
+    neighbours, weights = csr.neighbors(x)
+    assert {csr.result_ids[y]: w for y, w in zip(neighbours.tolist(), weights.tolist())} == \
+        {node: data["weight"] for node, data in graph["Valjean"].items()}
+
+
+def test_components_and_subgraph():
+    graph = nx.disjoint_union(nx.path_graph(4), nx.cycle_graph(3))
+    csr = csr_graph.CSRGraph.from_networkx(graph)
+    labels = csr.connected_components()
+    assert len(set(labels.tolist())) == 2
+    subgraph = csr.subgraph(np.flatnonzero(labels == labels[0]))
+    assert subgraph.result_ids == [0, 1, 2, 3]
+    assert subgraph.number_of_edges() == 3
+
+
+def test_saved_graph_is_memory_mapped(tmp_path):
+    csr = csr_graph.CSRGraph.from_networkx(nx.relabel_nodes(weighted_graph(), str))
+    csr.save(str(tmp_path / "graph"))
+    loaded = csr_graph.CSRGraph.load(str(tmp_path / "graph"))
+    assert isinstance(loaded.indices, np.memmap)
+    assert loaded.result_ids == csr.result_ids
+    assert loaded.edge_list() == csr.edge_list()
+
+
+def test_modularity_matches_networkx():
+    graph = weighted_graph()
+    csr = csr_graph.CSRGraph.from_networkx(graph)
+    communities = community.greedy_modularity_communities(graph, weight="weight")
+    labels = np.zeros(csr.number_of_nodes(), dtype=np.int64)
+    for label, members in enumerate(communities):
+        labels[[csr.result_ids.index(node) for node in members]] = label
+    assert csr_graph.modularity(csr, labels) == pytest.approx(community.modularity(graph, communities))
+
+
+def test_louvain_finds_the_cliques():
+    graph = nx.ring_of_cliques(6, 5)
+    csr = csr_graph.CSRGraph.from_networkx(graph)
+    labels = csr_graph.louvain(csr)
+    clusters = csr_graph.clusters_from_labels(csr.result_ids, labels)
+    assert sorted(map(sorted, clusters)) == [list(range(x, x + 5)) for x in range(0, 30, 5)]
+
+
+def test_louvain_modularity_close_to_networkx():
+    graph = weighted_graph()
+    csr = csr_graph.CSRGraph.from_networkx(graph)
+    labels = csr_graph.louvain(csr)
+    expected = community.modularity(graph, community.louvain_communities(graph, weight="weight", seed=0))
+    assert csr_graph.modularity(csr, labels) >= expected - 0.02
+
+
+def test_louvain_starts_from_initial_labels():
+    graph = nx.ring_of_cliques(4, 6)
+    csr = csr_graph.CSRGraph.from_networkx(graph)
+    labels = csr_graph.louvain(csr)
+    initial = labels.copy()
+    initial[0] = -1                 # a new publication
+    again = csr_graph.louvain(csr, initial_labels=initial)
+    assert csr_graph.modularity(csr, again) == pytest.approx(csr_graph.modularity(csr, labels))
+
+
+def test_louvain_without_edges():
+    csr = csr_graph.CSRGraph.from_networkx(nx.empty_graph(4))
+    assert csr_graph.louvain(csr).tolist() == [0, 1, 2, 3]
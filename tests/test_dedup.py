@@ -0,0 +1,44 @@
+import lib.dedup as dedup
+from conftest import alldata, publication
+
+TITLE = "Deep learning for bibliographic coupling of scientific publications"
+
+
+def test_normalize_title():
+    assert dedup.normalize_title("  Deep-Learning:  for  CITATION networks! ") == "deep learning for citation networks"
+    assert dedup.normalize_title(None) == ""
+
+
+def test_finds_preprint_and_keeps_root():
+    alldata_df = alldata([publication("P", title=TITLE + ".", year=2019, authors="A Smith;B Jones"),
+                          publication("R", root=True, title=TITLE, year=2020, authors="A. Smith", no_of_citations=5),
+                          publication("X", title="A survey of topic models", year=2020)])
+    assert dedup.find_near_duplicates(alldata_df) == {"P": "R"}
+
+
+def test_needs_close_years_and_a_shared_author():
+    alldata_df = alldata([publication("P", title=TITLE, year=2015, authors="A Smith"),
+                          publication("Q", title=TITLE, year=2020, authors="A Smith"),
+                          publication("S", title=TITLE, year=2020, authors="C Brown")])
+    assert dedup.find_near_duplicates(alldata_df) == {}
+
+
+def test_merge_near_duplicates_redirects_references():
+    alldata_df = alldata([publication("R", root=True, citing_pubs_id="A;P", title=TITLE, no_of_citations=7),
+                          publication("P", root=True, citing_pubs_id="B", title=TITLE, no_of_citations=3),
+                          publication("A", cites="R"),
+                          publication("B", cites="P")])
+    merged_df, duplicates = dedup.merge_near_duplicates(alldata_df)
+
+    assert duplicates == {"P": "R"}
+    assert merged_df["Result_id"].tolist() == ["R", "A", "B"]
+    kept = merged_df.iloc[0]
+    assert kept["Citing_pubs_id"] == "A;B"
+    assert kept["No_of_citations"] == 7
+    assert merged_df.loc[merged_df["Result_id"] == "B", "Cites"].item() == "R"
+
+
+def test_merge_without_duplicates_keeps_the_table(citation_df):
+    merged_df, duplicates = dedup.merge_near_duplicates(citation_df)
+    assert duplicates == {}
+    assert merged_df is citation_df
@@ -0,0 +1,109 @@
+import networkx as nx
+import pytest
+from networkx.algorithms import community
+
+import lib.dendrogram as dendrogram
+
+
+def _two_communities():
+    graph = nx.barbell_graph(5, 1)
+    nx.set_edge_attributes(graph, 1, "weight")
+    return graph
+
+
+def test_level_modularity_matches_networkx():
+    graph = nx.karate_club_graph()
+    result = dendrogram.girvan_newman_dendrogram(graph, full=True)
+    assert result.number_of_levels() > 1
+    for level in range(0, result.number_of_levels()):
+        assert result.modularity[level] == pytest.approx(community.modularity(graph, result.clusters(level)))
+
+
+def test_levels_follow_networkx_girvan_newman():
+    graph = nx.Graph(nx.karate_club_graph().edges())        # unweighted, like the networkx betweenness
+    result = dendrogram.girvan_newman_dendrogram(graph, full=True)
+    for level, expected in zip(range(1, 4), community.girvan_newman(graph)):     # deeper levels break ties differently
+        assert sorted(map(sorted, result.clusters(level))) == sorted(map(sorted, expected))
+
+
+def test_stops_after_modularity_drops():
+    graph = _two_communities()
+    result = dendrogram.girvan_newman_dendrogram(graph)
+    best = result.clusters()
+    assert sorted(len(cluster) for cluster in best) == [5, 6]
+    assert result.modularity[-1] < result.modularity[result.best_level()]
+
+
+def test_merged_dendrogram_modularity_matches_networkx():
+    first = _two_communities()
+    second = nx.relabel_nodes(nx.karate_club_graph(), lambda node: "k{}".format(node))
+    graph = nx.union(first, second)
+    merged = dendrogram.merge_dendrograms([dendrogram.girvan_newman_dendrogram(first, full=True),
+                                           dendrogram.girvan_newman_dendrogram(second, full=True),
+                                           dendrogram.single_community(nx.Graph([("a", "b")]))])
+    graph.add_edge("a", "b", weight=1)
+    assert sorted(merged.nodes, key=str) == sorted(graph.nodes(), key=str)
+    for level in range(0, merged.number_of_levels()):
+        assert merged.modularity[level] == pytest.approx(community.modularity(graph, merged.clusters(level)))
+    assert merged.modularity[merged.best_level()] == pytest.approx(max(merged.modularity))
+
+
+def test_saved_dendrogram_gives_the_same_levels(tmp_path):
+    graph = nx.relabel_nodes(nx.karate_club_graph(), str)      # the Result_id are saved as str
+    result = dendrogram.girvan_newman_dendrogram(graph, full=True)
+    path = str(tmp_path / "dendrogram.npz")
+    result.save(path, dendrogram.graph_key(graph))
+    loaded = dendrogram.load_dendrogram(path, dendrogram.graph_key(graph))
+    assert loaded.modularity == result.modularity
+    for level in range(0, result.number_of_levels()):
+        assert sorted(map(sorted, loaded.clusters(level))) == sorted(map(sorted, result.clusters(level)))
+    graph.remove_edge("0", "1")
+    assert dendrogram.load_dendrogram(path, dendrogram.graph_key(graph)) is None
+    assert dendrogram.load_dendrogram(str(tmp_path / "missing.npz")) is None
+
+
+def test_level_outside_the_hierarchy(tmp_path):
+    import analysis
+
+    graph = nx.relabel_nodes(_two_communities(), str)
+    clustering_dendrogram = analysis._load_or_create_dendrogram(graph, str(tmp_path), processes=1)
+    levels = clustering_dendrogram.number_of_levels()
+    assert analysis.load_clusters(str(tmp_path), levels - 1) == analysis._order_clusters(
+        clustering_dendrogram.clusters(levels - 1))
+    with pytest.raises(ValueError, match="from 0 to {}".format(levels - 1)):
+        analysis.load_clusters(str(tmp_path), levels)
+
+
+def test_full_hierarchy_keeps_the_early_stop_default():
+    graph = nx.karate_club_graph()
+    early = dendrogram.girvan_newman_dendrogram(graph)
+    result = dendrogram.girvan_newman_dendrogram(graph, full=True)
+    assert result.stop_level == early.stop_level == early.number_of_levels() - 1
+    assert result.number_of_levels() > early.number_of_levels()
+    assert result.modularity[:early.number_of_levels()] == early.modularity
+    assert result.best_level() == early.best_level()
+
+
+def test_merged_stop_level_keeps_the_early_levels():
+    first = _two_communities()
+    second = nx.relabel_nodes(nx.karate_club_graph(), lambda node: "k{}".format(node))
+    early = dendrogram.merge_dendrograms([dendrogram.girvan_newman_dendrogram(first),
+                                          dendrogram.girvan_newman_dendrogram(second)])
+    merged = dendrogram.merge_dendrograms([dendrogram.girvan_newman_dendrogram(first, full=True),
+                                           dendrogram.girvan_newman_dendrogram(second, full=True)])
+    assert merged.stop_level == early.number_of_levels() - 1
+    assert merged.modularity[:early.number_of_levels()] == pytest.approx(early.modularity)
+    assert merged.best_level() == early.best_level()
+    assert merged.number_of_levels() == len(merged.nodes) - 1      # down to single publications
+
+
+def test_finer_levels_are_saved(tmp_path):
+    import analysis
+
+    graph = nx.relabel_nodes(_two_communities(), str)
+    clustering_dendrogram = analysis._load_or_create_dendrogram(graph, str(tmp_path), processes=1)
+    levels = clustering_dendrogram.number_of_levels()
+    assert levels == graph.number_of_nodes()
+    assert len(analysis.load_clusters(str(tmp_path), levels - 1)) == graph.number_of_nodes()
+    assert analysis.load_clusters(str(tmp_path)) == analysis._order_clusters(clustering_dendrogram.clusters())
+    assert sorted(len(cluster) for cluster in analysis.load_clusters(str(tmp_path))) == [5, 6]
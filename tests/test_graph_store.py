@@ -0,0 +1,77 @@
+import os
+
+import networkx as nx
+import numpy as np
+
+import lib.csr_graph as csr_graph
+import lib.graph_store as graph_store
+
+
+def _graph():
+    return csr_graph.CSRGraph.from_networkx(nx.relabel_nodes(nx.karate_club_graph(), str))
+
+
+def test_saved_graph_loads_back(tmp_path):
+    folder = str(tmp_path)
+    key = graph_store.network_key("dataset", network_mode=0, min_strength=2)
+    assert graph_store.load_graph(folder, key) is None
+    graph_store.save_graph(folder, key, _graph())
+    loaded = graph_store.load_graph(folder, key)
+    assert loaded.result_ids == _graph().result_ids
+    assert loaded.edge_list() == _graph().edge_list()
+
+
+def test_network_key_depends_on_parameters_and_version(monkeypatch):
+    key = graph_store.network_key("dataset", network_mode=0, min_strength=2)
+    assert key == graph_store.network_key("dataset", min_strength=2, network_mode=0)
+    assert key != graph_store.network_key("dataset", network_mode=0, min_strength=3)
+    assert key != graph_store.network_key("other", network_mode=0, min_strength=2)
+    monkeypatch.setattr(graph_store, "STORE_VERSION", graph_store.STORE_VERSION + 1)
+    assert key != graph_store.network_key("dataset", network_mode=0, min_strength=2)
+
+
+def test_least_recently_used_networks_are_evicted(tmp_path, monkeypatch):
+    monkeypatch.setattr(graph_store, "MAX_STORED_NETWORKS", 2)
+    folder = str(tmp_path)
+    keys = [graph_store.network_key("dataset", min_strength=x) for x in range(0, 3)]
+    for age, key in enumerate(keys[:2]):
+        graph_store.save_graph(folder, key, _graph())
+        path = os.path.join(folder, "network_" + key + ".npz")
+        os.utime(path, (1000 + age, 1000 + age))
+    graph_store.load_graph(folder, keys[0])             # used again, now the most recent
+    graph_store.save_graph(folder, keys[2], _graph())
+    assert graph_store.load_graph(folder, keys[0]) is not None
+    assert graph_store.load_graph(folder, keys[1]) is None
+    assert graph_store.load_graph(folder, keys[2]) is not None
+
+
+def test_alldata_copy_is_versioned_and_evicted(tmp_path, citation_df, monkeypatch):
+    monkeypatch.setattr(graph_store, "MAX_STORED_DATASETS", 1)
+    alldata_file = str(tmp_path / "alldata.xlsx")
+    citation_df.to_excel(alldata_file, index=False)
+    folder = graph_store.store_path(alldata_file)
+    stale = os.path.join(folder, "alldata_" + graph_store.file_key(alldata_file) + ".pkl")    # an older format
+    citation_df.iloc[0:0].to_pickle(stale)
+    os.utime(stale, (1000, 1000))
+
+    alldata_df, dataset_key = graph_store.load_alldata(alldata_file)
+    assert not os.path.exists(stale)
+    assert alldata_df["Result_id"].tolist() == citation_df["Result_id"].tolist()
+    again, same_key = graph_store.load_alldata(alldata_file)
+    assert same_key == dataset_key
+    assert os.listdir(folder) == ["alldata_v{}_{}.pkl".format(graph_store.STORE_VERSION, dataset_key)]
+
+
+def test_coupling_state_of_another_version_is_ignored(tmp_path, citation_df, monkeypatch):
+    import lib.citation_network as citation_network
+
+    result_ids, citation_matrix = citation_network.create_citation_matrix(citation_df)
+    weights = citation_network.bibliographic_coupling(citation_matrix)
+    labels = np.zeros(len(result_ids), dtype=np.int64)
+    graph_store.save_coupling_state(str(tmp_path), citation_df, result_ids, citation_matrix, weights, labels)
+    alldata_df, loaded_ids, loaded_citations, loaded_weights, loaded_labels = graph_store.load_coupling_state(
+        str(tmp_path))
+    assert loaded_ids == result_ids
+    assert (loaded_weights != weights).nnz == 0
+    monkeypatch.setattr(graph_store, "STORE_VERSION", graph_store.STORE_VERSION + 1)
+    assert graph_store.load_coupling_state(str(tmp_path)) is None
@@ -0,0 +1,68 @@
+import pandas as pd
+import pytest
+
+import analysis
+import lib.citation_network as citation_network
+from conftest import alldata, edge_pairs, publication
+
+
+@pytest.fixture
+def delta_df():
+    ''' R2 gains the new citing publication E and the new root R4 is cited by A and E
+    '''
+
+    return alldata([publication("R2", root=True, citing_pubs_id="B;C;D;E", year=2013),
+                    publication("R4", root=True, citing_pubs_id="A;E", year=2014),
+                    publication("E", cites="R2;R4", year=2020)])
+
+
+def test_update_equals_full_rebuild(citation_df, delta_df):
+    result_ids, citation_matrix = citation_network.create_citation_matrix(citation_df)
+    weights = citation_network.bibliographic_coupling(citation_matrix)
+    alldata_df, result_ids, updated_matrix, changed_roots = citation_network.update_citation_matrix(
+        result_ids, citation_matrix, citation_df, delta_df)
+    updated = citation_network.update_bibliographic_coupling(weights, citation_matrix, updated_matrix, changed_roots)
+
+    full_ids, full_matrix = citation_network.create_citation_matrix(alldata_df)
+    assert sorted(result_ids) == sorted(full_ids)
+    assert edge_pairs(result_ids, updated) == edge_pairs(full_ids, citation_network.bibliographic_coupling(full_matrix))
+
+
+def test_update_removes_dropped_citations(citation_df):
+    result_ids, citation_matrix = citation_network.create_citation_matrix(citation_df)
+    weights = citation_network.bibliographic_coupling(citation_matrix)
+    delta_df = alldata([publication("R1", root=True, citing_pubs_id="A", cites="R3", year=2012)])
+    alldata_df, result_ids, updated_matrix, changed_roots = citation_network.update_citation_matrix(
+        result_ids, citation_matrix, citation_df, delta_df)
+    updated = citation_network.update_bibliographic_coupling(weights, citation_matrix, updated_matrix, changed_roots)
+
+    full_ids, full_matrix = citation_network.create_citation_matrix(alldata_df)
+    assert edge_pairs(result_ids, updated) == edge_pairs(full_ids, citation_network.bibliographic_coupling(full_matrix))
+
+
+@pytest.mark.parametrize("cluster_algo", [0, 2])
+def test_update_network_file_equals_full_build(tmp_path, citation_df, delta_df, cluster_algo):
+    state_path = str(tmp_path / "state")
+    analysis.update_coupling_network_file(state_path, citation_df, 1, str(tmp_path), processes=1,
+                                          cluster_algo=cluster_algo)
+    alldata_df, clusters = analysis.update_coupling_network_file(state_path, delta_df, 1, str(tmp_path),
+                                                                 processes=1, cluster_algo=cluster_algo)
+    _, full_clusters = analysis.update_coupling_network_file(str(tmp_path / "full"), alldata_df, 1,
+                                                             str(tmp_path), processes=1, cluster_algo=cluster_algo)
+
+    assert sorted(alldata_df["Result_id"]) == ["A", "B", "C", "D", "E", "R1", "R2", "R3", "R4"]
+    assert sum(len(cluster) for cluster in clusters) == sum(len(cluster) for cluster in full_clusters)
+    if cluster_algo == 0:
+        assert sorted(sorted(cluster) for cluster in clusters) == sorted(sorted(cluster) for cluster in full_clusters)
+
+
+def test_cited_by_rows_of_the_data(citation_df, delta_df):
+    alldata_df = pd.concat([citation_df, delta_df.iloc[[1]]])      # R4 is cited by E, which is not in the data yet
+    root_cite_df = analysis.link_root_and_cite_pubs(alldata_df)
+    assert list(root_cite_df.columns) == analysis.NETWORK_COLUMNS + ["Cluster"]
+    assert list(zip(root_cite_df["Pub_1"], root_cite_df["Pub_2"])) == [
+        ("R1", "A"), ("R1", "B"), ("R1", "C"), ("R2", "B"), ("R2", "C"), ("R2", "D"), ("R3", "C"), ("R3", "R1"),
+        ("R4", "A")]
+    assert set(root_cite_df["Interaction"]) == {"Cited By"}
+    row = root_cite_df.iloc[-1]
+    assert (row["Pub_1_year"], row["Pub_2_year"], row["Pub_2_type"]) == (2014, 2016, "Citing Publication")
@@ -0,0 +1,59 @@
+import pytest
+
+import lib.lemma_cache as lemma_cache
+import lib.topic_model as topic_model
+
+
+@pytest.fixture(autouse=True)
+def empty_lemma_cache(monkeypatch):
+    monkeypatch.setattr(lemma_cache, "_lemmas", lemma_cache.OrderedDict())
+
+
+def test_lemma_computed_once_per_word_and_pos():
+    calls = []
+
+    def upper(word, pos):
+        calls.append((word, pos))
+        return word.upper()
+
+    assert lemma_cache.lemmatize("cats", lemma_cache.ANY_POS, upper) == "CATS"
+    assert lemma_cache.lemmatize("cats", lemma_cache.ANY_POS, upper) == "CATS"
+    assert lemma_cache.lemmatize("cats", lemma_cache.TAGGED_POS, upper) == "CATS"
+    assert calls == [("cats", lemma_cache.ANY_POS), ("cats", lemma_cache.TAGGED_POS)]
+
+
+def test_least_recently_used_lemma_is_evicted(monkeypatch):
+    monkeypatch.setattr(lemma_cache, "MAX_ENTRIES", 2)
+    lemma_cache.lemmatize("a", lemma_cache.ANY_POS, lambda word, pos: word)
+    lemma_cache.lemmatize("b", lemma_cache.ANY_POS, lambda word, pos: word)
+    lemma_cache.lemmatize("a", lemma_cache.ANY_POS, lambda word, pos: word)        # a is used again
+    lemma_cache.lemmatize("c", lemma_cache.ANY_POS, lambda word, pos: word)
+    assert list(lemma_cache._lemmas) == [("a", lemma_cache.ANY_POS), ("c", lemma_cache.ANY_POS)]
+
+
+def test_add_lemmas_respects_the_bound(monkeypatch):
+    monkeypatch.setattr(lemma_cache, "MAX_ENTRIES", 2)
+    assert lemma_cache.add_lemmas({"dogs": "dog", "cats": "cat", "mice": "mouse"}, lemma_cache.ANY_POS) == 2
+    assert dict(lemma_cache._lemmas) == {("cats", lemma_cache.ANY_POS): "cat", ("mice", lemma_cache.ANY_POS): "mouse"}
+
+
+def test_cached_lemmas_equal_wordnet():
+    words = ["libraries", "running", "studies", "analysis"]
+    assert [topic_model.get_lemma(word) for word in words] == [topic_model._morphy(word, "") for word in words]
+    assert [topic_model.get_lemma(word) for word in words] == ["library", "running", "study", "analysis"]
+
+
+def test_lemma_cache_round_trip(tmp_path, monkeypatch):
+    lemma_cache.lemmatize("studies", lemma_cache.ANY_POS, lambda word, pos: "study")
+    lemma_cache.save_lemma_cache(str(tmp_path))
+    monkeypatch.setattr(lemma_cache, "_lemmas", lemma_cache.OrderedDict())
+    assert lemma_cache.load_lemma_cache(str(tmp_path)) == 1
+    assert lemma_cache.lemmatize("studies", lemma_cache.ANY_POS, None) == "study"
+
+
+def test_load_trims_to_the_bound(tmp_path, monkeypatch):
+    lemma_cache.add_lemmas({"a": "a", "b": "b", "c": "c"}, lemma_cache.ANY_POS)
+    lemma_cache.save_lemma_cache(str(tmp_path))
+    monkeypatch.setattr(lemma_cache, "_lemmas", lemma_cache.OrderedDict())
+    monkeypatch.setattr(lemma_cache, "MAX_ENTRIES", 2)
+    assert lemma_cache.load_lemma_cache(str(tmp_path)) == 2
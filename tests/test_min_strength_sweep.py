@@ -0,0 +1,80 @@
+import networkx as nx
+import numpy as np
+import pytest
+from networkx.algorithms import community
+from scipy import sparse
+
+import analysis
+import lib.citation_network as citation_network
+
+
+def _weighted_edges():
+    ''' Three groups joined by weaker edges, so the components merge as the threshold drops
+    '''
+
+    edges = []
+    for group, weight in zip(range(0, 3), (3, 2, 4)):
+        nodes = ["g{}p{}".format(group, x) for x in range(0, 6)]
+        edges.extend((u, v, weight) for x, u in enumerate(nodes) for v in nodes[x + 1:x + 3])
+    edges.extend([("g0p0", "g1p0", 1), ("g1p5", "g2p5", 1), ("g0p2", "g0p5", 2)])
+    return edges
+
+
+def _standalone(result_ids, edges, min_strength, cluster_algo):
+    graph = nx.Graph()
+    graph.add_nodes_from(result_ids)
+    graph.add_weighted_edges_from(edge for edge in edges if edge[2] >= min_strength)
+    clusters = []
+    for nodes in nx.connected_components(graph):
+        component = graph.subgraph(nodes).copy()
+        if len(nodes) <= 2:
+            clusters.append(tuple(nodes))
+        else:
+            clusters.extend(analysis._component_function(cluster_algo)(component, 1))
+    return graph, clusters
+
+
+@pytest.mark.parametrize("cluster_algo", [0, 1, 2])
+def test_sweep_matches_standalone_runs(tmp_path, cluster_algo):
+    edges = _weighted_edges()
+    result_ids = sorted({node for edge in edges for node in edge[:2]} | {"orphan"})
+    sweep_df = analysis.sweep_min_strength(result_ids, edges, [4, 3, 2, 1], cluster_algo, str(tmp_path), processes=1)
+    assert list(sweep_df["Min Strength"]) == [1, 2, 3, 4]
+    for row in sweep_df.itertuples():
+        graph, clusters = _standalone(result_ids, edges, row._1, cluster_algo)
+        sizes = [len(cluster) for cluster in clusters if len(cluster) > 1]
+        assert row.Edges == graph.number_of_edges()
+        assert row.Components == nx.number_connected_components(graph)
+        assert row.Orphans == sum(1 for node in graph if graph.degree(node) == 0)
+        assert row.Clusters == len(sizes)
+        assert row.Modularity == pytest.approx(community.modularity(graph, clusters))
+    assert (tmp_path / "min_strength_sweep.xlsx").exists()
+
+
+def test_sweep_thresholds_raw_counts_of_normalised_weights(tmp_path):
+    counts = sparse.csr_matrix(np.array([[0, 3, 1, 0],
+                                         [3, 0, 2, 0],
+                                         [1, 2, 0, 1],
+                                         [0, 0, 1, 0]], dtype=float))
+    occurrences = np.array([4.0, 5.0, 4.0, 1.0])
+    network = (["a", "b", "c", "d"], counts, occurrences)
+    edges = citation_network.to_sweep_edges(network, citation_network.SALTON_COSINE)
+    assert sorted(edge[3] for edge in edges) == [1, 1, 2, 3]
+    for u, v, weight, count in edges:
+        x, y = "abcd".index(u), "abcd".index(v)
+        assert weight == pytest.approx(count / np.sqrt(occurrences[x] * occurrences[y]))
+
+    sweep_df = analysis.sweep_min_strength(network[0], edges, [2, 1], 0, str(tmp_path), processes=1)
+    assert list(sweep_df["Edges"]) == [4, 2]
+
+
+def test_minimum_strength_lists():
+    import serpg_gui
+
+    assert serpg_gui.is_valid_number_list("1,2,3")
+    assert serpg_gui.is_valid_number_list("1,")           # while typing
+    assert serpg_gui.is_valid_number_list("")
+    assert not serpg_gui.is_valid_number_list(",")
+    assert not serpg_gui.is_valid_number_list("1,a")
+    assert serpg_gui.parse_number_list("3,1,") == [3, 1]
+    assert serpg_gui.parse_number_list(",") == []
@@ -0,0 +1,94 @@
+import pandas as pd
+import pytest
+
+import lib.topic_model as topic_model
+from conftest import alldata, corpus_df, publication
+
+pytestmark = pytest.mark.usefixtures("no_plots")
+
+
+def _document_frequencies(df):
+    frequencies = {}
+    for tokens in topic_model.document_tokens(df.drop_duplicates("Result_id")):
+        for token in set(tokens):
+            frequencies[token] = frequencies.get(token, 0) + 1
+    return frequencies
+
+
+def test_changed_publications_are_not_counted_twice(tmp_path):
+    folder = str(tmp_path)
+    df = corpus_df(12)
+    topic_model.update_online_model(df, folder, workers=1)
+    for abstract in ["protein folding structure molecules enzymes", "protein folding structure molecules kinetics"]:
+        df.loc[df["Result_id"] == "P2", "Abstract"] = abstract
+        ldamodel, dictionary, assignments_df = topic_model.update_online_model(df, folder, workers=1)
+
+    assert dictionary.num_docs == 12
+    frequencies = _document_frequencies(df)
+    assert {token: dictionary.dfs[token_id] for token, token_id in dictionary.token2id.items()} == \
+        {token: frequencies[token] for token in dictionary.token2id}
+    assert "enzymes" not in dictionary.token2id             # only in the replaced abstract
+
+
+def test_removed_publications_leave_the_dictionary(tmp_path):
+    folder = str(tmp_path)
+    df = corpus_df(12)
+    topic_model.update_online_model(df, folder, workers=1)
+    df = pd.concat([df.iloc[1:], alldata([publication("N", title="Neural networks study",
+                                                      abstract="neural networks learning training")])])
+    ldamodel, dictionary, assignments_df = topic_model.update_online_model(df, folder, workers=1)
+    assert dictionary.num_docs == 12
+    assert sorted(assignments_df.index) == sorted(df["Result_id"])
+
+
+def test_unchanged_publications_keep_their_keywords(tmp_path):
+    folder = str(tmp_path)
+    df = corpus_df(12)
+    ldamodel, dictionary, before = topic_model.update_online_model(df, folder, workers=1)
+    assert list(before.columns) == topic_model.ASSIGNMENT_COLUMNS
+    df = pd.concat([df, corpus_df(24).iloc[12:]])
+    ldamodel, dictionary, after = topic_model.update_online_model(df, folder, workers=1)
+
+    unchanged = list(before.index)
+    assert after.loc[unchanged, "Topic"].tolist() == before["Topic"].tolist()
+    assert after.loc[unchanged, "Topic Keyword"].tolist() == before["Topic Keyword"].tolist()
+
+    cluster_df = topic_model.apply_topic_modelling(df.iloc[:4].copy(), corpus_model=(ldamodel, dictionary),
+                                                   topic_assignments=after)
+    assert cluster_df["Topic Keyword"].tolist() == before["Topic Keyword"].iloc[:4].tolist()
+
+
+def test_assignments_without_keywords_are_refreshed(tmp_path):
+    folder = str(tmp_path)
+    df = corpus_df(12)
+    ldamodel, dictionary, assignments_df = topic_model.update_online_model(df, folder, workers=1)
+    assignments_df.drop(columns="Topic Keyword").to_pickle(str(tmp_path / (topic_model.ONLINE_MODEL_FILE + ".pkl")))
+    ldamodel, dictionary, assignments_df = topic_model.update_online_model(df, folder, workers=1)
+    assert assignments_df["Topic Keyword"].notna().all()
+    assert dictionary.num_docs == 12
+
+
+def test_first_training_prunes_like_the_updates(tmp_path):
+    df = corpus_df(12)
+    ldamodel, dictionary, assignments_df = topic_model.update_online_model(df, str(tmp_path), workers=1)
+    expected = topic_model.Dictionary(topic_model.document_tokens(df))
+    expected.filter_extremes(no_below=topic_model.DICTIONARY_NO_BELOW, no_above=topic_model.DICTIONARY_NO_ABOVE,
+                             keep_n=topic_model.DICTIONARY_KEEP_N)
+    assert sorted(dictionary.token2id) == sorted(expected.token2id)
+    assert ldamodel.num_terms == len(dictionary)
+
+
+def test_update_reads_only_the_changed_publications(tmp_path, monkeypatch):
+    folder = str(tmp_path)
+    df = corpus_df(12)
+    ldamodel, before, assignments_df = topic_model.update_online_model(df, folder, workers=1)
+    tokenized = []
+    document_tokens = topic_model.document_tokens
+    monkeypatch.setattr(topic_model, "document_tokens", lambda df: tokenized.append(len(df.index)) or
+                        document_tokens(df))
+    df = pd.concat([df, alldata([publication("N", title="Neural networks study",
+                                             abstract="neural networks learning gradient")])])
+    ldamodel, after, assignments_df = topic_model.update_online_model(df, folder, workers=1)
+    assert tokenized == [1]
+    assert after.num_docs == 13
+    assert {token: after.token2id[token] for token in before.token2id} == before.token2id    # the words stay in place
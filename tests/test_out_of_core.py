@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import analysis
+import lib.citation_network as citation_network
+import lib.csr_graph as csr_graph
+import lib.out_of_core as out_of_core
+from conftest import SUBJECTS, alldata, publication
+
+
+def _random_alldata(no_of_roots=30, no_of_citing=200, seed=0):
+    rng = np.random.RandomState(seed)
+    citing_ids = ["C" + str(x) for x in range(0, no_of_citing)]
+    rows = []
+    for x in range(0, no_of_roots):
+        citing = rng.choice(citing_ids, size=rng.randint(1, 25), replace=False).tolist()
+        if x > 0 and rng.rand() < 0.3:
+            citing.append("R" + str(rng.randint(0, x)))
+        citing.append("missing" + str(x))           # listed by Google Scholar but not retrieved
+        rows.append(publication("R" + str(x), root=True, citing_pubs_id=";".join(citing), year=2000 + x % 10))
+    rows.extend(publication(citing_id, year=2010 + x % 5) for x, citing_id in enumerate(citing_ids))
+    return alldata(rows)
+
+
+def _edges(result_ids, rows, cols, weights):
+    return {tuple(sorted((str(result_ids[x]), str(result_ids[y])))): float(w) for x, y, w in zip(rows, cols, weights)}
+
+
+def _in_memory_edges(alldata_df, min_strength):
+    result_ids, citation_matrix = citation_network.create_citation_matrix(alldata_df)
+    weights = citation_network.bibliographic_coupling(citation_matrix).tocoo()
+    keep = (weights.row < weights.col) & (weights.data >= min_strength)
+    return _edges(result_ids, weights.row[keep], weights.col[keep], weights.data[keep])
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".xlsx"])
+@pytest.mark.parametrize("min_strength", [1, 2])
+def test_out_of_core_equals_in_memory(tmp_path, suffix, min_strength):
+    alldata_df = _random_alldata()
+    alldata_file = str(tmp_path / ("alldata" + suffix))
+    if suffix == ".csv":
+        alldata_df.to_csv(alldata_file, index=False)
+    else:
+        alldata_df.to_excel(alldata_file, index=False)
+
+    graph, years = out_of_core.build_coupling_graph(alldata_file, str(tmp_path / "spill"), min_strength,
+                                                    chunk_size=17, max_block_entries=50)
+    assert graph.result_ids == alldata_df["Result_id"].tolist()
+    assert years.tolist() == alldata_df["Year"].tolist()
+    assert isinstance(graph.indices, np.memmap)
+    rows = graph._entry_rows()
+    upper = rows < graph.indices
+    assert _edges(graph.result_ids, rows[upper], graph.indices[upper], graph.weights[upper]) == \
+        _in_memory_edges(alldata_df, min_strength)
+
+
+def test_spill_citations_interns_ids(tmp_path, citation_df):
+    alldata_file = str(tmp_path / "alldata.csv")
+    pd.concat([citation_df, citation_df.iloc[[3]]]).to_csv(alldata_file, index=False)       # A listed twice
+    result_ids, years = out_of_core.spill_citations(alldata_file, str(tmp_path), chunk_size=2)
+    assert result_ids.tolist() == ["R1", "R2", "R3", "A", "B", "C", "D"]
+    assert years.tolist() == [2012, 2013, 2010, 2016, 2017, 2018, 2019]
+    pairs = np.fromfile(str(tmp_path / "citations.bin"), dtype=np.int32).reshape(-1, 2)
+    assert sorted((result_ids[x], result_ids[y]) for x, y in pairs) == \
+        sorted([("A", "R1"), ("B", "R1"), ("C", "R1"), ("B", "R2"), ("C", "R2"), ("D", "R2"), ("C", "R3"),
+                ("R1", "R3")])
+
+
+def test_lookup_does_not_truncate_ids():
+    sorted_ids = np.array(["AB", "CD"])
+    node_ids = np.array([1, 0])
+    assert out_of_core._lookup(sorted_ids, node_ids, ["CD", "ABC", "A", "ZZ"]).tolist() == [0, -1, -1, -1]
+
+
+def test_louvain_on_memory_mapped_graph(tmp_path):
+    alldata_df = _random_alldata(seed=1)
+    alldata_file = str(tmp_path / "alldata.csv")
+    alldata_df.to_csv(alldata_file, index=False)
+    graph, years = out_of_core.build_coupling_graph(alldata_file, str(tmp_path / "spill"), 1)
+    in_memory = csr_graph.CSRGraph(graph.result_ids, np.array(graph.indptr), np.array(graph.indices),
+                                   np.array(graph.weights))
+    assert csr_graph.louvain(graph).tolist() == csr_graph.louvain(in_memory).tolist()
+
+
+def test_louvain_reads_memory_mapped_edges_in_blocks(tmp_path, monkeypatch):
+    alldata_df = _random_alldata(seed=2)
+    alldata_file = str(tmp_path / "alldata.csv")
+    alldata_df.to_csv(alldata_file, index=False)
+    graph, years = out_of_core.build_coupling_graph(alldata_file, str(tmp_path / "spill"), 1)
+    in_memory = csr_graph.CSRGraph(graph.result_ids, np.array(graph.indptr), np.array(graph.indices),
+                                   np.array(graph.weights))
+    expected = csr_graph.louvain(in_memory)
+
+    def to_scipy(self):
+        raise AssertionError("the whole adjacency was copied")
+
+    monkeypatch.setattr(csr_graph.CSRGraph, "to_scipy", to_scipy)
+    monkeypatch.setattr(csr_graph, "BLOCK_ENTRIES", 50)
+    assert isinstance(graph.indices, np.memmap)
+    assert graph.degree() == pytest.approx(in_memory.degree())
+    assert graph.number_of_edges() == len(in_memory.edge_list())
+    assert csr_graph.louvain(graph).tolist() == expected.tolist()
+
+
+def test_out_of_core_network_file(tmp_path, citation_df):
+    alldata_file = str(tmp_path / "alldata.csv")
+    citation_df.to_csv(alldata_file, index=False)
+    network_graph, labels = analysis.create_out_of_core_network_file(alldata_file, 1, str(tmp_path))
+    clusters_df = pd.read_csv(str(tmp_path / "clusters.csv"))
+    network_df = pd.read_csv(str(tmp_path / "network.csv"))
+    assert clusters_df["Result_id"].tolist() == network_graph.result_ids
+    assert clusters_df["Cluster"].tolist() == labels.tolist()
+    assert len(network_df.index) == network_graph.number_of_edges() == len(_in_memory_edges(citation_df, 1))
+
+
+def test_large_file_limitations_are_reported():
+    import serpg_gui
+
+    assert serpg_gui.out_of_core_limitations([2], 2, None, 0, None, None, False, 0, 3) == \
+        ["Cluster workbooks are not created for large files"]
+    assert len(serpg_gui.out_of_core_limitations([1, 2], 0, None, 1, 5, 3, True, 1, 0)) == 8
+
+
+def test_streaming_topic_file(tmp_path, no_plots):
+    import lib.topic_model as topic_model
+
+    rows = [publication("P" + str(x), title="Study " + str(x), abstract=SUBJECTS[x % 3][1]) for x in range(0, 90)]
+    alldata_df = alldata(rows + rows[:2])                   # P0 and P1 listed twice
+    alldata_file = str(tmp_path / "alldata.csv")
+    alldata_df.to_csv(alldata_file, index=False)
+    no_of_topics, topics = analysis.create_streaming_topic_file(alldata_file, str(tmp_path), max_topics=6,
+                                                                chunk_size=25)
+    topics_df = pd.read_csv(str(tmp_path / "topics.csv"))
+    assert topics_df["Result_id"].tolist() == alldata_df["Result_id"].tolist()
+    assert topics_df["Topic"].tolist() == topics.tolist()
+    in_memory = topic_model.streaming_clusters(lambda: topic_model.dataframe_chunks(alldata_df, 25), no_of_topics)
+    assert topics.tolist() == in_memory.tolist()
+    assert no_of_topics >= 3
+    for subject in range(0, 3):                             # every topic holds one subject
+        assert len(set(topics_df["Topic"].iloc[subject::3])) == 1
+    assert len(set(topics_df["Topic"].iloc[:3])) == 3
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from scipy import sparse
+
+import lib.citation_network as citation_network
+
+
+def _network():
+    counts = np.array([[0, 4, 2, 1, 0],
+                       [4, 0, 1, 0, 0],
+                       [2, 1, 0, 3, 0],
+                       [1, 0, 3, 0, 1],
+                       [0, 0, 0, 1, 0]], dtype=float)
+    occurrences = np.array([6.0, 5.0, 4.0, 5.0, 2.0])
+    return ["a", "b", "c", "d", "e"], sparse.csr_matrix(counts), occurrences
+
+
+@pytest.mark.parametrize("normalization, formula", [
+    (citation_network.SALTON_COSINE, lambda w, s_i, s_j: w / np.sqrt(s_i * s_j)),
+    (citation_network.JACCARD, lambda w, s_i, s_j: w / (s_i + s_j - w)),
+    (citation_network.ASSOCIATION_STRENGTH, lambda w, s_i, s_j: w / (s_i * s_j))])
+def test_normalized_weights(normalization, formula):
+    result_ids, counts, occurrences = _network()
+    weights = citation_network.normalize_weights(counts, occurrences, normalization).toarray()
+    dense = counts.toarray()
+    for x, y in zip(*np.nonzero(dense)):
+        assert weights[x, y] == pytest.approx(formula(dense[x, y], occurrences[x], occurrences[y]))
+    assert np.allclose(weights, weights.T)
+
+
+def test_top_k_keeps_the_strongest_edges_of_either_publication():
+    result_ids, counts, occurrences = _network()
+    weights = citation_network.top_k_edges(counts, 1).toarray()
+    kept = {(result_ids[x], result_ids[y]) for x, y in zip(*np.nonzero(np.triu(weights)))}
+    assert kept == {("a", "b"), ("c", "d"), ("d", "e")}     # e's only edge is its strongest
+    assert np.allclose(weights, weights.T)
+
+
+def test_min_strength_applies_to_raw_counts():
+    network = _network()
+    result_ids, weights, occurrences = citation_network.prune_network(network, 2, citation_network.SALTON_COSINE)
+    assert weights.nnz == 6
+    assert weights.max() < 1
+
+
+def test_disparity_backbone_keeps_only_edges():
+    result_ids, counts, occurrences = _network()
+    weights = citation_network.disparity_backbone(counts, 0.05).toarray()
+    assert weights[3, 4] == weights[4, 3] == 1          # the only edge of e
+
+
+@pytest.mark.parametrize("top_k", [0, -1])
+def test_top_k_must_keep_an_edge(top_k):
+    with pytest.raises(ValueError):
+        citation_network.prune_network(_network(), 1, top_k=top_k)
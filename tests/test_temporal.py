@@ -0,0 +1,67 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+import lib.csr_graph as csr_graph
+import lib.temporal as temporal
+
+
+def test_window_ranges():
+    assert temporal.window_ranges(2010, 2014, 3) == [(2010, 2012), (2011, 2013), (2012, 2014)]
+    assert temporal.window_ranges(2010, 2015, 3, step=2) == [(2010, 2012), (2012, 2014)]
+    assert temporal.window_ranges(2010, 2011, 5) == [(2010, 2014)]
+
+
+@pytest.fixture
+def dated_cliques():
+    ''' Two cliques of 2010 and two of 2014, every clique bridged to the next by one edge
+    '''
+
+    graph = nx.Graph()
+    for clique in range(0, 4):
+        nodes = [str(clique * 5 + x) for x in range(0, 5)]
+        graph.add_edges_from((u, v) for x, u in enumerate(nodes) for v in nodes[x + 1:])
+        if clique > 0:
+            graph.add_edge(str(clique * 5 - 1), nodes[0])
+    csr = csr_graph.CSRGraph.from_networkx(graph)
+    years = np.array([2010 if int(node) < 10 else 2014 for node in csr.result_ids])
+    return csr, years
+
+
+def test_window_clusters(dated_cliques):
+    csr, years = dated_cliques
+    clusters = temporal.window_clusters(csr, years, (2010, 2012))
+    assert sorted(sorted(cluster, key=int) for cluster in clusters) == \
+        [[str(x) for x in range(0, 5)], [str(x) for x in range(5, 10)]]
+    assert temporal.window_clusters(csr, years, (2011, 2013)) == []
+
+
+def test_cluster_windows_parallel_equals_serial(dated_cliques):
+    csr, years = dated_cliques
+    windows = temporal.window_ranges(2010, 2014, 2)
+    serial = temporal.cluster_windows(csr, years, windows, processes=1)
+    assert temporal.cluster_windows(csr, years, windows, processes=2) == serial
+    assert [len(clusters) for clusters in serial] == [2, 0, 0, 2]
+
+
+def test_match_clusters_jaccard():
+    previous = [("a", "b", "c", "d"), ("e", "f")]
+    current = [("a", "b", "x"), ("c", "d", "e", "f")]
+    common = {"a", "b", "c", "d", "e", "f"}
+    links = temporal.match_clusters(previous, current, common)
+    assert links == [(0, 0, pytest.approx(0.5)), (0, 1, pytest.approx(2 / 6)), (1, 1, pytest.approx(0.5))]
+    assert temporal.match_clusters(previous, current, common, min_overlap=0.4) == \
+        [(0, 0, pytest.approx(0.5)), (1, 1, pytest.approx(0.5))]
+
+
+def test_cluster_events():
+    links = [(0, 0, 0.9), (1, 1, 0.5), (2, 1, 0.5), (3, 2, 0.4), (3, 3, 0.4)]
+    events = temporal.cluster_events(5, 5, links)
+    assert events == [(0, 0, 0.9, "Continuation"), (1, 1, 0.5, "Merge"), (2, 1, 0.5, "Merge"),
+                      (3, 2, 0.4, "Split"), (3, 3, 0.4, "Split"), (4, None, 0.0, "Death"), (None, 4, 0.0, "Birth")]
+
+
+def test_cluster_events_merge_and_split():
+    links = [(0, 0, 0.4), (0, 1, 0.4), (1, 0, 0.4)]
+    assert [event for x, y, overlap, event in temporal.cluster_events(2, 2, links)] == \
+        ["Merge and Split", "Split", "Merge"]
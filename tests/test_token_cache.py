@@ -0,0 +1,84 @@
+import pytest
+
+import lib.topic_model as topic_model
+from conftest import alldata, publication
+
+
+@pytest.fixture(autouse=True)
+def empty_token_cache(monkeypatch):
+    monkeypatch.setattr(topic_model, "_token_cache", {})
+
+
+@pytest.fixture
+def texts_df():
+    return alldata([publication("A", title="Neural networks for citation analysis",
+                                abstract="We cluster citing publications with neural networks."),
+                    publication("B", title="Topic models of scientific abstracts",
+                                abstract="Latent topics describe the abstracts of publications."),
+                    publication("C", title="Neural networks for citation analysis", abstract="")])
+
+
+def test_cached_tokens_computed_once(monkeypatch):
+    calls = []
+    prepare = topic_model.prepare_text_for_lda
+    monkeypatch.setattr(topic_model, "prepare_text_for_lda", lambda text: calls.append(text) or prepare(text))
+    first = topic_model.cached_tokens("Clustering scientific publications")
+    assert topic_model.cached_tokens("Clustering scientific publications") is first
+    assert first == ["clustering", "scientific", "publication"]
+    assert calls == ["Clustering scientific publications"]
+
+
+def test_document_tokens_are_title_then_abstract(texts_df):
+    text_list = topic_model.document_tokens(texts_df)
+    assert text_list == [topic_model.prepare_text_for_lda(title) + topic_model.prepare_text_for_lda(abstract)
+                         for title, abstract in zip(texts_df["Title"], texts_df["Abstract"])]
+
+
+def test_corpus_tokens_match_per_text_processing(texts_df):
+    tokens = topic_model.corpus_tokens(texts_df, n_process=1)
+    assert list(tokens) == ["A", "B", "C"]
+    assert tokens["C"] == topic_model.prepare_text_for_lda("Neural networks for citation analysis")
+    assert len(topic_model._token_cache) == 5           # the repeated title is processed once
+    assert list(tokens.values()) == topic_model.document_tokens(texts_df)
+
+
+def test_corpus_tokens_only_process_missing_texts(monkeypatch, texts_df):
+    topic_model.corpus_tokens(texts_df.iloc[:1], n_process=1)
+    processed = []
+    prepare = topic_model.prepare_texts_for_lda
+    monkeypatch.setattr(topic_model, "prepare_texts_for_lda",
+                        lambda texts, batch_size, n_process: processed.extend(texts) or prepare(texts))
+    topic_model.corpus_tokens(texts_df, n_process=1)
+    assert sorted(processed) == sorted(["Topic models of scientific abstracts",
+                                        "Latent topics describe the abstracts of publications.", ""])
+
+
+def test_token_cache_round_trip(tmp_path, monkeypatch, texts_df):
+    tokens = topic_model.corpus_tokens(texts_df, n_process=1)
+    topic_model.save_token_cache(str(tmp_path))
+    monkeypatch.setattr(topic_model, "_token_cache", {})
+    assert topic_model.load_token_cache(str(tmp_path)) == 5
+    monkeypatch.setattr(topic_model, "prepare_texts_for_lda", None)        # everything comes from the cache
+    assert topic_model.corpus_tokens(texts_df) == tokens
+
+
+def test_load_without_saved_cache(tmp_path):
+    topic_model.cached_tokens("Clustering")
+    assert topic_model.load_token_cache(str(tmp_path)) == 1
+
+
+def test_parallel_preparation_equals_serial(monkeypatch):
+    import lib.lemma_cache as lemma_cache
+
+    monkeypatch.setattr(lemma_cache, "_lemmas", lemma_cache.OrderedDict())
+    texts = ["Neural networks cluster citing publications", "Latent topics describe abstracts", "",
+             "Running studies of libraries", "The @author shared https://example.org/paper"]
+    parallel = topic_model.prepare_texts_for_lda(texts, batch_size=2, n_process=2)
+    assert lemma_cache._lemmas[("libraries", lemma_cache.ANY_POS)] == "library"      # learnt from the workers
+    assert parallel == [topic_model.prepare_text_for_lda(text) for text in texts]
+
+
+def test_token_cache_key_has_a_version(monkeypatch):
+    key = topic_model._text_key("Clustering")
+    monkeypatch.setattr(topic_model, "TOKEN_VERSION", topic_model.TOKEN_VERSION + 1)
+    assert topic_model._text_key("Clustering") != key
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from gensim.models.ldamodel import LdaModel
+
+import lib.topic_model as topic_model
+
+DOCUMENTS = [["neural", "network", "training", "layer"], ["citation", "coupling", "journal", "reference"],
+             ["protein", "folding", "molecule", "structure"], ["neural", "layer", "gradient", "training"],
+             ["citation", "reference", "bibliometrics", "journal"], ["protein", "structure", "biology", "molecule"]]
+
+
+@pytest.fixture
+def lda():
+    text_list = DOCUMENTS * 5
+    dictionary, corpus = topic_model.prepare_bow_dictionary(text_list)
+    ldamodel = LdaModel(corpus, num_topics=3, id2word=dictionary, passes=20, random_state=0)
+    return text_list, ldamodel, dictionary
+
+
+def _one_at_a_time(text_list, ldamodel, dictionary):
+    topic_matrix = np.zeros((len(text_list), ldamodel.num_topics))
+    for x, tokens in enumerate(text_list):
+        for topic, probability in ldamodel.get_document_topics(dictionary.doc2bow(tokens), minimum_probability=0):
+            topic_matrix[x, topic] = probability
+    return topic_matrix
+
+
+@pytest.mark.parametrize("chunk_size", [1, 4, topic_model.INFERENCE_CHUNK_SIZE])
+def test_batched_topics_equal_get_document_topics(lda, chunk_size):
+    text_list, ldamodel, dictionary = lda
+    batched = topic_model.document_topic_matrix(text_list, ldamodel, dictionary, chunk_size)
+    expected = _one_at_a_time(text_list, ldamodel, dictionary)
+    assert batched.sum(axis=1) == pytest.approx(np.ones(len(text_list)))
+    assert batched == pytest.approx(expected, abs=0.02)
+    assert batched.argmax(axis=1).tolist() == expected.argmax(axis=1).tolist()
+
+
+def test_best_topics_equal_retrieve_topic_for_doc(lda):
+    text_list, ldamodel, dictionary = lda
+    text_list = text_list + [["unknown", "words"]]
+    topic_number, probability = topic_model.best_topics(text_list, ldamodel, dictionary)
+    for tokens, number, value in zip(text_list, topic_number.tolist(), probability.tolist()):
+        topics = topic_model.retrieve_topic_for_doc(tokens, ldamodel, dictionary)
+        best, best_probability = max(topics, key=lambda topic: topic[1])
+        assert number == best
+        assert value == pytest.approx(best_probability, abs=0.02)
+
+
+def test_no_documents(lda):
+    text_list, ldamodel, dictionary = lda
+    assert topic_model.document_topic_matrix([], ldamodel, dictionary).shape == (0, 3)
+    topic_number, probability = topic_model.best_topics([], ldamodel, dictionary)
+    assert len(topic_number) == len(probability) == 0
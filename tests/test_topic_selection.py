@@ -0,0 +1,153 @@
+import inspect
+import multiprocessing
+import time
+
+import numpy as np
+import pytest
+from scipy import sparse
+
+import analysis
+import lib.topic_model as topic_model
+
+pytestmark = pytest.mark.usefixtures("no_plots")
+
+
+@pytest.fixture
+def blobs():
+    ''' 240 documents in 6 well separated groups
+    '''
+
+    rng = np.random.RandomState(0)
+    centres = rng.rand(6, 10) * 20
+    return np.vstack([centre + rng.rand(40, 10) for centre in centres])
+
+
+class _Knees:
+    ''' A KneeLocator giving the knees of a list, one per round
+    '''
+
+    knees = []
+
+    def __init__(self, x, y, curve, direction):
+        self.knee = _Knees.knees.pop(0)
+
+
+def test_lost_refinement_keeps_the_last_knee(monkeypatch, blobs):
+    monkeypatch.setattr(topic_model, "KneeLocator", _Knees)
+    _Knees.knees = [9, None]
+    assert topic_model.find_optimal_clusters_fast(blobs, 60, processes=1) == 9
+    _Knees.knees = [None]
+    assert topic_model.find_optimal_clusters_fast(blobs, 60, processes=1) is None
+
+
+def test_lost_streaming_refinement_keeps_the_last_knee(monkeypatch, blobs):
+    monkeypatch.setattr(topic_model, "KneeLocator", _Knees)
+    chunks = lambda: (blobs[start:start + 60].tolist() for start in range(0, len(blobs), 60))
+    reducer = (None, None, None)
+    monkeypatch.setattr(topic_model, "reduce_documents", lambda reducer, docs: np.array(docs))
+    _Knees.knees = [9, None]
+    assert topic_model.find_optimal_clusters_streaming(chunks, 60, reducer) == 9
+    _Knees.knees = [None]
+    assert topic_model.find_optimal_clusters_streaming(chunks, 60, reducer) is None
+
+
+def test_fast_sweep_finds_the_groups(blobs):
+    assert topic_model.find_optimal_clusters_fast(blobs, 30, processes=1) in range(5, 8)
+
+
+def test_full_sweep_stays_the_default():
+    for function in [topic_model.get_optimal_cluster_value, topic_model.apply_topic_modelling,
+                     topic_model.train_corpus_model]:
+        assert inspect.signature(function).parameters["k_selection"].default == topic_model.FULL_SWEEP
+
+
+def test_pool_shared_by_sweeps_and_small_sweeps_in_process(blobs):
+    try:
+        serial = topic_model.find_optimal_clusters_fast(blobs, 60, processes=1)
+        topic_model.find_optimal_clusters_fast(blobs, 10, processes=2)
+        assert topic_model._sweep_pools == {}
+        assert topic_model.find_optimal_clusters_fast(blobs, 60, processes=2) == serial
+        pool = topic_model._sweep_pools[2]
+        topic_model.find_optimal_clusters_fast(blobs, 60, processes=2)
+        assert topic_model._sweep_pools == {2: pool}
+    finally:
+        topic_model.shutdown_sweep_pool()
+    assert topic_model._sweep_pools == {}
+
+
+class _RecordingPool:
+    ''' A pool recording the arguments of every task
+    '''
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.arguments = []
+
+    def map(self, function, *iterables):
+        iterables = [list(iterable) for iterable in iterables]
+        self.arguments.extend(zip(*iterables))
+        return self.pool.map(function, *iterables)
+
+
+def test_sweep_documents_are_not_sent_per_task(monkeypatch, blobs):
+    data = sparse.csr_matrix(blobs)
+    serial = topic_model.find_optimal_clusters_fast(data, 60, processes=1)
+    recording = _RecordingPool(topic_model._sweep_pool(2))
+    monkeypatch.setattr(topic_model, "_sweep_pool", lambda processes: recording)
+    try:
+        assert topic_model.find_optimal_clusters_fast(data, 60, processes=2) == serial
+        assert topic_model.find_optimal_clusters_fast(blobs, 60, processes=2) == serial
+    finally:
+        topic_model.shutdown_sweep_pool()
+    assert len(recording.arguments) > 0
+    assert all(isinstance(folder, str) and isinstance(k, int) for folder, k in recording.arguments)
+
+
+TEXTS = [["neural", "network", "training"], ["citation", "coupling", "journal"], ["protein", "folding", "molecule"],
+         ["neural", "layer", "training"], ["citation", "reference", "journal"], ["protein", "structure", "biology"]] * 4
+
+
+def _slow_coherence_task(num_topics):
+    if num_topics > 2:
+        time.sleep(60)
+    return num_topics, -float(num_topics)
+
+
+def _failing_coherence_task(num_topics):
+    raise RuntimeError("no memory for " + str(num_topics))
+
+
+def test_coherence_selection_in_parallel_equals_serial():
+    serial = topic_model.select_num_topics(TEXTS, max_topics=4, processes=1)
+    assert topic_model.select_num_topics(TEXTS, max_topics=4, processes=2) == serial
+    assert sorted(serial[1]) == [2, 3, 4]
+
+
+def test_coherence_workers_terminated_at_the_deadline(monkeypatch):
+    monkeypatch.setattr(topic_model, "_coherence_task", _slow_coherence_task)
+    start = time.time()
+    num_topics, scores = topic_model.select_num_topics(TEXTS, max_topics=6, processes=2, time_budget=1)
+    assert time.time() - start < 30
+    assert (num_topics, scores) == (2, {2: -2.0})
+    assert multiprocessing.active_children() == []
+
+
+def test_coherence_worker_errors_are_raised(monkeypatch):
+    monkeypatch.setattr(topic_model, "_coherence_task", _failing_coherence_task)
+    with pytest.raises(RuntimeError, match="no memory"):
+        topic_model.select_num_topics(TEXTS, max_topics=4, processes=2)
+    assert multiprocessing.active_children() == []
+
+
+def test_cluster_analysis_passes_the_topic_selection(monkeypatch, citation_df):
+    selections = []
+
+    def apply_topic_modelling(df, k_selection, **kwargs):
+        selections.append(k_selection)
+        raise StopIteration
+
+    monkeypatch.setattr(topic_model, "apply_topic_modelling", apply_topic_modelling)
+    with pytest.raises(StopIteration):
+        analysis.create_cluster_indi(("A", "B"), 1, "cluster 1", citation_df, 2010, 2020, "unused",
+                                     k_selection=topic_model.COHERENCE_SELECTION)
+    assert selections == [topic_model.COHERENCE_SELECTION]